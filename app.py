@@ -9,10 +9,11 @@ import threading
 from pathlib import Path
 from typing import Optional, Dict, Any, List
 from collections import deque
+from datetime import datetime, timedelta
 
 # Textual imports - needed for UI
 from textual.app import App, ComposeResult
-from textual.widgets import Header, Footer, DataTable, Static, Button, Input, Label, Checkbox
+from textual.widgets import Header, Footer, DataTable, Static, Button, Input, Label, Checkbox, Tree
 from textual.containers import Container, Horizontal, Vertical
 from textual.screen import ModalScreen
 
@@ -255,7 +256,10 @@ class DownloadHistory:
                 "timestamp": time.time(),
                 "date": time.strftime("%Y-%m-%d %H:%M:%S"),
                 "filepath": download.get("filepath",""),
-                "error": download.get("status") if completion_status=="failed" else None
+                "error": download.get("status") if completion_status=="failed" else None,
+                "retries": download.get("retries", 0),
+                "retry_wait": round(float(download.get("retry_wait") or 0.0), 1),
+                "retry_log": download.get("retry_log") or []
             }
             self.history.append(entry)
             self.save_history()
@@ -279,6 +283,8 @@ class DownloadHistory:
             week_ago = time.time() - (7*24*3600)
             recent = sum(1 for h in self.history if h.get("timestamp",0) > week_ago)
             success_rate = (completed / total * 100) if total > 0 else 0
+            retries = sum(h.get("retries", 0) or 0 for h in self.history)
+            retry_wait = sum(h.get("retry_wait", 0) or 0 for h in self.history)
             return{
                 "total_downloads": total,
                 "completed": completed,
@@ -287,7 +293,9 @@ class DownloadHistory:
                 "success_rate": success_rate,
                 "total_downloaded": total_downloaded,
                 "by_type": types,
-                "recent_week": recent
+                "recent_week": recent,
+                "retries": retries,
+                "retry_wait": retry_wait
             }
         
         except Exception:
@@ -298,6 +306,948 @@ class DownloadHistory:
             self.history = []
             self.save_history()
             logging.exception("[TermoLoad] Failed to clear history")
+
+class HostProfiles:
+    """What TermoLoad has learned about each HTTP host, kept in ``~/.termoload_hosts.json``.
+
+    Per host: whether Range requests are honored, total throughput seen for
+    each connection count (and the best one), per-connection throughput,
+    connect/TLS latency, and how many transfers ended in errors or throttling
+    (429/503). ``download_file`` reads it to pick a strategy up front and
+    every finished transfer feeds it back.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path or (Path.home() / ".termoload_hosts.json")
+        self.hosts: Dict[str, Dict[str, Any]] = self.load()
+        # Older files keyed some hosts with user:pass@; re-key those so the next save drops them
+        self._dirty = any("@" in key for key in self.hosts)
+        if self._dirty:
+            self.hosts = {key.rsplit("@", 1)[-1]: value for key, value in sorted(self.hosts.items(), key=lambda kv: "@" not in kv[0])}
+        self._last_save = 0.0
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except Exception:
+            logging.exception("[TermoLoad] Failed to load host profiles")
+            return {}
+
+    def save(self, force: bool = False) -> None:
+        if not self._dirty or (not force and time.monotonic() - self._last_save < 5.0):
+            return
+        try:
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(self.hosts, f, indent=2)
+            self._dirty = False
+            self._last_save = time.monotonic()
+        except Exception:
+            logging.exception("[TermoLoad] Failed to save host profiles")
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        # Key on host[:port] only, so user:pass@ never reaches the profile file
+        # and credentialed and plain URLs for one origin share a bucket
+        try:
+            parsed = urlparse(url)
+            host = parsed.hostname
+            if not host:
+                return url.lower()
+            if ":" in host:
+                host = f"[{host}]"
+            return f"{host}:{parsed.port}" if parsed.port else host
+        except Exception:
+            return url
+
+    def _entry(self, url: str) -> Dict[str, Any]:
+        host = self.host_of(url)
+        p = self.hosts.get(host)
+        if p is None:
+            p = self.hosts[host] = {
+                "range_support": None, "best_segments": 0, "segment_bps": {}, "segment_samples": {},
+                "conn_bps": 0.0, "connect_ms": 0.0, "transfers": 0, "errors": 0, "throttled": 0,
+            }
+        p["updated"] = time.time()
+        self._dirty = True
+        return p
+
+    def get(self, url: str) -> Dict[str, Any]:
+        p = dict(self.hosts.get(self.host_of(url)) or {})
+        done = (p.get("transfers", 0) or 0) + (p.get("errors", 0) or 0)
+        p["error_rate"] = (p.get("errors", 0) / done) if done else 0.0
+        p["throttle_rate"] = (p.get("throttled", 0) / done) if done else 0.0
+        return p
+
+    def record_range_support(self, url: str, supported: bool) -> None:
+        p = self._entry(url)
+        if p.get("range_support") != supported:
+            logging.info(f"[TermoLoad] Host {self.host_of(url)}: range requests {'supported' if supported else 'not supported'}")
+        p["range_support"] = supported
+        self.save()
+
+    def record_connect(self, url: str, seconds: float) -> None:
+        p = self._entry(url)
+        ms = seconds * 1000.0
+        p["connect_ms"] = ms if not p.get("connect_ms") else 0.3 * ms + 0.7 * p["connect_ms"]
+        self.save()
+
+    def record_error(self, url: str, status: Optional[int] = None) -> None:
+        p = self._entry(url)
+        p["errors"] = p.get("errors", 0) + 1
+        if status in (429, 503):
+            p["throttled"] = p.get("throttled", 0) + 1
+        self.save()
+
+    def record_transfer(self, url: str, nbytes: int, seconds: float, connections: int) -> None:
+        """Fold a finished transfer into the host's throughput history.
+
+        Short transfers say more about latency than bandwidth, so anything
+        under a second or 1 MiB only counts towards the success total.
+        """
+        p = self._entry(url)
+        p["transfers"] = p.get("transfers", 0) + 1
+        if seconds >= 1.0 and nbytes >= 1024 * 1024:
+            bps = nbytes / seconds
+            key = str(max(1, int(connections)))
+            by = p.setdefault("segment_bps", {})
+            samples = p.setdefault("segment_samples", {})
+            by[key] = bps if key not in by else 0.5 * bps + 0.5 * by[key]
+            samples[key] = samples.get(key, 0) + 1
+            per_conn = bps / max(1, int(connections))
+            p["conn_bps"] = per_conn if not p.get("conn_bps") else 0.3 * per_conn + 0.7 * p["conn_bps"]
+            p["best_segments"] = int(max(by, key=by.get))
+        self.save(force=True)
+
+    def choose_segments(self, url: str, cap: int) -> int:
+        """Connection count for the next transfer from this host.
+
+        Starts at ``cap``. After that it uses the best count seen so far,
+        doubles towards ``cap`` while the best is also the largest tried, and
+        backs off by one when the host throttles often.
+        """
+        cap = max(1, int(cap))
+        p = self.get(url)
+        by = {int(k): v for k, v in (p.get("segment_bps") or {}).items()}
+        if not by:
+            return cap
+        best = max(by, key=by.get)
+        if p["throttle_rate"] > 0.2:
+            return max(1, min(best - 1, cap))
+        if best == max(by) and best < cap:
+            return min(cap, best * 2)
+        return min(best, cap)
+
+    def trace_config(self):
+        """aiohttp TraceConfig that feeds connect (TCP + TLS) latency into the profiles."""
+        aiohttp = get_aiohttp()
+        trace = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx, params):
+            ctx.url = str(params.url)
+
+        async def on_connection_create_start(session, ctx, params):
+            ctx.connect_started = time.monotonic()
+
+        async def on_connection_create_end(session, ctx, params):
+            started = getattr(ctx, "connect_started", None)
+            if started is not None and getattr(ctx, "url", None):
+                self.record_connect(ctx.url, time.monotonic() - started)
+
+        trace.on_request_start.append(on_request_start)
+        trace.on_connection_create_start.append(on_connection_create_start)
+        trace.on_connection_create_end.append(on_connection_create_end)
+        return trace
+
+# Statuses worth another attempt; 429 and 503 may say when in Retry-After
+RETRYABLE_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or an HTTP date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        from email.utils import parsedate_to_datetime
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except Exception:
+        return None
+
+def _classify_failure(error: Any = None, status: Optional[int] = None, headers=None) -> tuple:
+    """``(kind, retry_after)`` for a failed attempt, kind being transient, throttled, disk or permanent.
+
+    Dropped, reset, timed-out and refused connections and 5xx/408/425 are
+    transient; 429/503 are throttled and may carry Retry-After; a full disk
+    (or quota) is disk; other 4xx, certificate errors and other local disk
+    errors are permanent.
+    """
+    import errno
+    aiohttp = get_aiohttp()
+    if status is None and error is not None:
+        status = getattr(error, "status", None)
+        headers = headers if headers is not None else getattr(error, "headers", None)
+    if isinstance(status, int) and status >= 400:
+        retry_after = _parse_retry_after((headers or {}).get("Retry-After")) if headers else None
+        if status in (429, 503):
+            return "throttled", retry_after
+        return ("transient" if status in RETRYABLE_STATUSES else "permanent"), retry_after
+    if error is None:
+        return "permanent", None
+    if isinstance(error, (aiohttp.ClientConnectorCertificateError, aiohttp.ClientSSLError, aiohttp.InvalidURL)):
+        return "permanent", None
+    if isinstance(error, (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError,
+                          asyncio.TimeoutError, ConnectionError)):
+        return "transient", None
+    if isinstance(error, OSError) and error.errno in (errno.ECONNRESET, errno.ECONNABORTED, errno.ETIMEDOUT,
+                                                      errno.EHOSTUNREACH, errno.ENETUNREACH, errno.ENETDOWN):
+        return "transient", None
+    if isinstance(error, OSError) and error.errno in (errno.ENOSPC, getattr(errno, "EDQUOT", errno.ENOSPC)):
+        return "disk", None
+    return "permanent", None
+
+class CircuitBreaker:
+    """Per-host circuit breaker, so failing origins are not hammered by every retry at once.
+
+    After ``threshold`` transient failures in a row a host is open: attempts
+    wait out a cooldown (doubling each time it opens again, up to
+    ``max_cooldown``) instead of connecting. Then a single attempt goes
+    through as a probe (half-open); if it succeeds the circuit closes, if
+    it fails the circuit opens again.
+    """
+
+    def __init__(self, threshold: int = 5, cooldown: float = 15.0, max_cooldown: float = 600.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._hosts: Dict[str, Dict[str, Any]] = {}
+
+    def _entry(self, host: str) -> Dict[str, Any]:
+        return self._hosts.setdefault(host, {"failures": 0, "opened": None, "cooldown": self.cooldown, "probing": False})
+
+    def state(self, host: str) -> str:
+        st = self._entry(host)
+        if st["opened"] is None:
+            return "closed"
+        return "open" if time.monotonic() < st["opened"] + st["cooldown"] else "half-open"
+
+    def wait_time(self, host: str) -> float:
+        st = self._entry(host)
+        if st["opened"] is None:
+            return 0.0
+        return max(0.0, st["opened"] + st["cooldown"] - time.monotonic())
+
+    async def acquire(self, host: str, on_wait=None) -> bool:
+        """Return once an attempt on ``host`` may start; True when that attempt is the half-open probe.
+
+        ``on_wait(seconds)`` is called while the attempt is held back.
+        """
+        while True:
+            st = self._entry(host)
+            if st["opened"] is None:
+                return False
+            wait = self.wait_time(host)
+            if wait <= 0 and not st["probing"]:
+                st["probing"] = True
+                logging.info(f"[TermoLoad] Circuit for {host} half-open; sending one probe")
+                return True
+            if on_wait is not None:
+                on_wait(wait or 1.0)
+            await asyncio.sleep(min(max(wait, 0.5), 5.0))
+
+    def release(self, host: str) -> None:
+        """An attempt ended without a verdict (paused); let another probe through."""
+        self._entry(host)["probing"] = False
+
+    def success(self, host: str) -> None:
+        st = self._entry(host)
+        if st["opened"] is not None:
+            logging.info(f"[TermoLoad] Circuit for {host} closed")
+        st.update(failures=0, opened=None, cooldown=self.cooldown, probing=False)
+
+    def failure(self, host: str) -> None:
+        st = self._entry(host)
+        st["failures"] += 1
+        if st["probing"]:
+            st["probing"] = False
+            st["opened"] = time.monotonic()
+            st["cooldown"] = min(st["cooldown"] * 2, self.max_cooldown)
+            logging.warning(f"[TermoLoad] Circuit for {host} re-opened for {st['cooldown']:.0f}s (probe failed)")
+        elif st["opened"] is None and st["failures"] >= self.threshold:
+            st["opened"] = time.monotonic()
+            logging.warning(f"[TermoLoad] Circuit for {host} open for {st['cooldown']:.0f}s "
+                            f"after {st['failures']} failures in a row")
+
+class HostScheduler:
+    """Admission control for HTTP downloads: a global cap, per-host caps, round-robin between hosts.
+
+    A download takes a slot (``acquire``/``release``) before it starts: at
+    most ``max_active`` at once, and per host no more than that host's
+    limit. Downloads waiting for a slot are grouped by host and served one
+    host at a time in turn, so a long batch from one origin cannot starve
+    the others. A waiter's ``key(memo)`` (queue class rank, queue position)
+    orders this: only hosts holding a waiter of the best class take turns,
+    and each host starts its waiters in key order. Keys are read when a
+    slot frees, so reordering the queue applies to downloads already
+    waiting; each is read once per grant, and ``memo`` is a dict shared by
+    all keys of one grant for lookups they would otherwise each repeat. Each request then leases a connection to its host
+    (``acquire_connection``/``release_connection``), which caps the sockets
+    open to one origin across all downloads, range workers included.
+
+    Limits come from ``host_limits`` (``{"example.com": 2}``; an entry also
+    covers subdomains) and fall back to ``per_host``.
+    """
+
+    def __init__(self, max_active: int = 3, per_host: int = 4, host_limits: Optional[Dict[str, int]] = None):
+        self.active: Dict[str, int] = {}
+        self.conns: Dict[str, int] = {}
+        self.peak: Dict[str, int] = {}
+        self._waiting: Dict[str, List[tuple]] = {}
+        self._turn: List[str] = []
+        self._conn_waiting: Dict[str, deque] = {}
+        self.configure(max_active, per_host, host_limits)
+
+    def configure(self, max_active: int, per_host: int, host_limits: Optional[Dict[str, int]] = None) -> None:
+        """Apply (possibly changed) settings; raised limits admit waiting downloads at once."""
+        self.max_active = max(1, int(max_active or 1))
+        self.per_host = max(1, int(per_host or 1))
+        limits = {}
+        for name, value in (host_limits or {}).items():
+            try:
+                limits[str(name).strip().lower()] = max(1, int(value))
+            except (TypeError, ValueError):
+                logging.warning(f"[TermoLoad] Ignoring host limit {name!r}: {value!r}")
+        self.host_limits = limits
+        self._grant()
+        for host in list(self._conn_waiting):
+            self._grant_connections(host)
+
+    def limit(self, host: str) -> int:
+        host = host.lower()
+        name = host.rsplit(":", 1)[0] if host.count(":") == 1 else host
+        if host in self.host_limits:
+            return self.host_limits[host]
+        labels = name.split(".")
+        for i in range(len(labels) - 1):
+            parent = ".".join(labels[i:])
+            if parent in self.host_limits:
+                return self.host_limits[parent]
+        return self.per_host
+
+    def queued(self, host: Optional[str] = None) -> int:
+        if host is not None:
+            return len(self._waiting.get(host, ()))
+        return sum(len(q) for q in self._waiting.values())
+
+    def can_start(self, host: str) -> bool:
+        return sum(self.active.values()) < self.max_active and self.active.get(host, 0) < self.limit(host)
+
+    def _start(self, host: str) -> None:
+        self.active[host] = self.active.get(host, 0) + 1
+
+    @staticmethod
+    def _best(keys: List[tuple]) -> int:
+        """Index of the waiter to start next (first on ties, so equal keys stay first come, first served)."""
+        return keys.index(min(keys))
+
+    def _grant(self) -> None:
+        memo: Dict[str, Any] = {}
+        keys: Dict[str, List[tuple]] = {}
+        while self._turn and sum(self.active.values()) < self.max_active:
+            best = {}
+            for host in self._turn:
+                if self.active.get(host, 0) < self.limit(host):
+                    if host not in keys:
+                        keys[host] = [w[1](memo) for w in self._waiting[host]]
+                    best[host] = self._best(keys[host])
+            if not best:
+                return
+            top = min(keys[h][i][0] for h, i in best.items())
+            # Round-robin among the hosts with a waiter of the best class
+            host = next(h for h in self._turn if h in best and keys[h][best[h]][0] == top)
+            self._turn.remove(host)
+            q = self._waiting[host]
+            fut, _ = q.pop(best[host])
+            keys[host].pop(best[host])
+            if q:
+                # Back of the line: the other hosts with waiting downloads go first
+                self._turn.append(host)
+            else:
+                del self._waiting[host]
+            self._start(host)
+            fut.set_result(None)
+
+    async def acquire(self, host: str, key=None) -> None:
+        """Wait for a download slot on ``host``; ``key()`` ranks this download against other waiters."""
+        if not self._waiting.get(host) and self.can_start(host):
+            self._start(host)
+            return
+        fut = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(host, []).append((fut, key or (lambda memo: (1, 0))))
+        if host not in self._turn:
+            self._turn.append(host)
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # Granted in the same tick as the cancel
+                self.release(host)
+            else:
+                q = self._waiting.get(host, [])
+                q[:] = [w for w in q if w[0] is not fut]
+                if not q:
+                    self._waiting.pop(host, None)
+                    if host in self._turn:
+                        self._turn.remove(host)
+            raise
+
+    def release(self, host: str) -> None:
+        n = self.active.get(host, 0) - 1
+        if n > 0:
+            self.active[host] = n
+        else:
+            self.active.pop(host, None)
+        self._grant()
+
+    def _grant_connections(self, host: str) -> None:
+        q = self._conn_waiting.get(host)
+        while q and self.conns.get(host, 0) < self.limit(host):
+            fut = q.popleft()
+            self.conns[host] = self.conns.get(host, 0) + 1
+            fut.set_result(None)
+        if q is not None and not q:
+            del self._conn_waiting[host]
+
+    async def acquire_connection(self, host: str) -> None:
+        """Lease one connection to ``host``; waits (first come, first served) when the host is at its limit."""
+        if not self._conn_waiting.get(host) and self.conns.get(host, 0) < self.limit(host):
+            self.conns[host] = self.conns.get(host, 0) + 1
+        else:
+            fut = asyncio.get_running_loop().create_future()
+            self._conn_waiting.setdefault(host, deque()).append(fut)
+            try:
+                await fut
+            except asyncio.CancelledError:
+                if fut.done() and not fut.cancelled():
+                    self.release_connection(host)
+                else:
+                    q = self._conn_waiting.get(host)
+                    if q is not None and fut in q:
+                        q.remove(fut)
+                        if not q:
+                            del self._conn_waiting[host]
+                raise
+        self.peak[host] = max(self.peak.get(host, 0), self.conns[host])
+
+    def release_connection(self, host: str) -> None:
+        n = self.conns.get(host, 0) - 1
+        if n > 0:
+            self.conns[host] = n
+        else:
+            self.conns.pop(host, None)
+        self._grant_connections(host)
+
+    def usage(self) -> List[Dict[str, Any]]:
+        """Per-host pool usage, busiest first, for the UI."""
+        hosts = set(self.active) | set(self.conns) | set(self._waiting) | set(self._conn_waiting)
+        rows = [{"host": h, "connections": self.conns.get(h, 0), "limit": self.limit(h),
+                 "active": self.active.get(h, 0), "queued": self.queued(h),
+                 "waiting_connections": len(self._conn_waiting.get(h, ())), "peak": self.peak.get(h, 0)}
+                for h in hosts]
+        return sorted(rows, key=lambda r: (-r["connections"], -r["active"], r["host"]))
+
+
+# Queue classes, best first: interactive downloads start first and are never throttled;
+# bulk ones get the smallest share of the bandwidth.
+QOS_CLASSES = ("interactive", "normal", "bulk")
+# Bandwidth weights by class (0 = not limited); a download's own "weight" overrides its class
+QOS_WEIGHTS = {"interactive": 0.0, "normal": 4.0, "bulk": 1.0}
+
+
+class TokenBucket:
+    """Paces one transfer to ``rate`` bytes/s (0 = unlimited); ``consume(n)`` is awaited per chunk."""
+
+    def __init__(self, rate: float = 0.0):
+        self.rate = 0.0
+        self.tokens = 0.0
+        self.bytes = 0
+        self._stamp = time.monotonic()
+        self.set_rate(rate)
+
+    def set_rate(self, rate: float) -> None:
+        rate = max(0.0, float(rate or 0.0))
+        if rate != self.rate:
+            self._refill()
+            self.rate = rate
+            self.tokens = min(self.tokens, rate * 0.25)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if self.rate > 0:
+            # A quarter second of burst keeps pacing smooth at chunk granularity
+            self.tokens = min(self.rate * 0.25, self.tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    async def consume(self, n: int) -> None:
+        self.bytes += n
+        self._refill()
+        if self.rate <= 0:
+            return
+        self.tokens -= n
+        if self.tokens < 0:
+            await asyncio.sleep(min(-self.tokens / self.rate, 2.0))
+
+
+class BandwidthAllocator:
+    """Weighted fair shares of the download bandwidth, recomputed every second.
+
+    Every active transfer registers under its download id with a
+    ``weight()`` callable. HTTP downloads pace themselves through the
+    ``TokenBucket`` they get back; for the others the share is pushed to
+    ``apply(bytes_per_s)`` (yt-dlp's ratelimit, a torrent's download
+    limit), where 0 means unlimited. Rates come from bucket traffic or
+    from ``report()``.
+
+    The budget is ``cap()``. With no cap it is the link estimate: a slowly
+    decaying peak of the measured total, probed upwards by ``GROWTH`` once
+    every limited transfer has filled its whole weighted share for a few
+    seconds (then we, not the link, are the bottleneck), and again every
+    second for as long as they keep filling it. The budget is split
+    max-min fair. A transfer that leaves its share unused while the link has
+    room to spare is held by its server; it keeps what it uses plus 20% and
+    the rest goes to the others by weight. One that falls behind while the
+    link is full is being crowded out and gets its full share back.
+    Weight-0 transfers (interactive) are never limited and what they use
+    comes off the budget first. With no cap and at most one limited
+    transfer nothing is limited.
+    """
+
+    GROWTH = 1.25
+    MIN_SHARE = 16 * 1024
+
+    def __init__(self, cap=None):
+        self.cap = cap or (lambda: 0.0)
+        self.items: Dict[int, Dict[str, Any]] = {}
+        self.peak = 0.0
+        self.moved = 0.0  # bytes through every registered transfer so far (the data quota counts these)
+        self.probe = 1.0
+        self._pinned = 0
+        self._probe_wait = 3
+        self._stamp = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+
+    def register(self, key: int, weight, apply=None) -> TokenBucket:
+        item = self.items.get(key)
+        if item is None:
+            item = self.items[key] = {"weight": weight, "apply": apply, "bucket": TokenBucket(), "rate": 0.0,
+                                      "reported": None, "seen": 0, "share": 0.0, "rounds": 0,
+                                      "held": False, "since": time.monotonic()}
+            try:
+                cap = float(self.cap() or 0.0)
+            except Exception:
+                cap = 0.0
+            w = self._weight(item)
+            if cap > 0 and w > 0:
+                # Until the next rebalance: its weighted part of the cap, rather than a free first second
+                total = w + sum(self._weight(it) for it in self.items.values() if it is not item)
+                self._apply(item, max(cap * w / total, self.MIN_SHARE))
+        else:
+            item["weight"] = weight
+            item["apply"] = apply or item["apply"]
+        self._ensure_running()
+        return item["bucket"]
+
+    def unregister(self, key: int) -> None:
+        item = self.items.pop(key, None)
+        if item is None:
+            return
+        if item["reported"] is None:
+            self.moved += item["bucket"].bytes - item["seen"]
+        if item["share"]:
+            self._apply(item, 0.0)
+
+    def report(self, key: int, bps: float) -> None:
+        item = self.items.get(key)
+        if item is not None:
+            item["reported"] = max(0.0, float(bps or 0.0))
+
+    def share(self, key: int) -> float:
+        item = self.items.get(key)
+        return item["share"] if item else 0.0
+
+    def _ensure_running(self) -> None:
+        if self._task is None or self._task.done():
+            # Idle time before this task is nobody's transfer time
+            self._stamp = time.monotonic()
+            try:
+                self._task = asyncio.get_running_loop().create_task(self._run())
+            except RuntimeError:
+                self._task = None
+
+    async def _run(self) -> None:
+        while self.items:
+            await asyncio.sleep(1.0)
+            try:
+                self.rebalance()
+            except Exception:
+                logging.exception("[TermoLoad] Bandwidth rebalance failed")
+
+    def _measure(self) -> None:
+        now = time.monotonic()
+        dt = max(now - self._stamp, 1e-3)
+        self._stamp = now
+        total = 0.0
+        for item in self.items.values():
+            if item["reported"] is not None:
+                rate = item["reported"]
+                # A reported rate only covers the time this item has been registered
+                self.moved += rate * max(0.0, min(dt, now - item["since"]))
+            else:
+                rate = (item["bucket"].bytes - item["seen"]) / dt
+                self.moved += item["bucket"].bytes - item["seen"]
+                item["seen"] = item["bucket"].bytes
+            item["since"] = now
+            item["rate"] = rate if not item["rounds"] else 0.5 * rate + 0.5 * item["rate"]
+            item["rounds"] += 1
+            total += item["rate"]
+        self.peak = max(total, self.peak * 0.98)
+
+    @staticmethod
+    def _weight(item: Dict[str, Any]) -> float:
+        try:
+            return max(0.0, float(item["weight"]()))
+        except Exception:
+            return 1.0
+
+    def rebalance(self) -> None:
+        self._measure()
+        weights = {k: self._weight(it) for k, it in self.items.items()}
+        limited = [k for k, w in weights.items() if w > 0]
+        try:
+            cap = max(0.0, float(self.cap() or 0.0))
+        except Exception:
+            cap = 0.0
+        if cap > 0:
+            budget = cap
+        elif len(limited) > 1 and self.peak > 0:
+            budget = self.peak * self.probe
+        else:
+            budget = 0.0
+        shares = {k: 0.0 for k in self.items}
+        if budget > 0 and limited:
+            total_rate = sum(it["rate"] for it in self.items.values())
+            # The link is full when we move about as much as we ever have (or the cap allows)
+            contended = total_rate >= 0.9 * (min(cap, self.peak) if cap > 0 else self.peak)
+            for k in limited:
+                it = self.items[k]
+                if it["rounds"] <= 2 or not it["share"]:
+                    continue
+                if it["rate"] >= 0.9 * it["share"] or (contended and it["rate"] < 0.8 * it["share"]):
+                    # Wants more, or is being crowded out: back to a full weighted share
+                    it["held"] = False
+                elif not contended and it["rate"] < 0.8 * it["share"]:
+                    # Leaves its share unused while there is room to spare: the server is the limit
+                    it["held"] = True
+            unlimited_use = sum(self.items[k]["rate"] for k, w in weights.items() if w <= 0)
+            # Interactive transfers go first, but never squeeze the rest to nothing
+            left = max(budget - unlimited_use, budget * 0.1)
+            total_weight = sum(weights[k] for k in limited)
+            demand = {k: max(self.items[k]["rate"] * 1.2, self.MIN_SHARE) if self.items[k].get("held") else float("inf")
+                      for k in limited}
+            for k in sorted(limited, key=lambda k: demand[k] / weights[k]):
+                share = min(demand[k], left * weights[k] / total_weight)
+                shares[k] = max(share, self.MIN_SHARE)
+                left = max(0.0, left - share)
+                total_weight -= weights[k]
+            if cap <= 0:
+                pinned = all(self.items[k]["rate"] >= 0.9 * self.items[k]["share"] > 0
+                             for k in limited if not self.items[k].get("held"))
+                if pinned:
+                    # Everyone fills their share: try whether the link has more to give, and keep
+                    # growing every round while it does
+                    self._pinned += 1
+                    if self.probe > 1.0:
+                        self._probe_wait = 3
+                    if self.probe > 1.0 or self._pinned >= self._probe_wait:
+                        self.probe *= self.GROWTH
+                        self._pinned = 0
+                else:
+                    if self.probe > 1.0:
+                        # The link had nothing more to give; probe less often for a while
+                        self._probe_wait = min(self._probe_wait * 2, 30)
+                    self.probe = 1.0
+                    self._pinned = 0
+        for k, it in self.items.items():
+            self._apply(it, shares[k])
+
+    def _apply(self, item: Dict[str, Any], share: float) -> None:
+        old = item["share"]
+        item["share"] = share
+        item["bucket"].set_rate(share)
+        if item["apply"] is None:
+            return
+        # Pushing a limit to another process or libtorrent is not free; skip changes under 5%
+        if (old == 0) != (share == 0) or (share and abs(share - old) > 0.05 * old):
+            try:
+                item["apply"](share)
+            except Exception:
+                logging.debug("[TermoLoad] Could not apply bandwidth share", exc_info=True)
+
+
+SCHEDULE_DAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+
+class BandwidthSchedule:
+    """Weekly time windows that override "max_speed_kb" and "concurrent".
+
+    The "schedule" setting is a list of windows such as
+    ``{"days": "mon-fri", "start": "09:00", "end": "18:00", "max_speed_kb": 2048, "concurrent": 1}``.
+    A window whose end is not after its start runs past midnight. A limit a
+    window leaves out keeps the plain setting, and where windows overlap the
+    first one listed wins. The settings panel edits them as text, one window
+    per ``;``: ``mon-fri 09:00-18:00 speed=2048 slots=1; sat,sun 10:00-16:00 speed=512``.
+    """
+
+    def __init__(self, windows: Optional[List[Dict[str, Any]]] = None):
+        self.windows: List[Dict[str, Any]] = []
+        for w in windows or []:
+            try:
+                self.windows.append(self._normalize(w))
+            except ValueError as e:
+                logging.warning(f"[TermoLoad] Ignoring schedule window {w!r}: {e}")
+
+    @staticmethod
+    def _days(text: str) -> List[int]:
+        text = str(text or "").strip().lower()
+        if text in ("", "*", "daily", "all"):
+            return list(range(7))
+        days = set()
+        for part in text.split(","):
+            part = part.strip()
+            first, _, last = part.partition("-")
+            if first[:3] not in SCHEDULE_DAYS or (last and last[:3] not in SCHEDULE_DAYS):
+                raise ValueError(f"unknown day {part!r}")
+            a = SCHEDULE_DAYS.index(first[:3])
+            b = SCHEDULE_DAYS.index(last[:3]) if last else a
+            days.update((a + i) % 7 for i in range((b - a) % 7 + 1))
+        return sorted(days)
+
+    @staticmethod
+    def _minutes(text: str) -> int:
+        hours, _, minutes = str(text).strip().partition(":")
+        value = int(hours) * 60 + int(minutes or 0)
+        if not 0 <= value <= 24 * 60 or not 0 <= int(minutes or 0) < 60:
+            raise ValueError(f"bad time {text!r}")
+        return value
+
+    @classmethod
+    def _normalize(cls, w: Dict[str, Any]) -> Dict[str, Any]:
+        out = {"days": str(w.get("days") or "daily"), "start": str(w.get("start") or "00:00"),
+               "end": str(w.get("end") or "24:00")}
+        cls._days(out["days"])
+        cls._minutes(out["start"])
+        cls._minutes(out["end"])
+        for key in ("max_speed_kb", "concurrent"):
+            if w.get(key) is not None:
+                out[key] = int(w[key])
+                if out[key] < 0 or (key == "concurrent" and out[key] == 0):
+                    raise ValueError(f"bad {key} {w[key]!r}")
+        return out
+
+    @classmethod
+    def parse(cls, text: str) -> List[Dict[str, Any]]:
+        """The settings panel's text form back into windows; raises ValueError on a typo."""
+        windows = []
+        for chunk in str(text or "").split(";"):
+            words = chunk.split()
+            if not words:
+                continue
+            w: Dict[str, Any] = {}
+            for word in words:
+                key, eq, value = word.partition("=")
+                if eq:
+                    if key.lower() not in ("speed", "slots"):
+                        raise ValueError(f"unknown option {key!r}")
+                    w["max_speed_kb" if key.lower() == "speed" else "concurrent"] = value
+                elif "-" in word and ":" in word:
+                    w["start"], _, w["end"] = word.partition("-")
+                else:
+                    w["days"] = word
+            try:
+                windows.append(cls._normalize(w))
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"{chunk.strip()!r}: {e}")
+        return windows
+
+    @staticmethod
+    def format(windows: List[Dict[str, Any]]) -> str:
+        parts = []
+        for w in windows or []:
+            text = f"{w.get('days', 'daily')} {w.get('start', '00:00')}-{w.get('end', '24:00')}"
+            if w.get("max_speed_kb") is not None:
+                text += f" speed={w['max_speed_kb']}"
+            if w.get("concurrent") is not None:
+                text += f" slots={w['concurrent']}"
+            parts.append(text)
+        return "; ".join(parts)
+
+    def window_at(self, now: datetime) -> Optional[Dict[str, Any]]:
+        minute = now.hour * 60 + now.minute
+        today = now.weekday()
+        for w in self.windows:
+            days = self._days(w["days"])
+            start, end = self._minutes(w["start"]), self._minutes(w["end"])
+            if start < end:
+                if today in days and start <= minute < end:
+                    return w
+            elif (today in days and minute >= start) or ((today - 1) % 7 in days and minute < end):
+                return w
+        return None
+
+    def next_change(self, now: datetime) -> Optional[tuple]:
+        """(when, window then in force or None) for the next time the active window changes."""
+        current = self.window_at(now)
+        midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        edges = set()
+        for w in self.windows:
+            for key in ("start", "end"):
+                m = self._minutes(w[key])
+                for day in range(8):
+                    edges.add(midnight + timedelta(days=day, minutes=m))
+        for edge in sorted(e for e in edges if e > now):
+            window = self.window_at(edge)
+            if window is not current:
+                return edge, window
+        return None
+
+
+class DataQuota:
+    """Bytes downloaded today and this calendar month, kept in ``~/.termoload_usage.json``.
+
+    The limits themselves are the "quota_daily_mb" and "quota_monthly_mb"
+    settings (0 = none); counters start over at local midnight and on the
+    first of the month.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path or (Path.home() / ".termoload_usage.json")
+        self.day = ""
+        self.month = ""
+        self.day_bytes = 0.0
+        self.month_bytes = 0.0
+        self._last_save = 0.0
+        self.load()
+
+    def load(self) -> None:
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.day = str(data.get("day", ""))
+            self.month = str(data.get("month", ""))
+            self.day_bytes = float(data.get("day_bytes", 0) or 0)
+            self.month_bytes = float(data.get("month_bytes", 0) or 0)
+        except Exception:
+            logging.exception("[TermoLoad] Failed to load data usage")
+
+    def save(self, force: bool = False) -> None:
+        if not force and time.monotonic() - self._last_save < 30.0:
+            return
+        try:
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump({"day": self.day, "month": self.month, "day_bytes": int(self.day_bytes),
+                           "month_bytes": int(self.month_bytes)}, f, indent=2)
+            self._last_save = time.monotonic()
+        except Exception:
+            logging.exception("[TermoLoad] Failed to save data usage")
+
+    def _roll(self, now: datetime) -> None:
+        day, month = now.strftime("%Y-%m-%d"), now.strftime("%Y-%m")
+        if day != self.day:
+            self.day, self.day_bytes = day, 0.0
+        if month != self.month:
+            self.month, self.month_bytes = month, 0.0
+
+    def add(self, n: float, now: Optional[datetime] = None) -> None:
+        self._roll(now or datetime.now())
+        if n > 0:
+            self.day_bytes += n
+            self.month_bytes += n
+            self.save()
+
+    def exhausted(self, daily_mb: float, monthly_mb: float, now: Optional[datetime] = None) -> Optional[str]:
+        """Which quota ("daily" or "monthly") is used up, if either."""
+        self._roll(now or datetime.now())
+        if monthly_mb and self.month_bytes >= monthly_mb * 1024 * 1024:
+            return "monthly"
+        if daily_mb and self.day_bytes >= daily_mb * 1024 * 1024:
+            return "daily"
+        return None
+
+    @staticmethod
+    def resets_at(kind: str, now: datetime) -> datetime:
+        midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        if kind == "daily":
+            return midnight + timedelta(days=1)
+        return (midnight.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+class DiskSpace:
+    """Free space on the filesystems downloads land on, net of what running downloads still have to write.
+
+    An HTTP download holds a reservation on its destination folder from
+    admission until it stops. A reservation counts the download's remaining
+    bytes, so it shrinks as the file grows and free space shrinks with it.
+    A download is admitted only when its own remaining bytes, the other
+    reservations on the same filesystem and ``margin()`` fit in the free
+    space. Downloads whose size is not known yet count as 0.
+    """
+
+    def __init__(self, margin=None):
+        self.margin = margin or (lambda: 0)
+        self.reserved: Dict[int, str] = {}
+
+    @staticmethod
+    def _anchor(path) -> Path:
+        p = Path(path or "downloads").absolute()
+        while not p.exists() and p.parent != p:
+            p = p.parent
+        return p
+
+    def volume(self, path) -> Optional[int]:
+        try:
+            return os.stat(self._anchor(path)).st_dev
+        except OSError:
+            return None
+
+    def free(self, path) -> Optional[int]:
+        try:
+            return shutil.disk_usage(self._anchor(path)).free
+        except OSError:
+            return None
+
+    @staticmethod
+    def remaining(d: dict) -> int:
+        total = int(d.get("total_size") or 0)
+        return max(0, total - int(d.get("downloaded_bytes") or 0)) if total else 0
+
+    def shortfall(self, path, need: int, downloads: List[dict], exclude: Optional[int] = None) -> int:
+        """Bytes missing to write ``need`` more under ``path``; 0 when it fits or free space is unknown."""
+        free = self.free(path)
+        if free is None:
+            return 0
+        volume = self.volume(path)
+        by_id = {d.get("id"): d for d in downloads}
+        held = sum(self.remaining(by_id[k]) for k, p in self.reserved.items()
+                   if k != exclude and k in by_id and self.volume(p) == volume)
+        return max(0, need + held + int(self.margin()) - free)
+
+
 try:
     import libtorrent
     LIBTORRENT_AVAILABLE = True
@@ -337,6 +1287,1777 @@ buffer_handler = BufferingHandler()
 buffer_handler.setLevel(logging.DEBUG)
 logging.getLogger().addHandler(buffer_handler)
 
+MEDIA_EXTENSIONS = (".mp4", ".mkv", ".webm", ".avi", ".mov", ".m4v", ".ts", ".mp3", ".flac", ".m4a", ".ogg", ".wav")
+
+
+class TorrentStream:
+    """Sequential read view over one file of a torrent that is still downloading.
+
+    Piece availability is fed from ``piece_finished_alert``s by the downloader's
+    alert pump. Reads block until the pieces covering the requested range are
+    on disk, and every read moves the deadline window to the consumer position.
+    A read fails with ``ConnectionAbortedError`` once the stream is closed or
+    its handle is gone, and with ``asyncio.TimeoutError`` when no piece has
+    arrived for ``stall_timeout`` seconds (e.g. the torrent is paused).
+    """
+
+    def __init__(self, download_id: int, handle, file_index: int, window_bytes: int = 16 * 1024 * 1024,
+                 stall_timeout: float = 60.0):
+        self.download_id = download_id
+        self.handle = handle
+        self.file_index = file_index
+        ti = handle.torrent_file()
+        files = ti.files()
+        self.piece_length = ti.piece_length()
+        self.num_pieces = ti.num_pieces()
+        self.file_offset = files.file_offset(file_index)
+        self.file_size = files.file_size(file_index)
+        self.file_path = Path(handle.save_path()) / files.file_path(file_index)
+        self.window_pieces = max(4, -(-window_bytes // self.piece_length))
+        self.first_piece = self.file_offset // self.piece_length
+        self.last_piece = max(self.first_piece, (self.file_offset + self.file_size - 1) // self.piece_length)
+        self.have = bytearray(self.num_pieces)
+        self.key: Optional[str] = None
+        self.cursor_piece = self.first_piece
+        self.stall_timeout = stall_timeout
+        self.closed = False
+        self._changed = asyncio.Event()
+        try:
+            import libtorrent as lt
+            pieces = handle.status(lt.status_flags_t.query_pieces).pieces
+            for i, done in enumerate(pieces):
+                if done:
+                    self.have[i] = 1
+        except Exception:
+            logging.debug(f"[TermoLoad] Stream {download_id}: could not seed piece bitmap")
+
+    def piece_for(self, pos: int) -> int:
+        return (self.file_offset + pos) // self.piece_length
+
+    def available_prefix(self) -> int:
+        """Number of contiguous bytes from the start of the file that can be served."""
+        piece = self.first_piece
+        while piece <= self.last_piece and self.have[piece]:
+            piece += 1
+        if piece > self.last_piece:
+            return self.file_size
+        return max(0, piece * self.piece_length - self.file_offset)
+
+    def on_piece_finished(self, piece: int) -> None:
+        if 0 <= piece < self.num_pieces:
+            self.have[piece] = 1
+        # Wake every pending reader, then arm a fresh event for the next piece
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def close(self) -> None:
+        """Fail every pending and future read."""
+        self.closed = True
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def _alive(self) -> bool:
+        if self.closed:
+            return False
+        try:
+            return bool(self.handle.is_valid())
+        except Exception:
+            return False
+
+    def advance(self, pos: int) -> None:
+        self.advance_to_piece(self.piece_for(pos))
+
+    def advance_to_piece(self, piece: int) -> None:
+        """Place deadlines on the next window of missing pieces starting at ``piece``."""
+        piece = max(self.first_piece, min(piece, self.last_piece))
+        try:
+            if abs(piece - self.cursor_piece) > self.window_pieces:
+                # Consumer seeked; drop stale deadlines so the old window stops competing
+                self.handle.clear_piece_deadlines()
+            self.cursor_piece = piece
+            end = min(self.last_piece, piece + self.window_pieces - 1)
+            for i, p in enumerate(range(piece, end + 1)):
+                if not self.have[p]:
+                    self.handle.set_piece_deadline(p, 500 + i * 150)
+        except Exception:
+            logging.debug(f"[TermoLoad] Stream {self.download_id}: failed to set piece deadlines")
+
+    async def read(self, pos: int, length: int) -> bytes:
+        """Read up to ``length`` bytes at ``pos``, waiting for the pieces if needed."""
+        if pos >= self.file_size:
+            return b""
+        length = min(length, self.file_size - pos)
+        first = self.piece_for(pos)
+        last = self.piece_for(pos + length - 1)
+        self.advance_to_piece(first)
+        waited = 0.0
+        while not all(self.have[p] for p in range(first, last + 1)):
+            if not self._alive():
+                raise ConnectionAbortedError(f"stream {self.download_id} closed")
+            if waited >= self.stall_timeout:
+                raise asyncio.TimeoutError(f"stream {self.download_id}: no pieces for {self.stall_timeout:.0f}s")
+            changed = self._changed
+            try:
+                # Short waits so a paused or removed torrent is noticed without a piece alert
+                await asyncio.wait_for(changed.wait(), timeout=1.0)
+                waited = 0.0
+            except asyncio.TimeoutError:
+                waited += 1.0
+
+        def _read():
+            with open(self.file_path, "rb") as f:
+                f.seek(pos)
+                return f.read(length)
+
+        return await asyncio.to_thread(_read)
+
+
+class TorrentStreamServer:
+    """Loopback HTTP endpoint serving torrent streams with Range support."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self.streams: Dict[int, TorrentStream] = {}
+        self._runner = None
+
+    @property
+    def running(self) -> bool:
+        return self._runner is not None
+
+    def url_for(self, download_id: int) -> str:
+        return f"http://{self.host}:{self.port}/stream/{download_id}"
+
+    async def start(self) -> None:
+        if self._runner is not None:
+            return
+        get_aiohttp()
+        from aiohttp import web
+        app = web.Application()
+        app.router.add_get("/stream/{download_id}", self._handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, self.host, self.port)
+        await site.start()
+        try:
+            self.port = runner.addresses[0][1]
+        except Exception:
+            pass
+        self._runner = runner
+        logging.info(f"[TermoLoad] Stream server listening on http://{self.host}:{self.port}")
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            try:
+                await self._runner.cleanup()
+            finally:
+                self._runner = None
+
+    async def _handle(self, request):
+        from aiohttp import web
+        import mimetypes
+        try:
+            stream = self.streams.get(int(request.match_info["download_id"]))
+        except ValueError:
+            stream = None
+        if stream is None:
+            raise web.HTTPNotFound()
+
+        size = stream.file_size
+        start, end = 0, size - 1
+        range_header = request.headers.get("Range", "")
+        partial = range_header.startswith("bytes=")
+        if partial:
+            try:
+                first, _, last = range_header[len("bytes="):].split(",")[0].partition("-")
+                if first:
+                    start = int(first)
+                    end = int(last) if last else size - 1
+                else:
+                    start = max(0, size - int(last))
+                end = min(end, size - 1)
+            except ValueError:
+                partial = False
+                start, end = 0, size - 1
+            if start >= size or start > end:
+                raise web.HTTPRequestRangeNotSatisfiable(headers={"Content-Range": f"bytes */{size}"})
+
+        headers = {
+            "Accept-Ranges": "bytes",
+            "Content-Length": str(end - start + 1),
+            "Content-Type": mimetypes.guess_type(str(stream.file_path))[0] or "application/octet-stream",
+        }
+        if partial:
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response = web.StreamResponse(status=206 if partial else 200, headers=headers)
+        await response.prepare(request)
+
+        pos = start
+        chunk_size = 256 * 1024
+        while pos <= end:
+            try:
+                data = await stream.read(pos, min(chunk_size, end - pos + 1))
+            except (ConnectionAbortedError, asyncio.TimeoutError) as e:
+                # Ends the body short; the player sees a dropped connection and can retry
+                logging.info(f"[TermoLoad] Stream {stream.download_id}: {e}")
+                break
+            if not data:
+                break
+            await response.write(data)
+            pos += len(data)
+        return response
+
+def _hash_pieces(path: str, piece_length: int, first: int, count: int) -> List[bytes]:
+    """SHA-1 of ``count`` consecutive pieces of a file starting at piece ``first``.
+
+    Runs in a worker thread; both the reads and hashlib release the GIL, so
+    several of these hash a large file in parallel.
+    """
+    import hashlib
+    out = []
+    with open(path, "rb") as f:
+        f.seek(first * piece_length)
+        for _ in range(count):
+            data = f.read(piece_length)
+            if not data:
+                break
+            out.append(hashlib.sha1(data).digest())
+    return out
+
+_CHECKSUM_LENGTHS = {32: "md5", 40: "sha1", 64: "sha256", 128: "sha512"}
+
+def _parse_checksum_spec(spec: str) -> Optional[tuple]:
+    """Parse an expected-checksum field into ``(algorithm, hexdigest)`` or ``("url", url)``.
+
+    Accepts ``sha256:<hex>`` (also sha512/sha1/md5), a bare hex digest whose length
+    picks the algorithm, or an HTTP(S) URL to a ``SHA256SUMS``-style file.
+    """
+    s = (spec or "").strip()
+    if not s:
+        return None
+    if s.startswith(("http://", "https://")):
+        return ("url", s)
+    algo, _, digest = s.rpartition(":")
+    digest = digest.strip().lower()
+    algo = algo.strip().lower().replace("-", "")
+    if not all(c in "0123456789abcdef" for c in digest) or len(digest) not in _CHECKSUM_LENGTHS:
+        return None
+    if not algo:
+        algo = _CHECKSUM_LENGTHS[len(digest)]
+    if algo not in ("md5", "sha1", "sha256", "sha512") or _CHECKSUM_LENGTHS[len(digest)] != algo:
+        return None
+    return (algo, digest)
+
+def _find_in_sums_file(text: str, filename: str, sums_url: str = "") -> Optional[tuple]:
+    """Look ``filename`` up in a ``SHA256SUMS``/``sha1sum``/BSD-style listing.
+
+    A listing with a single digest and no file name (``file.iso.sha256``)
+    applies to whatever file it was published next to.
+    """
+    import re
+    hint = os.path.basename(urlparse(sums_url).path).lower()
+    hinted = next((a for a in ("sha512", "sha256", "sha1", "md5") if a in hint), None)
+    lone = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        m = re.match(r"^(SHA512|SHA256|SHA1|MD5)\s*\((.+)\)\s*=\s*([0-9a-fA-F]+)$", line)
+        if m:
+            algo, name, digest = m.group(1).lower(), m.group(2), m.group(3).lower()
+        else:
+            parts = line.split(None, 1)
+            digest = parts[0].lower()
+            name = parts[1].lstrip("*").strip() if len(parts) > 1 else ""
+            algo = hinted or _CHECKSUM_LENGTHS.get(len(digest))
+        if _CHECKSUM_LENGTHS.get(len(digest)) != algo:
+            continue
+        if not name:
+            lone.append((algo, digest))
+        elif os.path.basename(name.replace("\\", "/")) == filename:
+            return (algo, digest)
+    return lone[0] if len(lone) == 1 else None
+
+def _content_disposition_filename(value: Optional[str]) -> Optional[str]:
+    """File name suggested by a Content-Disposition header (``filename*`` wins), reduced to a safe base name."""
+    if not value:
+        return None
+    from email.message import Message
+    from email.utils import collapse_rfc2231_value
+    msg = Message()
+    try:
+        msg["content-disposition"] = value
+        values = [v for k, v in msg.get_params(header="content-disposition") or [] if k.lower() == "filename"]
+        # filename* arrives decoded as a (charset, language, text) tuple
+        extended = [v for v in values if isinstance(v, tuple)]
+        name = collapse_rfc2231_value((extended or values)[0]) if values else None
+    except Exception:
+        return None
+    if not name:
+        return None
+    name = os.path.basename(str(name).replace("\\", "/"))
+    name = "".join(c for c in name if c >= " " and c not in '<>:"/\\|?*').strip().strip(".")
+    return name or None
+
+def _is_metalink(url: str) -> bool:
+    path = urlparse(url).path if url.startswith(("http://", "https://")) else url
+    return path.lower().endswith((".meta4", ".metalink"))
+
+class MetalinkReader:
+    """Incremental reader for Metalink 4 (RFC 5854) and Metalink 3 documents.
+
+    Bytes are fed as they arrive and parsed with a pull parser; each
+    ``<file>`` becomes a plain dict and is cleared from the tree as soon as
+    it closes, so a listing of thousands of files stays small in memory.
+    Only HTTP(S) sources are kept, best first; ``metaurl`` (torrent)
+    entries are skipped.
+    """
+
+    # Whole-file digest to verify with when several are listed, strongest first
+    HASH_PREFERENCE = ("sha512", "sha256", "sha1", "md5")
+
+    def __init__(self, base_url: str = ""):
+        import xml.etree.ElementTree as ET
+        self.base_url = base_url
+        self.files: List[Dict[str, Any]] = []
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._root_seen = False
+
+    @staticmethod
+    def _local(tag: str) -> str:
+        return tag.rsplit("}", 1)[-1]
+
+    @staticmethod
+    def _hash_type(name: Optional[str]) -> Optional[str]:
+        import hashlib
+        algo = (name or "").strip().lower().replace("-", "")
+        return algo if algo in hashlib.algorithms_guaranteed else None
+
+    @staticmethod
+    def _safe_name(name: Optional[str]) -> Optional[str]:
+        """The file's path relative to the download folder; None if it would escape it."""
+        from pathlib import PurePosixPath
+        name = (name or "").replace("\\", "/").strip()
+        if not name or name.startswith("/") or name[1:2] == ":":
+            return None
+        parts = PurePosixPath(name).parts
+        if not parts or any(p in ("..", ".") for p in parts):
+            return None
+        return "/".join(parts)
+
+    def feed(self, data: bytes) -> None:
+        self._parser.feed(data)
+        self._drain()
+
+    def close(self) -> List[Dict[str, Any]]:
+        self._parser.close()
+        self._drain()
+        if not self._root_seen:
+            raise ValueError("Empty metalink document")
+        return self.files
+
+    def _drain(self) -> None:
+        for event, elem in self._parser.read_events():
+            tag = self._local(elem.tag)
+            if event == "start":
+                if not self._root_seen:
+                    if tag != "metalink":
+                        raise ValueError(f"Not a metalink document (root element <{tag}>)")
+                    self._root_seen = True
+            elif tag == "file":
+                entry = self._file(elem)
+                if entry:
+                    self.files.append(entry)
+                elem.clear()
+
+    def _file(self, elem) -> Optional[Dict[str, Any]]:
+        from urllib.parse import urljoin
+        name = self._safe_name(elem.get("name"))
+        if not name:
+            logging.warning(f"[TermoLoad] Metalink: skipping file with unsafe name {elem.get('name')!r}")
+            return None
+        size = None
+        hashes: Dict[str, str] = {}
+        pieces = None
+        urls: List[tuple] = []
+
+        def take(child) -> None:
+            nonlocal size, pieces
+            tag = self._local(child.tag)
+            text = (child.text or "").strip()
+            if tag == "size" and text.isdigit():
+                size = int(text)
+            elif tag == "hash":
+                algo = self._hash_type(child.get("type"))
+                if algo and text:
+                    hashes[algo] = text.lower()
+            elif tag == "pieces":
+                pieces = self._pieces(child)
+            elif tag == "url" and text:
+                # Metalink 4: lower priority is better; Metalink 3: higher preference is better
+                if child.get("priority", "").isdigit():
+                    rank = int(child.get("priority"))
+                elif child.get("preference", "").isdigit():
+                    rank = 1000000 - int(child.get("preference"))
+                else:
+                    rank = 999999
+                url = urljoin(self.base_url, text) if self.base_url else text
+                if url.startswith(("http://", "https://")):
+                    urls.append((rank, len(urls), url))
+            elif tag in ("verification", "resources"):
+                for grandchild in child:
+                    take(grandchild)
+
+        for child in elem:
+            take(child)
+        algo = next((a for a in self.HASH_PREFERENCE if a in hashes), None)
+        return {
+            "name": name,
+            "size": size,
+            "urls": [u for _, _, u in sorted(urls)],
+            "checksum": f"{algo}:{hashes[algo]}" if algo else None,
+            "pieces": pieces,
+        }
+
+    def _pieces(self, elem) -> Optional[Dict[str, Any]]:
+        algo = self._hash_type(elem.get("type"))
+        length = elem.get("length", "")
+        if not algo or not length.isdigit() or int(length) <= 0:
+            return None
+        items = []
+        for i, child in enumerate(elem):
+            if self._local(child.tag) == "hash" and (child.text or "").strip():
+                # Metalink 3 numbers its pieces; Metalink 4 lists them in order
+                index = int(child.get("piece")) if (child.get("piece") or "").isdigit() else i
+                items.append((index, child.text.strip().lower()))
+        items.sort()
+        if not items or [i for i, _ in items] != list(range(len(items))):
+            return None
+        return {"algo": algo, "length": int(length), "hashes": [h for _, h in items]}
+
+class StreamingHasher:
+    """Digest a download while it is written, off the event loop.
+
+    One worker thread hashes chunks in write order. On resume it first
+    re-reads the ``prefix`` bytes already on disk, so that pass overlaps the
+    resumed transfer instead of delaying it (md5/sha digests are sequential,
+    so the prefix cannot itself be split). :meth:`feed` only waits when more
+    than ``max_backlog`` bytes are queued behind the hasher. Writers that
+    fill the file out of order call :meth:`extend` instead, and the thread
+    reads each newly contiguous stretch back while it is still in the page
+    cache.
+    """
+
+    def __init__(self, algorithm: str, path: Optional[str] = None, prefix: int = 0,
+                 max_backlog: int = 64 * 1024 * 1024):
+        import hashlib
+        self.algorithm = algorithm
+        self.hashed = 0
+        self.rate = 0.0
+        self.error: Optional[BaseException] = None
+        self._hash = hashlib.new(algorithm)
+        self._queue: "queue.Queue[Optional[bytes]]" = queue.Queue()
+        self._backlog = 0
+        self._max_backlog = max_backlog
+        self._lock = threading.Lock()
+        self._stopped = False
+        self._rate_t = time.time()
+        self._rate_bytes = 0
+        self._path = path
+        self._file = None
+        self._thread = threading.Thread(target=self._run, args=(prefix,), daemon=True)
+        self._thread.start()
+
+    def _account(self, n: int) -> None:
+        self.hashed += n
+        self._rate_bytes += n
+        now = time.time()
+        dt = now - self._rate_t
+        if dt >= 0.5:
+            inst = self._rate_bytes / dt
+            self.rate = inst if not self.rate else 0.3 * inst + 0.7 * self.rate
+            self._rate_t = now
+            self._rate_bytes = 0
+
+    def _read_from(self, nbytes: int) -> None:
+        if self._file is None:
+            self._file = open(self._path, "rb")
+        remaining = nbytes
+        while remaining > 0 and not self._stopped:
+            data = self._file.read(min(4 * 1024 * 1024, remaining))
+            if not data:
+                raise IOError(f"{self._path} is shorter than the bytes being hashed")
+            self._hash.update(data)
+            remaining -= len(data)
+            self._account(len(data))
+
+    def _run(self, prefix: int) -> None:
+        try:
+            if prefix > 0:
+                self._read_from(prefix)
+            while True:
+                chunk = self._queue.get()
+                if chunk is None:
+                    break
+                if isinstance(chunk, int):
+                    self._read_from(chunk)
+                    continue
+                self._hash.update(chunk)
+                with self._lock:
+                    self._backlog -= len(chunk)
+                self._account(len(chunk))
+        except BaseException as e:
+            self.error = e
+            # Keep draining so feed() never waits on a dead thread.
+            while self._queue.get() is not None:
+                pass
+        finally:
+            if self._file is not None:
+                self._file.close()
+
+    async def feed(self, chunk: bytes) -> None:
+        with self._lock:
+            self._backlog += len(chunk)
+        self._queue.put(bytes(chunk))
+        while self._backlog > self._max_backlog and self._thread.is_alive():
+            await asyncio.sleep(0.01)
+
+    def extend(self, nbytes: int) -> None:
+        """Hash the next ``nbytes`` of the file from disk (they are already written)."""
+        if nbytes > 0:
+            self._queue.put(int(nbytes))
+
+    async def finish(self) -> str:
+        """Wait for every queued chunk and return the hex digest."""
+        self._queue.put(None)
+        await asyncio.to_thread(self._thread.join)
+        if self.error:
+            raise self.error
+        return self._hash.hexdigest()
+
+    def close(self) -> None:
+        """Abandon hashing (pause/cancel); the worker exits after its current read."""
+        self._stopped = True
+        self._queue.put(None)
+
+INTEGRITY_BLOCK_SIZE = 4 * 1024 * 1024
+# Below this many remaining bytes one connection is as fast as several
+SEGMENTED_MIN_BYTES = 16 * 1024 * 1024
+# Smallest piece a running range is split into when another connection takes over its tail
+RANGE_MIN_SPLIT = 1024 * 1024
+# Seconds a new connection is assumed to lose before data flows (connect, TLS, slow start)
+RANGE_SPLIT_OVERHEAD = 0.5
+# A connection with no data for this long counts as stalled when deciding what to split
+RANGE_STALL_GRACE = 2.0
+INTEGRITY_MAX_BLOCKS = 4096
+_integrity_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+
+def _integrity_pool() -> concurrent.futures.ThreadPoolExecutor:
+    global _integrity_executor
+    if _integrity_executor is None:
+        _integrity_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(8, os.cpu_count() or 2), thread_name_prefix="termoload-integrity")
+    return _integrity_executor
+
+def _block_digest(chunks: List[bytes], algo: str = "sha1") -> str:
+    import hashlib
+    h = hashlib.new(algo)
+    for c in chunks:
+        h.update(c)
+    return h.hexdigest()
+
+def _file_block_digest(path: str, offset: int, length: int, algo: str = "sha1") -> str:
+    """Digest of ``length`` bytes at ``offset``; used right after the block was written, so it reads from cache."""
+    import hashlib
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return hashlib.new(algo, f.read(length)).hexdigest()
+
+def _verify_blocks(path: str, block_size: int, total_size: int, items: List[tuple], algo: str = "sha1") -> List[int]:
+    """Indices from ``items`` (``(index, hexdigest)`` pairs) whose bytes on disk no longer match.
+
+    Reads through an mmap; hashlib releases the GIL, so several calls over
+    disjoint block ranges verify a file in parallel.
+    """
+    import hashlib
+    import mmap
+    bad = []
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return [i for i, _ in items]
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for index, digest in items:
+                start = index * block_size
+                end = start + block_size
+                if total_size:
+                    end = min(end, total_size)
+                if end > size:
+                    bad.append(index)
+                    continue
+                if hashlib.new(algo, mm[start:end]).hexdigest() != digest:
+                    bad.append(index)
+    return bad
+
+class IntegrityMap:
+    """Per-block digests (SHA-1 by default) of a partial HTTP download, kept in ``<file>.tlmap``.
+
+    A block's digest is recorded only after its bytes were written, so the
+    list doubles as the completion bitmap (``None`` = not on disk yet). On
+    resume every recorded block is re-verified; torn or corrupted blocks are
+    fetched again by Range instead of trusting the file size.
+
+    With ``expected`` (piece hashes published in a metalink) the blocks are
+    those pieces, and a block that hashes differently is not recorded but
+    put in ``rejected`` for the downloader to fetch again.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: str, total_size: Optional[int] = None, block_size: Optional[int] = None,
+                 algo: str = "sha1", expected: Optional[List[str]] = None):
+        self.path = str(path)
+        self.map_path = self.path + ".tlmap"
+        self.total_size = int(total_size or 0)
+        self.block_size = int(block_size or self.pick_block_size(self.total_size))
+        self.algo = algo
+        self.expected = [h.lower() for h in expected] if expected else None
+        self.rejected: set = set()
+        self.hashes: List[Optional[str]] = []
+        self._buf: List[bytes] = []
+        self._buf_len = 0
+        self._next_block = 0
+        self._pending: Dict[int, concurrent.futures.Future] = {}
+        self._last_save = 0.0
+
+    @staticmethod
+    def pick_block_size(total_size: int) -> int:
+        size = INTEGRITY_BLOCK_SIZE
+        while total_size and total_size // size > INTEGRITY_MAX_BLOCKS:
+            size *= 2
+        return size
+
+    @classmethod
+    def load(cls, path: str) -> Optional["IntegrityMap"]:
+        try:
+            with open(str(path) + ".tlmap", "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != cls.VERSION:
+                return None
+            imap = cls(path, data.get("total_size"), data.get("block_size"), data.get("algo") or "sha1")
+            imap.hashes = list(data.get("hashes") or [])
+            return imap
+        except Exception:
+            return None
+
+    @staticmethod
+    def discard(path: str) -> None:
+        try:
+            Path(str(path) + ".tlmap").unlink(missing_ok=True)
+        except Exception:
+            pass
+
+    def block_range(self, index: int) -> tuple:
+        start = index * self.block_size
+        end = start + self.block_size
+        if self.total_size:
+            end = min(end, self.total_size)
+        return start, end
+
+    def _harvest(self) -> None:
+        for index, fut in list(self._pending.items()):
+            if fut.done():
+                del self._pending[index]
+                try:
+                    self._set(index, fut.result())
+                except Exception:
+                    pass
+
+    def _set(self, index: int, digest: Optional[str]) -> bool:
+        """Record a block's digest; False (and the block goes to ``rejected``) when it is not the expected one."""
+        if index >= len(self.hashes):
+            self.hashes.extend([None] * (index + 1 - len(self.hashes)))
+        if digest and self.expected is not None and (index >= len(self.expected) or digest != self.expected[index]):
+            self.hashes[index] = None
+            self.rejected.add(index)
+            return False
+        self.hashes[index] = digest
+        self.rejected.discard(index)
+        return True
+
+    def use_pieces(self, algo: str, length: int, hashes: List[str]) -> bool:
+        """Check blocks against published piece hashes from now on; False if they do not fit this map."""
+        count = -(-self.total_size // length) if self.total_size and length > 0 else 0
+        if length != self.block_size or algo != self.algo or count != len(hashes):
+            return False
+        self.expected = [h.lower() for h in hashes]
+        for index, digest in enumerate(self.hashes):
+            if digest and digest != self.expected[index]:
+                self.hashes[index] = None
+        return True
+
+    def save(self, force: bool = False) -> None:
+        self._harvest()
+        now = time.monotonic()
+        if not force and now - self._last_save < 1.0:
+            return
+        self._last_save = now
+        tmp = self.map_path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": self.VERSION, "block_size": self.block_size, "algo": self.algo,
+                           "total_size": self.total_size, "hashes": self.hashes}, f)
+            os.replace(tmp, self.map_path)
+        except Exception:
+            logging.debug(f"[TermoLoad] Could not save integrity map {self.map_path}", exc_info=True)
+
+    def start_at(self, offset: int) -> None:
+        """Continue recording at ``offset`` (a block boundary); later digests are dropped."""
+        self._next_block = offset // self.block_size
+        del self.hashes[self._next_block:]
+        self._buf, self._buf_len = [], 0
+
+    def feed(self, chunk: bytes) -> None:
+        """Account for bytes just written; full blocks are hashed on the integrity pool."""
+        self._buf.append(bytes(chunk))
+        self._buf_len += len(chunk)
+        if self._buf_len < self.block_size:
+            return
+        data = b"".join(self._buf)
+        view = memoryview(data)
+        pos = 0
+        while self._buf_len - pos >= self.block_size:
+            self.record_block(self._next_block, [bytes(view[pos:pos + self.block_size])])
+            self._next_block += 1
+            pos += self.block_size
+        rest = bytes(view[pos:])
+        self._buf = [rest] if rest else []
+        self._buf_len = len(rest)
+
+    def record_block(self, index: int, chunks: List[bytes]) -> None:
+        """Hash a block whose bytes are on disk now; the digest lands in the map when ready."""
+        self._pending[index] = _integrity_pool().submit(_block_digest, chunks, self.algo)
+
+    def record_block_from_file(self, index: int) -> concurrent.futures.Future:
+        """Like :meth:`record_block` for a block written in several pieces; it is read back from the file."""
+        start, end = self.block_range(index)
+        fut = _integrity_pool().submit(_file_block_digest, self.path, start, end - start, self.algo)
+        self._pending[index] = fut
+        return fut
+
+    def missing_blocks(self) -> List[int]:
+        count = -(-self.total_size // self.block_size) if self.total_size else len(self.hashes)
+        return [i for i in range(count) if i >= len(self.hashes) or not self.hashes[i]]
+
+    def wait_pending(self) -> None:
+        for fut in list(self._pending.values()):
+            try:
+                fut.result()
+            except Exception:
+                pass
+        self.save(force=True)
+
+    async def close(self, total_size: int) -> None:
+        """Record the final partial block and write the map out."""
+        self.total_size = total_size
+        if self._buf_len:
+            self.record_block(self._next_block, self._buf)
+            self._next_block += 1
+            self._buf, self._buf_len = [], 0
+        if self._pending:
+            await asyncio.gather(*(asyncio.wrap_future(f) for f in self._pending.values()), return_exceptions=True)
+        self.save(force=True)
+
+    async def verify(self) -> Dict[int, str]:
+        """Re-hash every recorded block in parallel; returns and clears the ones that fail."""
+        items = [(i, h) for i, h in enumerate(self.hashes) if h]
+        if not items:
+            return {}
+        workers = min(8, os.cpu_count() or 2)
+        per = max(1, -(-len(items) // workers))
+        loop = asyncio.get_running_loop()
+        groups = [items[i:i + per] for i in range(0, len(items), per)]
+        results = await asyncio.gather(*(
+            loop.run_in_executor(_integrity_pool(), _verify_blocks, self.path, self.block_size, self.total_size, g, self.algo)
+            for g in groups))
+        bad = {}
+        for index in (i for r in results for i in r):
+            bad[index] = self.hashes[index]
+            self.hashes[index] = None
+        return bad
+
+_seek_write_lock = threading.Lock()
+
+
+def _pwrite(fd: int, data: bytes, offset: int) -> None:
+    """Write all of ``data`` at ``offset``; falls back to seek+write where pwrite is missing (Windows)."""
+    view = memoryview(data)
+    if hasattr(os, "pwrite"):
+        while view:
+            written = os.pwrite(fd, view, offset)
+            view = view[written:]
+            offset += written
+    else:
+        # The file position is shared, so concurrent writer threads take turns
+        with _seek_write_lock:
+            os.lseek(fd, offset, os.SEEK_SET)
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+
+
+async def _pwrite_async(fd: int, data: bytes, offset: int) -> None:
+    """``_pwrite`` on a worker thread, keeping slow disks off the event loop.
+
+    A cancelled caller still waits for the write to finish, so the fd is
+    never closed (and its number reused) under a running write.
+    """
+    write = asyncio.ensure_future(asyncio.to_thread(_pwrite, fd, data, offset))
+    try:
+        await asyncio.shield(write)
+    except asyncio.CancelledError:
+        await write
+        raise
+
+class RangeNotSupported(Exception):
+    """A server answered a Range request with something other than the requested bytes."""
+
+class RangeDownloader:
+    """Fetch the missing blocks of one file over several Range connections and sources.
+
+    Work comes from an :class:`IntegrityMap`: blocks without a digest are
+    grouped into runs and cut into block-aligned ranges in a shared queue.
+    Each connection writes in place with positional writes; every block
+    whose bytes are all in is hashed into the map, so a pause leaves a map
+    the next resume verifies and continues from. ``first_response``, already open at the
+    first missing byte, serves the first range and saves a request.
+
+    Mirrors join through :meth:`add_source`, even while the download runs.
+    Ranges are then cut ``pieces`` times finer and workers pull from the
+    queue, so faster sources take more of the file. A worker with an empty
+    queue splits the range that would finish last (by its connection's own
+    throughput) and fetches the back half on a new connection, when that
+    finishes sooner; this applies to a single source too. A connection that
+    gets no data for ``stall_timeout`` seconds is dropped and reconnected. A
+    mirror that keeps failing is dropped and its unfinished range goes back
+    to the queue.
+
+    ``throttle(n)``, when given, is awaited after every chunk written (speed caps).
+
+    With a ``scheduler`` (``HostScheduler``) every request leases a
+    connection to its host first. The engine runs on one connection to the
+    primary host that the caller already holds: the first primary worker
+    uses it without a lease, so a host capped at one connection still works.
+
+    ``progress(fetched)`` is called per chunk with the bytes received this
+    run; ``on_contiguous(offset)`` whenever the fully written prefix grows.
+    """
+
+    def __init__(self, session, url: str, imap: "IntegrityMap", connections: int = 4,
+                 headers: Optional[Dict[str, str]] = None, retries: int = 5, progress=None, on_contiguous=None,
+                 pieces: int = 1, range_requests: bool = True, stall_timeout: float = 20.0, scheduler=None,
+                 throttle=None):
+        self.session = session
+        self.scheduler = scheduler
+        self.throttle = throttle
+        self.url = url
+        self.imap = imap
+        self.connections = max(1, int(connections))
+        self.retries = max(0, int(retries))
+        self.progress = progress
+        self.on_contiguous = on_contiguous
+        self.pieces = max(1, int(pieces))
+        self.stall_timeout = float(stall_timeout)
+        self.fetched = 0
+        self.splits = 0
+        self.stalls = 0
+        # (bytes, seconds) for every connection that finished, and HTTP statuses that caused retries
+        self.conn_stats: List[tuple] = []
+        self.errors: List[Optional[int]] = []
+        self.sources: List[Dict[str, Any]] = []
+        self.add_source(url, self.connections, headers, range_requests=range_requests, start=False)
+        self._done = {i for i, h in enumerate(imap.hashes) if h}
+        self._filled: Dict[int, int] = {}
+        # Pieces checked against published hashes: who wrote each one last, and how often each failed
+        self._writers: Dict[int, Dict[str, Any]] = {}
+        self.bad_pieces: Dict[int, int] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._watermark = 0
+        self._advance()
+        self._ranges: deque = deque()
+        self._active: List[Dict[str, Any]] = []
+        self._tasks: List[asyncio.Task] = []
+        self._fd: Optional[int] = None
+
+    def add_source(self, url: str, connections: int, headers: Optional[Dict[str, str]] = None,
+                   range_requests: bool = True, start: bool = True, rate_hint: float = 0.0) -> Dict[str, Any]:
+        """Serve ranges from another URL for the same bytes; starts its workers if the run is under way.
+
+        ``rate_hint`` (bytes/s, e.g. from a probe) ranks the source until it has transferred enough to measure.
+        """
+        src = {"url": url, "headers": dict(headers or {}), "connections": max(1, int(connections)),
+               "ranges": range_requests, "dead": False, "failures": 0, "bytes": 0, "started": None,
+               "hint": float(rate_hint or 0.0)}
+        self.sources.append(src)
+        if start and self._fd is not None:
+            for _ in range(src["connections"]):
+                self._tasks.append(asyncio.create_task(self._worker(src, None)))
+        return src
+
+    def source_rate(self, src: Dict[str, Any]) -> float:
+        elapsed = (time.monotonic() - src["started"]) if src["started"] else 0.0
+        if elapsed < 1.0 or not src["bytes"]:
+            return src["hint"]
+        return src["bytes"] / elapsed
+
+    def plan(self) -> List[List[int]]:
+        """``[start, end)`` byte ranges covering every missing block."""
+        bs = self.imap.block_size
+        total = self.imap.total_size
+        missing = self.imap.missing_blocks()
+        if not missing:
+            return []
+        per = max(1, -(-len(missing) // (self.connections * self.pieces)))
+        runs = []
+        for index in missing:
+            if runs and runs[-1][1] == index - 1 and runs[-1][1] - runs[-1][0] + 1 < per:
+                runs[-1][1] = index
+            else:
+                runs.append([index, index])
+        return [[first * bs, min((last + 1) * bs, total)] for first, last in runs]
+
+    def _advance(self) -> None:
+        start = self._watermark
+        while self._watermark in self._done:
+            self._watermark += 1
+        if self._watermark != start and self.on_contiguous is not None:
+            self.on_contiguous(min(self._watermark * self.imap.block_size, self.imap.total_size))
+
+    def _account(self, pos: int, length: int, src: Dict[str, Any]) -> None:
+        """Count written bytes per block; a block is hashed from the file once every byte of it is in.
+
+        Ranges can be split anywhere, so one block may be filled by several
+        connections; counting instead of buffering handles that. With
+        published piece hashes a block only counts as done once its digest
+        matched (see :meth:`_piece_hashed`).
+        """
+        bs = self.imap.block_size
+        end = pos + length
+        while pos < end:
+            block = pos // bs
+            block_end = min((block + 1) * bs, self.imap.total_size)
+            take = min(end, block_end) - pos
+            filled = self._filled.get(block, 0) + take
+            pos += take
+            if filled >= block_end - block * bs:
+                self._filled.pop(block, None)
+                fut = self.imap.record_block_from_file(block)
+                if self.imap.expected is None:
+                    self._done.add(block)
+                    self._advance()
+                else:
+                    self._writers[block] = src
+                    loop = self._loop
+                    fut.add_done_callback(lambda _f, b=block: loop.call_soon_threadsafe(self._piece_hashed, b))
+            else:
+                self._filled[block] = filled
+
+    def _piece_hashed(self, block: int) -> None:
+        """A piece finished hashing: count it done, or queue it again when it did not match."""
+        self.imap._harvest()
+        src = self._writers.pop(block, None)
+        if block not in self.imap.rejected:
+            if block < len(self.imap.hashes) and self.imap.hashes[block]:
+                self._done.add(block)
+                self._advance()
+            return
+        self.imap.rejected.discard(block)
+        start, end = self.imap.block_range(block)
+        self.fetched -= end - start
+        self.bad_pieces[block] = self.bad_pieces.get(block, 0) + 1
+        who = urlparse(src["url"]).netloc if src else "?"
+        logging.warning(f"[TermoLoad] Piece {block} failed verification (from {who}), fetching it again")
+        if src is not None:
+            src["failures"] += 1
+            if len(self.sources) > 1 and src["failures"] >= 3:
+                self._drop(src, "keeps sending pieces that do not match their hashes")
+        if self.bad_pieces[block] <= self.retries:
+            self._ranges.append([start, end])
+
+    def _split(self, active: Dict[str, Any]) -> Optional[List[int]]:
+        """Cut the unfetched back half off an active range."""
+        rng = active["range"]
+        if rng[1] - rng[0] < 2 * RANGE_MIN_SPLIT:
+            return None
+        mid = ((rng[0] + rng[1]) // 2) & ~(64 * 1024 - 1)
+        if mid <= rng[0] or mid >= rng[1]:
+            return None
+        tail = [mid, rng[1]]
+        rng[1] = mid
+        return tail
+
+    def _eta(self, active: Dict[str, Any], now: float) -> float:
+        """Seconds until an active range is done at its connection's throughput; inf when it stalled."""
+        left = active["range"][1] - active["range"][0]
+        if now - (active["last"] or active["opened"]) > RANGE_STALL_GRACE:
+            return float("inf")
+        if active["first"] is None or now - active["first"] < 1.0:
+            # Too young to measure: assume the source's average per connection
+            src = active["source"]
+            rate = self.source_rate(src) / src["connections"]
+        else:
+            rate = active["got"] / (now - active["first"])
+        return left / rate if rate > 0 else float("inf")
+
+    def _steal(self, src: Dict[str, Any]) -> Optional[List[int]]:
+        """Split the range that will finish last, if a new connection to ``src`` gets its back half in sooner."""
+        my_rate = self.source_rate(src) / src["connections"]
+        if not my_rate:
+            return None
+        now = time.monotonic()
+        best, best_eta = None, 0.0
+        for a in self._active:
+            left = a["range"][1] - a["range"][0]
+            if left < 2 * RANGE_MIN_SPLIT:
+                continue
+            eta = self._eta(a, now)
+            if eta > best_eta and (left / 2) / my_rate + RANGE_SPLIT_OVERHEAD < eta:
+                best, best_eta = a, eta
+        if best is None:
+            return None
+        tail = self._split(best)
+        if tail:
+            self.splits += 1
+            logging.debug(f"[TermoLoad] Split range at {tail[0]}: "
+                          f"{'stalled' if best_eta == float('inf') else f'{best_eta:.1f}s left'} "
+                          f"on {urlparse(best['source']['url']).netloc}, tail goes to {urlparse(src['url']).netloc}")
+        return tail
+
+    @staticmethod
+    def _check(resp, start: int, total: int) -> None:
+        aiohttp = get_aiohttp()
+        if resp.status == 200:
+            raise RangeNotSupported(f"HTTP 200 for a range starting at {start}")
+        if resp.status != 206:
+            raise aiohttp.ClientResponseError(resp.request_info, resp.history,
+                                              status=resp.status, message=resp.reason or "", headers=resp.headers)
+        cr = resp.headers.get("Content-Range", "")
+        try:
+            span, _, size = cr.split()[1].partition("/")
+            if int(span.split("-")[0]) != start:
+                raise RangeNotSupported(f"Content-Range {cr!r} does not start at {start}")
+            if size.isdigit() and total and int(size) != total:
+                raise RangeNotSupported(f"Content-Range {cr!r} is for a different file size than {total}")
+        except (IndexError, ValueError):
+            pass
+
+    async def _consume(self, resp, active: Dict[str, Any]) -> int:
+        rng, src = active["range"], active["source"]
+        got = 0
+        async for chunk in resp.content.iter_chunked(256 * 1024):
+            take = min(len(chunk), rng[1] - rng[0])
+            data = chunk[:take] if take < len(chunk) else chunk
+            await _pwrite_async(self._fd, data, rng[0])
+            # A split during the write only ever takes bytes past this chunk; stay within the range anyway
+            take = min(take, rng[1] - rng[0])
+            self._account(rng[0], take, src)
+            now = time.monotonic()
+            if active["first"] is None:
+                active["first"] = now
+            active["last"] = now
+            active["got"] += take
+            rng[0] += take
+            got += take
+            self.fetched += take
+            src["bytes"] += take
+            if self.progress is not None:
+                self.progress(self.fetched)
+            if rng[0] >= rng[1]:
+                break
+            if self.throttle is not None:
+                await self.throttle(take)
+        if rng[0] < rng[1]:
+            raise ConnectionError(f"Connection closed {rng[1] - rng[0]} bytes short")
+        if not resp.content.at_eof():
+            # The response runs past this range (open-ended first response, or a split); drop the connection.
+            resp.close()
+        return got
+
+    async def _fetch_range(self, rng: List[int], src: Dict[str, Any], response=None) -> None:
+        aiohttp = get_aiohttp()
+        delay = 0.5
+        attempt = 0
+        started = time.monotonic()
+        got = 0
+        if src["started"] is None:
+            src["started"] = started
+        active = {"range": rng, "source": src, "opened": started, "first": None, "last": None, "got": 0}
+        self._active.append(active)
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=self.stall_timeout)
+        try:
+            while rng[0] < rng[1]:
+                try:
+                    if response is not None:
+                        resp, response = response, None
+                        got += await self._consume(resp, active)
+                        continue
+                    headers = dict(src["headers"])
+                    headers["Range"] = f"bytes={rng[0]}-{rng[1] - 1}"
+                    # Rates are per connection, so a retry starts measuring afresh
+                    active.update(opened=time.monotonic(), first=None, last=None, got=0)
+                    async with self.session.get(src["url"], headers=headers, timeout=timeout) as resp:
+                        self._check(resp, rng[0], self.imap.total_size)
+                        got += await self._consume(resp, active)
+                    # Only a request that ran to completion clears the count; a mirror that
+                    # keeps cutting off halfway still fails "in a row".
+                    src["failures"] = 0
+                except RangeNotSupported:
+                    if len(self.sources) == 1:
+                        raise
+                    self._drop(src, "does not serve byte ranges of this file")
+                    raise
+                except (aiohttp.ClientError, asyncio.TimeoutError, ConnectionError) as e:
+                    attempt += 1
+                    src["failures"] += 1
+                    self.errors.append(getattr(e, "status", None))
+                    kind, retry_after = _classify_failure(e)
+                    if len(self.sources) > 1 and (kind == "permanent" or src["failures"] >= 3):
+                        self._drop(src, f"failed {src['failures']} times in a row ({e})" if kind != "permanent" else str(e))
+                        raise
+                    if kind == "permanent" or attempt > self.retries:
+                        raise
+                    if isinstance(e, asyncio.TimeoutError):
+                        # A stalled socket: reconnect right away rather than back off.
+                        self.stalls += 1
+                        logging.warning(f"[TermoLoad] Range {rng[0]}-{rng[1] - 1} on {urlparse(src['url']).netloc} stalled "
+                                        f"(no data for {self.stall_timeout:.0f}s), reconnecting {attempt}/{self.retries}")
+                        continue
+                    logging.warning(f"[TermoLoad] Range {rng[0]}-{rng[1] - 1} failed ({e}), retry {attempt}/{self.retries}")
+                    await asyncio.sleep(max(delay * random.uniform(0.5, 1.0), min(retry_after or 0.0, 60.0)))
+                    delay = min(delay * 2, 10.0)
+        finally:
+            self._active.remove(active)
+        self.conn_stats.append((got, time.monotonic() - started))
+
+    def _drop(self, src: Dict[str, Any], why: str) -> None:
+        if not src["dead"]:
+            src["dead"] = True
+            logging.warning(f"[TermoLoad] Dropping source {urlparse(src['url']).netloc}: {why}")
+
+    async def _worker(self, src: Dict[str, Any], first, owned: bool = False) -> None:
+        host = HostProfiles.host_of(src["url"])
+        while not src["dead"]:
+            if first is None and not src["ranges"]:
+                return
+            # Lease before taking a range, so no range sits idle while its worker waits for a socket
+            leased = self.scheduler is not None and not owned
+            if leased:
+                await self.scheduler.acquire_connection(host)
+            try:
+                rng = self._ranges.popleft() if self._ranges else self._steal(src)
+                if rng is None:
+                    if not self._active:
+                        return
+                    # Another connection may fail and hand its range back; look again shortly.
+                    if leased:
+                        self.scheduler.release_connection(host)
+                        leased = False
+                    await asyncio.sleep(0.25)
+                    continue
+                try:
+                    await self._fetch_range(rng, src, first)
+                except Exception:
+                    if rng[0] < rng[1]:
+                        self._ranges.appendleft(rng)
+                    # A dropped mirror just stops; its range is picked up by the sources still alive.
+                    if src["dead"] and any(not s["dead"] for s in self.sources):
+                        return
+                    raise
+                finally:
+                    first = None
+            finally:
+                if leased:
+                    self.scheduler.release_connection(host)
+
+    async def run(self, path: str, first_response=None, first_offset: Optional[int] = None) -> int:
+        """Fetch every missing block into ``path``; returns the bytes received."""
+        self._ranges = deque(self.plan())
+        if first_response is not None and (not self._ranges or self._ranges[0][0] != first_offset):
+            first_response.close()
+            first_response = None
+        if not self._ranges:
+            return 0
+        self._loop = asyncio.get_running_loop()
+        self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | getattr(os, "O_BINARY", 0))
+        primary = self.sources[0]
+        workers = primary["connections"] if primary["ranges"] else 1
+        first = first_response
+        for src in self.sources:
+            count = workers if src is primary else src["connections"]
+            for i in range(min(count, len(self._ranges))):
+                self._tasks.append(asyncio.create_task(self._worker(src, first, owned=src is primary and i == 0)))
+                first = None
+        try:
+            # Sources added mid-run append to _tasks, so keep waiting until none are left.
+            while True:
+                pending = [t for t in self._tasks if not t.done()]
+                if not pending:
+                    # Pieces still hashing may fail and come back as ranges after every worker quit.
+                    self.imap._harvest()
+                    checks = [asyncio.wrap_future(f) for f in list(self.imap._pending.values())]
+                    if self.imap.expected is None or not checks:
+                        break
+                    await asyncio.gather(*checks, return_exceptions=True)
+                    await asyncio.sleep(0)
+                    for src in self.sources:
+                        if self._ranges and not src["dead"] and src["ranges"]:
+                            for i in range(min(src["connections"], len(self._ranges))):
+                                self._tasks.append(asyncio.create_task(
+                                    self._worker(src, None, owned=src is primary and i == 0)))
+                    continue
+                await asyncio.wait(pending, return_when=asyncio.FIRST_EXCEPTION)
+                for t in self._tasks:
+                    if t.done() and not t.cancelled() and t.exception() is not None:
+                        raise t.exception()
+            failed = [b for b, n in self.bad_pieces.items() if n > self.retries]
+            if failed:
+                raise IOError(f"{len(failed)} piece(s) failed verification {self.retries + 1} times (first: {min(failed)})")
+            if self._ranges or self._watermark * self.imap.block_size < self.imap.total_size:
+                raise ConnectionError("Every source failed before the file was complete")
+        except BaseException:
+            for t in self._tasks:
+                t.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            raise
+        finally:
+            os.close(self._fd)
+            self._fd = None
+        return self.fetched
+
+class SegmentDownloader:
+    """Fetch an ordered list of media segments concurrently into one file.
+
+    Up to ``concurrency`` segments are in flight at once, each with its own
+    retries and backoff. Finished segments are appended strictly in playlist
+    order with positional writes. Fetching never runs more than ``window``
+    segments ahead of the write cursor, which bounds memory. The write cursor
+    is kept in a ``.segs`` sidecar, so an interrupted download continues from
+    the first unwritten segment.
+
+    Each segment is ``{"url": str, "range": (first, last) | None}``.
+    ``rate()``, when given, is the current speed limit in bytes/s (None or 0
+    for none), read after every segment.
+    """
+
+    def __init__(self, segments: List[dict], headers: Optional[Dict[str, str]] = None, concurrency: int = 8,
+                 retries: int = 5, timeout: float = 30.0, progress=None, rate=None):
+        self.segments = segments
+        self.headers = dict(headers or {})
+        self.concurrency = max(1, int(concurrency))
+        self.window = self.concurrency * 4
+        self.retries = max(0, int(retries))
+        self.timeout = timeout
+        self.progress = progress
+        self.rate = rate
+        self._bucket = TokenBucket()
+        self._written = 0
+        self._offset = 0
+        self._changed = asyncio.Event()
+
+    @staticmethod
+    def _load_state(state_path: str, path: str, count: int) -> tuple:
+        try:
+            with open(state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("count") == count and os.path.getsize(path) >= int(state["offset"]):
+                return int(state["next"]), int(state["offset"])
+        except Exception:
+            pass
+        return 0, 0
+
+    def _save_state(self, state_path: str) -> None:
+        try:
+            with open(state_path, "w", encoding="utf-8") as f:
+                json.dump({"count": len(self.segments), "next": self._written, "offset": self._offset}, f)
+        except Exception:
+            logging.debug(f"[TermoLoad] Could not save segment state {state_path}", exc_info=True)
+
+    async def _fetch(self, session, index: int) -> bytes:
+        aiohttp = get_aiohttp()
+        seg = self.segments[index]
+        headers = dict(self.headers)
+        byte_range = seg.get("range")
+        if byte_range:
+            headers["Range"] = f"bytes={byte_range[0]}-{byte_range[1]}"
+        delay = 0.5
+        for attempt in range(self.retries + 1):
+            try:
+                async with session.get(seg["url"], headers=headers,
+                                       timeout=aiohttp.ClientTimeout(total=self.timeout)) as resp:
+                    if resp.status >= 400:
+                        raise aiohttp.ClientResponseError(resp.request_info, resp.history,
+                                                          status=resp.status, message=resp.reason or "")
+                    data = await resp.read()
+                    if byte_range and resp.status == 200:
+                        # Server ignored the Range header
+                        data = data[byte_range[0]:byte_range[1] + 1]
+                    return data
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt >= self.retries:
+                    raise
+                logging.warning(f"[TermoLoad] Segment {index} failed ({e}), retry {attempt + 1}/{self.retries}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 10.0)
+        raise RuntimeError(f"Segment {index} failed")
+
+    async def run(self, path: str) -> int:
+        """Download every segment into ``path``; returns the number of bytes written."""
+        aiohttp = get_aiohttp()
+        count = len(self.segments)
+        state_path = path + ".segs"
+        self._written, self._offset = self._load_state(state_path, path, count) if os.path.exists(path) else (0, 0)
+        if self._written:
+            logging.info(f"[TermoLoad] Resuming segmented download at segment {self._written}/{count}")
+
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | getattr(os, "O_BINARY", 0))
+        try:
+            os.ftruncate(fd, self._offset)
+            pending: Dict[int, bytes] = {}
+            next_fetch = self._written
+            started = time.monotonic()
+            start_offset = self._offset
+            last_state = 0.0
+
+            async def flush() -> None:
+                nonlocal last_state
+                # Workers that find the next segment already taken leave it to the one writing it
+                while self._written in pending:
+                    data = pending.pop(self._written)
+                    await _pwrite_async(fd, data, self._offset)
+                    self._offset += len(data)
+                    self._written += 1
+                now = time.monotonic()
+                if now - last_state >= 1.0:
+                    self._save_state(state_path)
+                    last_state = now
+                changed, self._changed = self._changed, asyncio.Event()
+                changed.set()
+                if self.progress is not None:
+                    elapsed = max(now - started, 1e-6)
+                    total = int(self._offset / self._written * count) if self._written else 0
+                    self.progress(self._offset, total, (self._offset - start_offset) / elapsed, self._written, count)
+
+            async def worker(session) -> None:
+                nonlocal next_fetch
+                while next_fetch < count:
+                    if next_fetch >= self._written + self.window:
+                        await self._changed.wait()
+                        continue
+                    index = next_fetch
+                    next_fetch += 1
+                    data = pending[index] = await self._fetch(session, index)
+                    await flush()
+                    if self.rate is not None:
+                        self._bucket.set_rate(self.rate() or 0)
+                        await self._bucket.consume(len(data))
+
+            async with aiohttp.ClientSession() as session:
+                tasks = [asyncio.create_task(worker(session)) for _ in range(min(self.concurrency, max(1, count)))]
+                try:
+                    done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+                    for t in done:
+                        t.result()
+                    await asyncio.gather(*tasks)
+                finally:
+                    for t in tasks:
+                        t.cancel()
+                    await asyncio.gather(*tasks, return_exceptions=True)
+                    self._save_state(state_path)
+        finally:
+            os.close(fd)
+
+        try:
+            os.remove(state_path)
+        except OSError:
+            pass
+        return self._offset
+
+def _parse_hls_media_playlist(text: str, base_url: str) -> Optional[List[dict]]:
+    """Segments of a finished, unencrypted HLS media playlist, init section first.
+
+    Returns None for anything SegmentDownloader should leave to yt-dlp: master
+    playlists, live playlists (no ``#EXT-X-ENDLIST``) and encrypted segments.
+    """
+    import re
+    from urllib.parse import urljoin
+    if not text.lstrip().startswith("#EXTM3U") or "#EXT-X-ENDLIST" not in text:
+        return None
+    segments: List[dict] = []
+    pending_range = None
+    last_end: Dict[str, int] = {}
+
+    def _byterange(spec: str, uri: str):
+        length, _, start = spec.partition("@")
+        first = int(start) if start else last_end.get(uri, 0)
+        last = first + int(length) - 1
+        last_end[uri] = last + 1
+        return (first, last)
+
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+        if line.startswith("#EXT-X-STREAM-INF"):
+            return None
+        if line.startswith("#EXT-X-KEY"):
+            if "METHOD=NONE" not in line:
+                return None
+        elif line.startswith("#EXT-X-MAP"):
+            attrs = dict(re.findall(r'([A-Z-]+)="?([^",]*)"?', line.split(":", 1)[1]))
+            uri = urljoin(base_url, attrs.get("URI", ""))
+            segments.append({"url": uri, "range": _byterange(attrs["BYTERANGE"], uri) if "BYTERANGE" in attrs else None})
+        elif line.startswith("#EXT-X-BYTERANGE:"):
+            pending_range = line.split(":", 1)[1]
+        elif not line.startswith("#"):
+            uri = urljoin(base_url, line)
+            segments.append({"url": uri, "range": _byterange(pending_range, uri) if pending_range else None})
+            pending_range = None
+    return segments or None
+
+_TERMOLOAD_YDL = None
+
+def _termoload_ydl_class():
+    """YoutubeDL subclass that hands HLS/DASH fragment downloads to SegmentDownloader.
+
+    yt-dlp still does extraction, format selection, merging and
+    post-processing. Only finished, unencrypted manifests are taken over;
+    everything else (live, DRM, AES, exotic query handling) goes to yt-dlp's
+    own downloader.
+    """
+    global _TERMOLOAD_YDL
+    if _TERMOLOAD_YDL is not None:
+        return _TERMOLOAD_YDL
+    import yt_dlp
+    from urllib.parse import urljoin
+    from yt_dlp.downloader import get_suitable_downloader
+    from yt_dlp.downloader.common import FileDownloader
+
+    class SegmentFD(FileDownloader):
+        FD_NAME = "termoload-segments"
+
+        async def _plan(self, info_dict: dict) -> Optional[List[dict]]:
+            if info_dict.get("protocol") == "http_dash_segments":
+                fragments = info_dict.get("fragments")
+                if not isinstance(fragments, list) or info_dict.get("extra_param_to_segment_url"):
+                    return None
+                base = info_dict.get("fragment_base_url")
+                return [{"url": f.get("url") or urljoin(base, f["path"]), "range": None} for f in fragments]
+            text = info_dict.get("hls_media_playlist_data")
+            if not text:
+                aiohttp = get_aiohttp()
+                async with aiohttp.ClientSession() as session:
+                    async with session.get(info_dict["url"], headers=info_dict.get("http_headers") or {},
+                                           timeout=aiohttp.ClientTimeout(total=30)) as resp:
+                        if resp.status >= 400:
+                            return None
+                        text = await resp.text()
+            return _parse_hls_media_playlist(text, info_dict["url"])
+
+        def real_download(self, filename, info_dict):
+            tmpfilename = self.temp_name(filename)
+            headers = dict(info_dict.get("http_headers") or {})
+            try:
+                cookie = self.ydl.cookiejar.get_cookie_header(info_dict["url"])
+                if cookie:
+                    headers["Cookie"] = cookie
+            except Exception:
+                pass
+            started = time.time()
+
+            def progress(done_bytes, total, speed, done, count):
+                self._hook_progress({
+                    "status": "downloading",
+                    "downloaded_bytes": done_bytes,
+                    "total_bytes_estimate": total,
+                    "speed": speed,
+                    "eta": (total - done_bytes) / speed if speed and total > done_bytes else None,
+                    "fragment_index": done,
+                    "fragment_count": count,
+                    "filename": filename,
+                    "tmpfilename": tmpfilename,
+                    "elapsed": time.time() - started,
+                }, info_dict)
+
+            async def _download():
+                segments = await self._plan(info_dict)
+                if not segments:
+                    return None
+                engine = SegmentDownloader(
+                    segments, headers=headers,
+                    concurrency=self.params.get("concurrent_fragment_downloads") or 8,
+                    retries=self.params.get("fragment_retries") or 5,
+                    progress=progress,
+                    rate=lambda: self.params.get("ratelimit"),
+                )
+                return await engine.run(tmpfilename)
+
+            total = asyncio.run(_download())
+            if total is None:
+                logging.info("[TermoLoad] Manifest not supported by segment engine, using yt-dlp downloader")
+                fd = get_suitable_downloader(info_dict, self.params)(self.ydl, self.params)
+                for ph in self._progress_hooks:
+                    fd.add_progress_hook(ph)
+                return fd.real_download(filename, info_dict)
+
+            self.try_rename(tmpfilename, filename)
+            self._hook_progress({
+                "status": "finished",
+                "downloaded_bytes": total,
+                "total_bytes": total,
+                "filename": filename,
+                "elapsed": time.time() - started,
+            }, info_dict)
+            return True
+
+    class TermoLoadYDL(yt_dlp.YoutubeDL):
+        def post_process(self, filename, info, files_to_move=None):
+            # Merges, fixups and audio extraction wait here until the parent
+            # grants a processing slot; the network slot is already released.
+            gate = self.params.get("termoload_pp_gate")
+            steps = len(info.get("__postprocessors") or []) + len(self._pps.get("post_process") or [])
+            if gate is not None and steps:
+                # +1 for MoveFiles, which always runs between the two stages
+                gate(steps + 1 + len(self._pps.get("after_move") or []))
+            return super().post_process(filename, info, files_to_move)
+
+        def dl(self, name, info, subtitle=False, test=False):
+            if (test or name == "-" or info.get("is_live") or info.get("has_drm")
+                    or info.get("protocol") not in ("m3u8", "m3u8_native", "http_dash_segments")):
+                return super().dl(name, info, subtitle, test)
+            fd = SegmentFD(self, self.params)
+            for ph in self._progress_hooks:
+                fd.add_progress_hook(ph)
+            new_info = self._copy_infodict(info)
+            if new_info.get("http_headers") is None:
+                new_info["http_headers"] = self._calc_headers(new_info)
+            return fd.download(name, new_info, subtitle)
+
+    _TERMOLOAD_YDL = TermoLoadYDL
+    return _TERMOLOAD_YDL
+
+YTDLP_INFO_CACHE_DIR = Path.home() / ".termoload_cache" / "ytdlp"
+YTDLP_INFO_DEFAULT_TTL = 3600
+
+def _http_status(error: BaseException) -> Optional[int]:
+    """HTTP status behind an error, looking through yt-dlp's ``DownloadError.exc_info`` and exception chains."""
+    seen = set()
+    pending = [error]
+    while pending:
+        e = pending.pop(0)
+        if e is None or id(e) in seen:
+            continue
+        seen.add(id(e))
+        for attr in ("status", "code"):
+            value = getattr(e, attr, None)
+            if isinstance(value, int) and 100 <= value < 600:
+                return value
+        exc_info = getattr(e, "exc_info", None)
+        if isinstance(exc_info, tuple) and len(exc_info) > 1 and isinstance(exc_info[1], BaseException):
+            pending.append(exc_info[1])
+        pending.extend((e.__cause__, e.__context__))
+    return None
+
+
+def _kill_process_tree(pid: int) -> None:
+    """Kill a process and all of its children (ffmpeg under a yt-dlp worker) on Windows."""
+    try:
+        subprocess.run(["taskkill", "/F", "/T", "/PID", str(pid)], capture_output=True, timeout=10,
+                       creationflags=subprocess.CREATE_NO_WINDOW)
+    except Exception:
+        logging.exception(f"[TermoLoad] taskkill failed for pid {pid}")
+
+
+def _signed_url_expiry(info: dict) -> float:
+    """Earliest expiry (unix time) of the selected format URLs.
+
+    Looks for the usual signed-URL parameters (``expire``/``expires``/``exp``
+    and S3's ``X-Amz-Date`` + ``X-Amz-Expires``). Falls back to
+    YTDLP_INFO_DEFAULT_TTL from now when none are present.
+    """
+    from urllib.parse import parse_qs
+    from datetime import datetime, timezone
+    expiries = []
+    for fmt in info.get("requested_formats") or [info]:
+        fmt_url = fmt.get("url") or fmt.get("manifest_url") or ""
+        query = {k.lower(): v[0] for k, v in parse_qs(urlparse(fmt_url).query).items()}
+        for key in ("expire", "expires", "exp"):
+            try:
+                expiries.append(float(query[key]))
+                break
+            except (KeyError, ValueError):
+                continue
+        else:
+            try:
+                signed = datetime.strptime(query["x-amz-date"], "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+                expiries.append(signed.timestamp() + float(query["x-amz-expires"]))
+            except (KeyError, ValueError):
+                pass
+    return min(expiries) if expiries else time.time() + YTDLP_INFO_DEFAULT_TTL
+
+def _ytdlp_worker(conn, url: str, opts: dict, info_cache: Optional[str] = None) -> None:
+    """Child-process entry point for one yt-dlp job.
+
+    Progress goes back to the parent as ``(event, payload)`` tuples over
+    ``conn``; the parent owns ``app.downloads`` and applies them on its event
+    loop. The parent sends ``("ratelimit", {"bps": n})`` back whenever this
+    job's bandwidth share changes; a reader thread drains those as they
+    arrive, so the parent never blocks on a full pipe while yt-dlp is busy
+    extracting or merging. SIGTERM is turned into ``SystemExit`` so yt-dlp kills any ffmpeg
+    child and leaves its ``.part`` files for ``continuedl``. Windows has no
+    SIGTERM (``terminate()`` is TerminateProcess), so there the parent sends
+    ``("stop", {})`` instead, which interrupts the main thread, and kills the
+    whole process tree if the worker does not exit in time.
+
+    The result path is the one yt-dlp reports to ``post_hooks`` after every
+    post-processor has run (merges and audio extraction change the
+    extension), with ``requested_downloads`` as a fallback. The directory
+    is never scanned.
+
+    With ``info_cache`` the extracted info dict is kept on disk until its
+    signed URLs expire. A resume then goes straight to ``process_ie_result``
+    and only re-extracts when the cached URLs are rejected (403/410).
+    """
+    import signal
+    try:
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(1))
+    except Exception:
+        pass
+    # The parent's terminal belongs to Textual; keep stray output off it.
+    try:
+        sys.stdout = sys.stderr = open(os.devnull, "w")
+    except Exception:
+        pass
+
+    class _Logger:
+        def debug(self, msg):
+            logging.debug(f"[TermoLoad] yt-dlp: {msg}")
+        def info(self, msg):
+            logging.info(f"[TermoLoad] yt-dlp: {msg}")
+        def warning(self, msg):
+            logging.warning(f"[TermoLoad] yt-dlp: {msg}")
+        def error(self, msg):
+            logging.error(f"[TermoLoad] yt-dlp: {msg}")
+
+    last_sent = [0.0]
+
+    def send(event: str, payload: dict) -> None:
+        try:
+            conn.send((event, payload))
+        except Exception:
+            pass
+
+    process_go = threading.Event()
+    parent_gone = threading.Event()
+
+    def _reader() -> None:
+        # The parent pushes this job's bandwidth share; HttpFD and SegmentDownloader read it per chunk
+        while True:
+            try:
+                event, payload = conn.recv()
+            except Exception:
+                parent_gone.set()
+                process_go.set()
+                return
+            if event == "ratelimit":
+                opts["ratelimit"] = payload.get("bps") or None
+            elif event == "process":
+                process_go.set()
+            elif event == "stop":
+                import _thread
+                _thread.interrupt_main()
+
+    def _hook(d: dict):
+        status = d.get("status")
+        if status == "downloading":
+            now = time.monotonic()
+            if now - last_sent[0] < 0.25:
+                return
+            last_sent[0] = now
+            send("progress", {
+                "downloaded": int(d.get("downloaded_bytes") or 0),
+                "total": int(d.get("total_bytes") or d.get("total_bytes_estimate") or 0),
+                "speed": float(d.get("speed") or 0),
+                "eta": float(d.get("eta") or 0),
+            })
+        elif status == "finished":
+            send("finished", {"filename": d.get("filename")})
+
+    def _pp_hook(d: dict):
+        if d.get("status") in ("started", "finished"):
+            send("pp", {"name": d.get("postprocessor"), "status": d.get("status")})
+
+    def _pp_gate(steps: int) -> None:
+        send("downloaded", {"steps": steps})
+        process_go.wait()
+        if parent_gone.is_set():
+            raise EOFError("parent closed the pipe before post-processing")
+
+    try:
+        opts = dict(opts)
+        opts["progress_hooks"] = [_hook]
+        opts["postprocessor_hooks"] = [_pp_hook]
+        final_paths: List[str] = []
+        opts["post_hooks"] = [final_paths.append]
+        opts["termoload_pp_gate"] = _pp_gate
+        opts["logger"] = _Logger()
+        threading.Thread(target=_reader, name="termoload-ytdlp-limits", daemon=True).start()
+        with _termoload_ydl_class()(opts) as ydl:
+            info = None
+            if info_cache:
+                try:
+                    with open(info_cache, "r", encoding="utf-8") as f:
+                        cached = json.load(f)
+                    if float(cached.get("expires", 0)) - 60 > time.time():
+                        info = cached["info"]
+                except (OSError, ValueError, KeyError):
+                    info = None
+            if info is not None:
+                logging.info(f"[TermoLoad] Reusing cached extraction for {url}")
+                send("extracted", {"title": info.get("title"), "cached": True})
+                try:
+                    info = ydl.process_ie_result(info, download=True)
+                except Exception as e:
+                    if _http_status(e) not in (403, 410):
+                        raise
+                    logging.info(f"[TermoLoad] Cached format URLs rejected ({e}), extracting again")
+                    info = None
+            if info is None:
+                info = ydl.extract_info(url, download=False)
+                send("extracted", {"title": info.get("title") if info else None, "cached": False})
+                if info_cache and info:
+                    try:
+                        Path(info_cache).parent.mkdir(parents=True, exist_ok=True)
+                        with open(info_cache, "w", encoding="utf-8") as f:
+                            json.dump({"expires": _signed_url_expiry(info), "info": ydl.sanitize_info(info)}, f)
+                    except Exception:
+                        logging.warning(f"[TermoLoad] Could not cache extraction for {url}", exc_info=True)
+                info = ydl.process_ie_result(info, download=True)
+
+        result_path = final_paths[-1] if final_paths else None
+        if not result_path and info:
+            requested = info.get("requested_downloads") or []
+            if requested:
+                result_path = requested[-1].get("filepath")
+            result_path = result_path or info.get("filepath")
+        send("done", {"filepath": result_path})
+    except Exception as e:
+        send("error", {"message": str(e)})
+    finally:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
 class RealDownloader:
     def __init__(self,app_instance):
         super().__init__()
@@ -344,6 +3065,37 @@ class RealDownloader:
         self.session = None
         self.torrent_session = None
         self.torrent_handles = {}
+        # Alert subscribers keyed by libtorrent alert class name (e.g. "add_torrent_alert")
+        self._alert_handlers: Dict[str, List[Any]] = {}
+        self._alert_task = None
+        # Streaming (sequential) torrents keyed by download id, served over loopback HTTP
+        self.streams: Dict[int, TorrentStream] = {}
+        self.stream_server = None
+        # Completed HTTP/Video downloads seeded to the LAN, keyed by download id
+        self.lan_shares: Dict[int, Any] = {}
+        # yt-dlp worker processes keyed by download id; the semaphore bounds how many run
+        self._ytdlp_procs: Dict[int, Any] = {}
+        # Parent ends of their pipes, for asking a worker to stop where there is no SIGTERM
+        self._ytdlp_conns: Dict[int, Any] = {}
+        self._ytdlp_slots = None
+        # Post-processing (ffmpeg merges, audio extraction) has its own CPU-sized slots
+        self._processing_slots = None
+        # Background Range: bytes=0-0 probes of queued HTTP downloads (see _preflight)
+        self._preflight_tasks: Dict[int, asyncio.Task] = {}
+        self._preflight_slots = None
+        self._preflight_limit = 0
+        self._preflight_busy: set = set()
+        # What each HTTP host supports and how fast it is, across sessions
+        self.host_profiles = HostProfiles()
+        self.breakers = CircuitBreaker()
+        # Download slots and connection leases per host ("concurrent", "per_host_connections", "host_limits")
+        self.scheduler = HostScheduler()
+        # Splits "max_speed_kb" (or the measured link) between active downloads by weight
+        self.bandwidth = BandwidthAllocator(cap=self._speed_cap)
+        # The schedule window in force, if any; its limits override the plain settings
+        self.schedule_window: Optional[Dict[str, Any]] = None
+        # Room reserved on each destination filesystem for running HTTP downloads
+        self.disk = DiskSpace(margin=self._disk_margin)
 
     def start_torrent_session(self):
         """Initialize libtorrent session with optimal settings and firewall handling"""
@@ -367,7 +3119,8 @@ class RealDownloader:
                     'enable_incoming_tcp': True,
                     'alert_mask': lt.alert.category_t.error_notification | 
                                   lt.alert.category_t.status_notification |
-                                  lt.alert.category_t.storage_notification,
+                                  lt.alert.category_t.storage_notification |
+                                  lt.alert.category_t.piece_progress_notification,
                 }
                 
                 self.torrent_session = lt.session(settings)
@@ -382,6 +3135,12 @@ class RealDownloader:
                     sett['connections_limit'] = 200
                     sett['download_rate_limit'] = 0
                     sett['upload_rate_limit'] = 0
+                    # Web seeds (BEP 19): keep enough requests in flight that an
+                    # HTTP mirror can carry the download when the swarm is thin.
+                    sett['urlseed_pipeline_size'] = 8
+                    sett['urlseed_max_request_bytes'] = 16 * 1024 * 1024
+                    sett['max_web_seed_connections'] = 6
+                    sett['urlseed_wait_retry'] = 15
                     self.torrent_session.apply_settings(sett)
                 except Exception as settings_error:
                     logging.warning(f"[TermoLoad] Could not apply all settings: {settings_error}")
@@ -480,7 +3239,227 @@ class RealDownloader:
                 
         except Exception as e:
             logging.warning(f"[TermoLoad] Firewall setup warning: {e}")
-    
+
+    @staticmethod
+    def _torrent_key(obj) -> Optional[str]:
+        """Return a stable info-hash string for a torrent handle or add_torrent_params."""
+        try:
+            ti = getattr(obj, "ti", None)
+            if ti is not None:
+                obj = ti
+            if hasattr(obj, "info_hashes"):
+                hashes = obj.info_hashes() if callable(obj.info_hashes) else obj.info_hashes
+                return str(hashes.get_best())
+            if hasattr(obj, "info_hash"):
+                return str(obj.info_hash() if callable(obj.info_hash) else obj.info_hash)
+        except Exception:
+            pass
+        return None
+
+    def subscribe_alert(self, alert_name: str, callback) -> None:
+        """Register a callback for a libtorrent alert type and make sure the pump runs."""
+        self._alert_handlers.setdefault(alert_name, []).append(callback)
+        self._ensure_alert_pump()
+
+    def unsubscribe_alert(self, alert_name: str, callback) -> None:
+        try:
+            self._alert_handlers.get(alert_name, []).remove(callback)
+        except ValueError:
+            pass
+
+    def _ensure_alert_pump(self) -> None:
+        if self.torrent_session is None:
+            return
+        if self._alert_task is None or self._alert_task.done():
+            try:
+                self._alert_task = asyncio.get_running_loop().create_task(self._alert_pump())
+            except RuntimeError:
+                self._alert_task = None
+
+    async def _alert_pump(self) -> None:
+        """Single consumer of the session alert queue; dispatches to subscribers.
+
+        pop_alerts() drains the queue for everyone, so all alert-driven features
+        go through this loop instead of popping alerts on their own.
+        """
+        while self.torrent_session is not None:
+            try:
+                alerts = self.torrent_session.pop_alerts()
+            except Exception:
+                logging.exception("[TermoLoad] Failed to pop torrent alerts")
+                alerts = []
+            for alert in alerts:
+                handlers = self._alert_handlers.get(type(alert).__name__)
+                if not handlers:
+                    continue
+                for cb in list(handlers):
+                    try:
+                        cb(alert)
+                    except Exception:
+                        logging.exception(f"[TermoLoad] Alert handler failed for {type(alert).__name__}")
+            await asyncio.sleep(0.1)
+
+    async def _build_add_params(self, url: str, save_path: Path):
+        """Parse a magnet, local .torrent or .torrent URL into add_torrent_params (no session I/O)."""
+        import libtorrent as lt
+        if url.startswith("magnet:"):
+            params = lt.parse_magnet_uri(url)
+        elif os.path.isfile(url):
+            params = lt.add_torrent_params()
+            params.ti = lt.torrent_info(url)
+        elif url.startswith(("http://", "https://")) and url.lower().endswith(".torrent"):
+            await self.start_session()
+            async with self.session.get(url, timeout=30) as response:
+                if response.status != 200:
+                    raise RuntimeError(f"HTTP {response.status}")
+                torrent_data = await response.read()
+            params = lt.add_torrent_params()
+            params.ti = lt.torrent_info(lt.bdecode(torrent_data))
+        else:
+            raise ValueError(f"Invalid torrent source: {url}")
+        params.save_path = str(save_path)
+        # Park in upload mode until download_torrent applies file selection and clears it
+        params.flags |= lt.torrent_flags.upload_mode
+        return params
+
+    async def add_torrents_bulk(self, items: List[Dict[str, Any]], timeout: float = 60.0) -> Dict[str, List[int]]:
+        """Add many torrents at once and resolve their metadata concurrently.
+
+        ``items`` is a list of ``{"id", "url", "path"}`` dicts. All sources are
+        parsed concurrently, queued with ``async_add_torrent`` in one batch and
+        then awaited against a single shared deadline. Handles are parked under
+        ``temp_<id>`` so ``download_torrent`` picks them up. Returns ids split
+        into ``ready`` (metadata known), ``pending`` (still resolving in the
+        session when the deadline hit) and ``failed``.
+        """
+        result: Dict[str, List[int]] = {"ready": [], "pending": [], "failed": []}
+        if not LIBTORRENT_AVAILABLE:
+            result["failed"] = [it["id"] for it in items]
+            return result
+
+        if self.torrent_session is None:
+            self.start_torrent_session()
+        if self.torrent_session is None:
+            logging.error("[TermoLoad] Bulk add: torrent session unavailable")
+            result["failed"] = [it["id"] for it in items]
+            return result
+
+        async def _prepare(item):
+            save_path = Path(item.get("path") or "downloads")
+            save_path.mkdir(parents=True, exist_ok=True)
+            try:
+                return item["id"], await self._build_add_params(item["url"], save_path)
+            except Exception as e:
+                logging.warning(f"[TermoLoad] Bulk add: could not parse {item.get('url')}: {e}")
+                return item["id"], None
+
+        prepared = await asyncio.gather(*(_prepare(it) for it in items))
+
+        by_key: Dict[str, int] = {}
+        for download_id, params in prepared:
+            key = self._torrent_key(params) if params is not None else None
+            if params is None or key is None or key in by_key:
+                result["failed"].append(download_id)
+                continue
+            by_key[key] = download_id
+
+        handles: Dict[int, Any] = {}
+        resolved: set = set()
+        done = asyncio.Event()
+
+        def _check_done():
+            if len(resolved) + len(result["failed"]) >= len(items):
+                done.set()
+
+        def _on_added(alert):
+            key = self._torrent_key(alert.handle) if alert.handle.is_valid() else self._torrent_key(alert.params)
+            download_id = by_key.get(key)
+            if download_id is None:
+                return
+            if alert.error.value() != 0:
+                logging.warning(f"[TermoLoad] Bulk add: torrent {download_id} rejected: {alert.error.message()}")
+                result["failed"].append(download_id)
+            else:
+                handles[download_id] = alert.handle
+                if alert.handle.status().has_metadata:
+                    resolved.add(download_id)
+            _check_done()
+
+        def _on_metadata(alert):
+            download_id = by_key.get(self._torrent_key(alert.handle))
+            if download_id is not None:
+                resolved.add(download_id)
+                _check_done()
+
+        self.subscribe_alert("add_torrent_alert", _on_added)
+        self.subscribe_alert("metadata_received_alert", _on_metadata)
+        try:
+            for download_id, params in prepared:
+                if download_id in result["failed"]:
+                    continue
+                try:
+                    self.torrent_session.async_add_torrent(params)
+                except Exception as e:
+                    logging.warning(f"[TermoLoad] Bulk add: async_add_torrent failed for {download_id}: {e}")
+                    result["failed"].append(download_id)
+            _check_done()
+            try:
+                await asyncio.wait_for(done.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                logging.info(f"[TermoLoad] Bulk add: metadata deadline of {timeout:.0f}s reached")
+        finally:
+            self.unsubscribe_alert("add_torrent_alert", _on_added)
+            self.unsubscribe_alert("metadata_received_alert", _on_metadata)
+
+        for download_id, handle in handles.items():
+            self.torrent_handles[f"temp_{download_id}"] = handle
+            if download_id in resolved:
+                result["ready"].append(download_id)
+            else:
+                result["pending"].append(download_id)
+        # Anything never acknowledged by an add_torrent_alert is treated as failed
+        for download_id in by_key.values():
+            if download_id not in handles and download_id not in result["failed"]:
+                result["failed"].append(download_id)
+
+        logging.info(
+            f"[TermoLoad] Bulk add: {len(result['ready'])} ready, "
+            f"{len(result['pending'])} pending, {len(result['failed'])} failed"
+        )
+        return result
+
+    async def wait_for_metadata(self, download_id: int) -> bool:
+        """Wait (without a deadline) until a parked temp handle has metadata.
+
+        Returns False as soon as the handle is removed or becomes invalid.
+        """
+        temp_key = f"temp_{download_id}"
+        handle = self.torrent_handles.get(temp_key)
+        if handle is None or not handle.is_valid():
+            return False
+        if handle.status().has_metadata:
+            return True
+        key = self._torrent_key(handle)
+        received = asyncio.Event()
+
+        def _on_metadata(alert):
+            if self._torrent_key(alert.handle) == key:
+                received.set()
+
+        self.subscribe_alert("metadata_received_alert", _on_metadata)
+        try:
+            # Re-check after subscribing so an alert between the two calls is not missed
+            while not received.is_set() and not handle.status().has_metadata:
+                try:
+                    await asyncio.wait_for(received.wait(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    pass
+                if self.torrent_handles.get(temp_key) is not handle or not handle.is_valid():
+                    return False
+            return True
+        finally:
+            self.unsubscribe_alert("metadata_received_alert", _on_metadata)
+
     async def get_torrent_info(self, url: str, download_id: int) -> Optional[dict]:
         """Fetch torrent metadata without starting download."""
         temp_file = None
@@ -604,26 +3583,17 @@ class RealDownloader:
             try:
                 status = handle.status()
                 torrent_info_obj = handle.torrent_file()
+                if torrent_info_obj is None:
+                    raise RuntimeError("Torrent has no metadata")
                 
-                files_info = []
-                if torrent_info_obj:
-                    for i in range(torrent_info_obj.num_files()):
-                        try:
-                            file_entry = torrent_info_obj.files().at(i)
-                            files_info.append({
-                                "index": i,
-                                "path": file_entry.path,
-                                "size": file_entry.size
-                            })
-                        except Exception as file_error:
-                            logging.warning(f"[TermoLoad] Error reading file {i}: {file_error}")
-                            continue
-                
+                # File paths/sizes are not copied out here; the file picker reads
+                # them on demand from file_storage (the torrent_info keeps it alive)
                 result = {
                     "name": status.name if status.has_metadata else "Unknown",
-                    "total_size": status.total_wanted,
-                    "num_files": len(files_info),
-                    "files": files_info,
+                    "total_size": torrent_info_obj.total_size(),
+                    "num_files": torrent_info_obj.num_files(),
+                    "file_storage": torrent_info_obj.files(),
+                    "torrent_file": torrent_info_obj,
                     "handle": handle  # Keep handle for later use
                 }
                 
@@ -631,7 +3601,7 @@ class RealDownloader:
                 # Store temporarily
                 self.torrent_handles[f"temp_{download_id}"] = handle
                 
-                logging.info(f"[TermoLoad] Torrent info retrieved: {result['name']}, {len(files_info)} files")
+                logging.info(f"[TermoLoad] Torrent info retrieved: {result['name']}, {result['num_files']} files")
                 return result
                 
             except Exception as extract_error:
@@ -655,8 +3625,23 @@ class RealDownloader:
                 except Exception as cleanup_error:
                     logging.warning(f"[TermoLoad] Could not cleanup temp file: {cleanup_error}")
 
-    async def download_torrent(self, url: str, download_id: int, custom_path: str, selected_files: Optional[List[int]] = None) -> bool:
-        """Download torrent from magnet link, .torrent file, or URL with optional file selection."""
+    async def download_torrent(self, url: str, download_id: int, custom_path: str, selected_files: Optional[List[int]] = None,
+                               streaming: bool = False, stream_file: Optional[int] = None,
+                               file_priorities: Optional[List[int]] = None,
+                               mirrors: Optional[List[str]] = None) -> bool:
+        """Download torrent from magnet link, .torrent file, or URL with optional file selection.
+
+        File selection is given either as ``selected_files`` (indices) or as a
+        full ``file_priorities`` vector, which is applied in a single
+        ``prioritize_files`` call.
+
+        ``mirrors`` are extra HTTP/HTTPS URLs attached as web seeds (BEP 19) next
+        to any ``url-list`` already present in the metainfo.
+
+        With ``streaming`` the torrent is downloaded sequentially and one file
+        (``stream_file`` or the largest selected media file) is served over the
+        loopback stream server while it downloads.
+        """
         torrent_data_file = None
         try:
             # Lazy load aiofiles when needed
@@ -856,23 +3841,27 @@ class RealDownloader:
                     pass
             
             # Apply file selection if specified
-            if selected_files is not None:
+            if file_priorities is None and selected_files is not None:
                 try:
                     torrent_info_obj = handle.torrent_file()
                     if torrent_info_obj:
-                        num_files = torrent_info_obj.num_files()
-                        # Set priority to 0 (don't download) for unselected files
-                        for i in range(num_files):
-                            if i in selected_files:
-                                handle.file_priority(i, 4)  # Normal priority
-                            else:
-                                handle.file_priority(i, 0)  # Don't download
-                        logging.info(f"[TermoLoad] Set file priorities: {len(selected_files)}/{num_files} files selected")
+                        wanted = set(selected_files)
+                        # 4 = normal priority, 0 = don't download
+                        file_priorities = [4 if i in wanted else 0 for i in range(torrent_info_obj.num_files())]
+                except Exception as e:
+                    logging.warning(f"[TermoLoad] Failed to build file priorities: {e}")
+            if file_priorities is not None:
+                try:
+                    handle.prioritize_files(file_priorities)
+                    selected_files = [i for i, p in enumerate(file_priorities) if p]
+                    logging.info(f"[TermoLoad] Set file priorities: {len(selected_files)}/{len(file_priorities)} files selected")
                 except Exception as e:
                     logging.warning(f"[TermoLoad] Failed to set file priorities: {e}")
             
             # Store handle
             self.torrent_handles[download_id] = handle
+            self.bandwidth.register(download_id, lambda: self._bandwidth_weight(download_id),
+                                    apply=lambda bps: handle.set_download_limit(int(bps) if bps else -1))
             
             logging.info(f"[TermoLoad] Torrent added to session: {download_id}")
             
@@ -893,6 +3882,14 @@ class RealDownloader:
                     logging.info(f"[TermoLoad] Torrent name: {torrent_name}")
             except Exception as e:
                 logging.warning(f"[TermoLoad] Could not get torrent name: {e}")
+
+            self._attach_web_seeds(download_id, handle, mirrors)
+
+            if streaming:
+                try:
+                    await self._start_streaming(download_id, handle, stream_file, selected_files)
+                except Exception as e:
+                    logging.warning(f"[TermoLoad] Could not enable streaming for torrent {download_id}: {e}")
             
             # Resume download
             try:
@@ -917,6 +3914,7 @@ class RealDownloader:
                     state = status.state
                     progress = status.progress
                     download_rate = status.download_rate
+                    self.bandwidth.report(download_id, download_rate)
                     total_size = status.total_wanted
                     downloaded = status.total_wanted_done
                     num_peers = status.num_peers
@@ -931,6 +3929,7 @@ class RealDownloader:
                     
                     # Update peer/seed count
                     self.update_torrent_peers(download_id, num_peers, num_seeds)
+                    self._update_source_rates(download_id, handle, download_rate)
                     
                     # Update size info
                     try:
@@ -1034,6 +4033,7 @@ class RealDownloader:
             return False
         
         finally:
+            self.bandwidth.unregister(download_id)
             # Cleanup temporary torrent file
             if torrent_data_file and torrent_data_file.exists():
                 try:
@@ -1042,6 +4042,156 @@ class RealDownloader:
                 except Exception as cleanup_error:
                     logging.warning(f"[TermoLoad] Could not cleanup temp file: {cleanup_error}")
     
+    async def _start_streaming(self, download_id: int, handle, file_index: Optional[int] = None,
+                               selected_files: Optional[List[int]] = None) -> Optional[str]:
+        """Switch a torrent to sequential mode and expose one file on the stream server."""
+        import libtorrent as lt
+        ti = handle.torrent_file()
+        if ti is None:
+            logging.warning(f"[TermoLoad] Streaming for torrent {download_id} needs metadata; skipped")
+            return None
+        files = ti.files()
+        if file_index is None:
+            wanted = set(selected_files) if selected_files is not None else None
+            candidates = [i for i in range(files.num_files()) if wanted is None or i in wanted]
+            if not candidates:
+                return None
+            media = [i for i in candidates if files.file_path(i).lower().endswith(MEDIA_EXTENSIONS)]
+            file_index = max(media or candidates, key=files.file_size)
+
+        handle.set_flags(lt.torrent_flags.sequential_download)
+        stream = TorrentStream(download_id, handle, file_index)
+        stream.key = self._torrent_key(handle)
+        self.streams[download_id] = stream
+        if self._on_piece_finished not in self._alert_handlers.get("piece_finished_alert", []):
+            self.subscribe_alert("piece_finished_alert", self._on_piece_finished)
+        stream.advance_to_piece(stream.first_piece)
+
+        if self.stream_server is None:
+            self.stream_server = TorrentStreamServer()
+        await self.stream_server.start()
+        self.stream_server.streams[download_id] = stream
+        stream_url = self.stream_server.url_for(download_id)
+
+        for d in self.app.downloads:
+            if d.get("id") == download_id:
+                d["streaming"] = True
+                d["stream_file"] = file_index
+                d["stream_url"] = stream_url
+                break
+        logging.info(f"[TermoLoad] Streaming torrent {download_id} file #{file_index} at {stream_url}")
+        return stream_url
+
+    def _on_piece_finished(self, alert) -> None:
+        key = self._torrent_key(alert.handle)
+        for stream in self.streams.values():
+            if getattr(stream, "key", None) == key:
+                stream.on_piece_finished(int(alert.piece_index))
+
+    async def read_stream(self, download_id: int, offset: int, length: int) -> bytes:
+        """Local read API for streaming torrents; waits for the covering pieces."""
+        stream = self.streams.get(download_id)
+        if stream is None:
+            raise KeyError(f"Torrent {download_id} is not streaming")
+        return await stream.read(offset, length)
+
+    def stop_streaming(self, download_id: int) -> None:
+        stream = self.streams.pop(download_id, None)
+        if self.stream_server is not None:
+            self.stream_server.streams.pop(download_id, None)
+        if stream is not None:
+            stream.close()
+
+    async def _create_lan_torrent(self, filepath: Path) -> bytes:
+        """Build a v1 .torrent for a single file, hashing pieces on a thread pool."""
+        import libtorrent as lt
+        from concurrent.futures import ThreadPoolExecutor
+
+        fs = lt.file_storage()
+        fs.add_file(filepath.name, filepath.stat().st_size)
+        ct = lt.create_torrent(fs, 0, lt.create_torrent.v1_only)
+        ct.set_creator("TermoLoad")
+        piece_length = ct.piece_length()
+        num_pieces = ct.num_pieces()
+        batch = max(1, (8 * 1024 * 1024) // piece_length)
+        loop = asyncio.get_running_loop()
+        workers = max(1, min(8, os.cpu_count() or 2))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="termoload-hash") as pool:
+            jobs = [
+                (first, loop.run_in_executor(pool, _hash_pieces, str(filepath), piece_length, first, min(batch, num_pieces - first)))
+                for first in range(0, num_pieces, batch)
+            ]
+            for first, job in jobs:
+                for i, digest in enumerate(await job):
+                    ct.set_hash(first + i, digest)
+        return lt.bencode(ct.generate())
+
+    async def share_on_lan(self, download_id: int, filepath: Path) -> Optional[dict]:
+        """Seed a completed file from the torrent session so LAN peers can fetch it.
+
+        The .torrent is written next to the file and reused while it is newer
+        than the file. Peers on the same network find the seed through local
+        service discovery; the returned magnet is enough to fetch it.
+        """
+        if not LIBTORRENT_AVAILABLE:
+            logging.error("[TermoLoad] Libtorrent unavailable, cannot share on LAN")
+            return None
+        import libtorrent as lt
+
+        if self.torrent_session is None:
+            self.start_torrent_session()
+        if self.torrent_session is None:
+            logging.error("[TermoLoad] Torrent session failed, cannot share on LAN")
+            return None
+        try:
+            sett = self.torrent_session.get_settings()
+            if not sett.get('enable_lsd', False):
+                sett['enable_lsd'] = True
+                self.torrent_session.apply_settings(sett)
+        except Exception as e:
+            logging.warning(f"[TermoLoad] Could not enable local service discovery: {e}")
+
+        torrent_path = filepath.with_name(filepath.name + ".torrent")
+        if torrent_path.exists() and torrent_path.stat().st_mtime >= filepath.stat().st_mtime:
+            logging.info(f"[TermoLoad] Reusing LAN torrent {torrent_path}")
+            data = await asyncio.to_thread(torrent_path.read_bytes)
+        else:
+            logging.info(f"[TermoLoad] Hashing {filepath} for LAN share")
+            data = await self._create_lan_torrent(filepath)
+            await asyncio.to_thread(torrent_path.write_bytes, data)
+        ti = lt.torrent_info(lt.bdecode(data))
+
+        self.stop_lan_share(download_id)
+        params = lt.add_torrent_params()
+        params.ti = ti
+        params.save_path = str(filepath.parent)
+        params.flags |= lt.torrent_flags.seed_mode
+        self.lan_shares[download_id] = self.torrent_session.add_torrent(params)
+        self._ensure_alert_pump()
+
+        share = {"torrent": str(torrent_path), "magnet": lt.make_magnet_uri(ti)}
+        logging.info(f"[TermoLoad] Sharing download {download_id} on LAN: {share['magnet']}")
+        return share
+
+    def stop_lan_share(self, download_id: int) -> None:
+        try:
+            handle = self.lan_shares.pop(download_id, None)
+            if handle and self.torrent_session:
+                self.torrent_session.remove_torrent(handle)
+                logging.info(f"[TermoLoad] Stopped LAN share for download {download_id}")
+        except Exception:
+            logging.exception(f"[TermoLoad] Failed to stop LAN share {download_id}")
+
+    def lan_share_status(self, download_id: int) -> Optional[dict]:
+        handle = self.lan_shares.get(download_id)
+        if handle is None:
+            return None
+        try:
+            st = handle.status()
+            return {"peers": st.num_peers, "uploaded": st.all_time_upload, "rate": st.upload_rate}
+        except Exception:
+            return None
+
     def stop_torrent(self,download_id:int):
         try:
             handle = self.torrent_handles.get(download_id)
@@ -1053,15 +4203,19 @@ class RealDownloader:
 
     def pause_torrent(self,download_id:int):
         self.stop_torrent(download_id)
+        # A row still resolving metadata only has its parked temp handle
+        self.stop_torrent(f"temp_{download_id}")
 
     def remove_torrent(self,download_id:int):
-        try:
-            handle = self.torrent_handles.pop(download_id, None)
-            if handle and self.torrent_session:
-                self.torrent_session.remove_torrent(handle)
-                logging.info(f"[TermoLoad] Torrent removed: {download_id}")
-        except Exception:
-            logging.exception(f"[TermoLoad] Failed to remove torrent {download_id}")
+        self.stop_streaming(download_id)
+        for key in (download_id, f"temp_{download_id}"):
+            try:
+                handle = self.torrent_handles.pop(key, None)
+                if handle and self.torrent_session:
+                    self.torrent_session.remove_torrent(handle)
+                    logging.info(f"[TermoLoad] Torrent removed: {key}")
+            except Exception:
+                logging.exception(f"[TermoLoad] Failed to remove torrent {key}")
 
 
     async def start_session(self):
@@ -1070,6 +4224,7 @@ class RealDownloader:
             aiohttp = get_aiohttp()
             
             try:
+                # Sockets per host are capped by HostScheduler leases, which know each site's own limit
                 connector = aiohttp.TCPConnector(limit=100, ttl_dns_cache=300)
             except Exception:
                 connector = None
@@ -1077,10 +4232,14 @@ class RealDownloader:
                 "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0 Safari/537.36 TermoLoad/1.0",
                 "Accept": "*/*",
             }
+            try:
+                trace_configs = [self.host_profiles.trace_config()]
+            except Exception:
+                trace_configs = []
             self.session = (
-                aiohttp.ClientSession(connector=connector, headers=default_headers)
+                aiohttp.ClientSession(connector=connector, headers=default_headers, trace_configs=trace_configs)
                 if connector
-                else aiohttp.ClientSession(headers=default_headers)
+                else aiohttp.ClientSession(headers=default_headers, trace_configs=trace_configs)
             )
 
     
@@ -1102,43 +4261,16 @@ class RealDownloader:
             else:
                 outtmpl = str(Path(custom_path)/"%(title)s.%(ext)s")
             
-            # Progress hook
-            def _hook(d: dict):
-                try:
-                    status = d.get("status")
-                    if status == "downloading":
-                        downloaded = int(d.get("downloaded_bytes") or 0)
-                        total = int(d.get("total_bytes") or d.get("total_bytes_estimate") or 0)
-                        speed = float(d.get("speed") or 0)
-                        eta = float(d.get("eta") or 0)
-                        progress = (downloaded / total) if total else 0.0
-                        
-                        # Update item info
-                        try:
-                            item = next((x for x in self.app.downloads if x.get("id") == download_id), None)
-                            if item is not None:
-                                item["downloaded_bytes"] = downloaded
-                                if total:
-                                    item["total_size"] = total
-                        except Exception:
-                            pass
-                        
-                        self.update_download_progress(download_id, progress, speed, eta, "Downloading")
-                    
-                    elif status == "finished":
-                        self.update_download_progress(download_id, 1.0, 0, 0, "Processing")
-                        logging.info(f"[TermoLoad] Download {download_id} finished, processing...")
-                except Exception as e:
-                    logging.warning(f"[TermoLoad] Progress hook error: {e}")
-            
             # Simple yt-dlp options - no complex extraction args
             ytdlp_opts = {
                 "outtmpl": outtmpl,
                 "noprogress": True,
-                "progress_hooks": [_hook],
                 "continuedl": True,
+                # One job is one video; playlists are expanded into child jobs by is_playlist_url
+                "noplaylist": True,
                 "retries": 5,
                 "fragment_retries": 5,
+                "concurrent_fragment_downloads": int(self._settings().get("fragment_concurrency", 8) or 8),
             }
             
             # Format selection
@@ -1152,32 +4284,16 @@ class RealDownloader:
             else:
                 ytdlp_opts["format"] = ytdlp_format or "best"
             
-            logging.info(f"[TermoLoad] Starting yt-dlp download {download_id}: {url}")
-            
-            # Simple download function
-            def _run():
-                with ytdlp.YoutubeDL(ytdlp_opts) as ydl:
-                    ydl.download([url])
-                
-                # Find downloaded file (newest file in directory)
-                download_dir = Path(custom_path)
-                if download_dir.exists():
-                    files = sorted(download_dir.glob("*"), key=lambda p: p.stat().st_mtime, reverse=True)
-                    for f in files:
-                        if f.is_file():
-                            # Update download info
-                            for item in self.app.downloads:
-                                if item.get("id") == download_id:
-                                    item["filepath"] = str(f)
-                                    item["name"] = f.name
-                                    break
-                            logging.info(f"[TermoLoad] Downloaded: {f.name}")
-                            return str(f)
-                
-                return None
-            
-            # Run download
-            result_path = await asyncio.to_thread(_run)
+            result_path = await self._run_ytdlp_process(url, download_id, ytdlp_opts)
+
+            if result_path:
+                self.drop_ytdlp_info_cache(download_id)
+                for item in self.app.downloads:
+                    if item.get("id") == download_id:
+                        item["filepath"] = result_path
+                        item["name"] = ("↳ " if item.get("group_id") else "") + Path(result_path).name
+                        break
+                logging.info(f"[TermoLoad] Downloaded: {Path(result_path).name}")
             
             if result_path and os.path.exists(result_path):
                 self.update_download_progress(download_id, 1.0, 0, 0, "Completed")
@@ -1218,16 +4334,585 @@ class RealDownloader:
                 pass
             return False
    
+    @staticmethod
+    def ytdlp_info_cache_path(download_id: int, url: str) -> Path:
+        import hashlib
+        return YTDLP_INFO_CACHE_DIR / f"{download_id}-{hashlib.sha1(url.encode('utf-8')).hexdigest()[:12]}.json"
+
+    @staticmethod
+    def drop_ytdlp_info_cache(download_id: int) -> None:
+        try:
+            for f in YTDLP_INFO_CACHE_DIR.glob(f"{download_id}-*.json"):
+                f.unlink(missing_ok=True)
+        except Exception:
+            pass
+
+    async def _run_ytdlp_process(self, url: str, download_id: int, opts: dict) -> Optional[str]:
+        """Run one yt-dlp job in a worker process and apply its events here.
+
+        The job holds a network slot (``video_workers``) while bytes are
+        transferred. Once they are on disk the worker reports "downloaded" and
+        the job moves to a processing slot (``processing_workers``, sized by
+        CPU count) for merges, fixups and audio extraction. The network slot
+        goes to the next download immediately.
+
+        Returns the downloaded file path. Cancelling the awaiting task
+        terminates the worker.
+        """
+        settings = self._settings()
+        if self._ytdlp_slots is None:
+            try:
+                workers = int(settings.get("video_workers", 2) or 2)
+            except Exception:
+                workers = 2
+            self._ytdlp_slots = asyncio.Semaphore(max(1, workers))
+        if self._processing_slots is None:
+            try:
+                workers = int(settings.get("processing_workers") or 0)
+            except Exception:
+                workers = 0
+            self._processing_slots = asyncio.Semaphore(max(1, workers or (os.cpu_count() or 2) // 2))
+
+        if self._ytdlp_slots.locked():
+            self.update_download_progress(download_id, 0.0, 0, 0, "Queued")
+        await self._ytdlp_slots.acquire()
+        net_slot = True
+        pp_slot = False
+        logging.info(f"[TermoLoad] Starting yt-dlp download {download_id}: {url}")
+
+        import multiprocessing
+        from multiprocessing import resource_tracker
+        # Textual swaps sys.stderr for a capture whose fileno() is -1, which the
+        # resource tracker hands to its own child; start it on the real stderr.
+        captured = sys.stderr
+        try:
+            sys.stderr = sys.__stderr__ or captured
+            resource_tracker.ensure_running()
+        finally:
+            sys.stderr = captured
+        ctx = multiprocessing.get_context("spawn")
+        parent_conn, child_conn = ctx.Pipe()
+        proc = ctx.Process(
+            target=_ytdlp_worker,
+            args=(child_conn, url, opts, str(self.ytdlp_info_cache_path(download_id, url))),
+            name=f"termoload-ytdlp-{download_id}",
+            daemon=True,
+        )
+        result: Dict[str, Any] = {}
+        try:
+            proc.start()
+            child_conn.close()
+            self._ytdlp_procs[download_id] = proc
+            self._ytdlp_conns[download_id] = parent_conn
+            # Only the latest share matters; the loop below forwards it instead of sending from the allocator
+            limit = {"want": None, "sent": None}
+            self.bandwidth.register(download_id, lambda: self._bandwidth_weight(download_id),
+                                    apply=lambda bps: limit.__setitem__("want", int(bps)))
+            eof = False
+            while not eof:
+                if limit["want"] != limit["sent"]:
+                    try:
+                        parent_conn.send(("ratelimit", {"bps": limit["want"]}))
+                        limit["sent"] = limit["want"]
+                    except (OSError, ValueError):
+                        pass
+                while parent_conn.poll():
+                    try:
+                        event, payload = parent_conn.recv()
+                    except EOFError:
+                        eof = True
+                        break
+                    if event == "downloaded":
+                        if net_slot:
+                            self._ytdlp_slots.release()
+                            net_slot = False
+                        self.bandwidth.unregister(download_id)
+                        result["pp_steps"] = int(payload.get("steps") or 1)
+                        self._set_processing(download_id, "waiting")
+                        if not pp_slot:
+                            await self._processing_slots.acquire()
+                            pp_slot = True
+                        self._set_processing(download_id, f"0/{result['pp_steps']}")
+                        parent_conn.send(("process", {}))
+                        continue
+                    self._apply_ytdlp_event(download_id, event, payload, result)
+                if not eof and not proc.is_alive() and not parent_conn.poll():
+                    break
+                if not eof:
+                    await asyncio.sleep(0.1)
+        finally:
+            if net_slot:
+                self._ytdlp_slots.release()
+            if pp_slot:
+                self._processing_slots.release()
+            self.bandwidth.unregister(download_id)
+            await self._stop_ytdlp_process(download_id)
+            self._ytdlp_conns.pop(download_id, None)
+            parent_conn.close()
+
+        if "error" in result:
+            raise RuntimeError(result["error"])
+        if "filepath" not in result:
+            raise RuntimeError(f"yt-dlp worker exited with code {proc.exitcode}")
+        return result["filepath"]
+
+    def _apply_ytdlp_event(self, download_id: int, event: str, payload: dict, result: Dict[str, Any]) -> None:
+        if event == "progress":
+            downloaded = payload.get("downloaded", 0)
+            total = payload.get("total", 0)
+            progress = (downloaded / total) if total else 0.0
+            item = next((x for x in self.app.downloads if x.get("id") == download_id), None)
+            if item is not None:
+                item["downloaded_bytes"] = downloaded
+                if total:
+                    item["total_size"] = total
+            self.bandwidth.report(download_id, payload.get("speed", 0))
+            self.update_download_progress(download_id, progress, payload.get("speed", 0), payload.get("eta", 0), "Downloading")
+        elif event == "extracted":
+            title = payload.get("title")
+            item = next((x for x in self.app.downloads if x.get("id") == download_id), None)
+            if item is not None and title and not item.get("group_id"):
+                item["name"] = title
+            if payload.get("cached"):
+                logging.info(f"[TermoLoad] Download {download_id} resumed from cached extraction")
+        elif event == "finished":
+            self.update_download_progress(download_id, 1.0, 0, 0, "Processing")
+            logging.info(f"[TermoLoad] Download {download_id} finished, processing...")
+        elif event == "pp":
+            name = payload.get("name") or "Postprocessor"
+            finished = result.setdefault("pp_finished", set())
+            if payload.get("status") == "finished":
+                finished.add(name)
+            steps = max(result.get("pp_steps", 1), len(finished))
+            self._set_processing(download_id, f"{name} {len(finished)}/{steps}")
+        elif event == "done":
+            result["filepath"] = payload.get("filepath")
+        elif event == "error":
+            result["error"] = payload.get("message") or "yt-dlp failed"
+
+    def _set_processing(self, download_id: int, step: str) -> None:
+        """Show post-processing state; the ETA column carries the step (e.g. "Merger 1/2")."""
+        for item in self.app.downloads:
+            if item.get("id") == download_id:
+                item["status"] = "Processing"
+                item["speed"] = "0 B/s"
+                item["eta"] = step
+                break
+
+    async def _stop_ytdlp_process(self, download_id: int) -> None:
+        proc = self._ytdlp_procs.pop(download_id, None)
+        if proc is None:
+            return
+        if proc.is_alive():
+            logging.info(f"[TermoLoad] Terminating yt-dlp worker for download {download_id}")
+            self._signal_ytdlp_stop(download_id, proc)
+        await asyncio.to_thread(proc.join, 5)
+        if proc.is_alive():
+            if sys.platform == 'win32':
+                await asyncio.to_thread(_kill_process_tree, proc.pid)
+            else:
+                proc.kill()
+            await asyncio.to_thread(proc.join, 2)
+
+    def _signal_ytdlp_stop(self, download_id: int, proc) -> None:
+        if sys.platform != 'win32':
+            proc.terminate()
+            return
+        conn = self._ytdlp_conns.get(download_id)
+        try:
+            if conn is not None:
+                conn.send(("stop", {}))
+        except (OSError, ValueError):
+            pass
+
+    def stop_ytdlp(self, download_id: int, force: bool = False) -> None:
+        """Stop a running yt-dlp worker without waiting for it.
+
+        ``force`` (used on shutdown, when nothing waits for the worker to
+        wind down) kills it outright, ffmpeg children included.
+        """
+        proc = self._ytdlp_procs.get(download_id)
+        try:
+            if proc is None or not proc.is_alive():
+                return
+            if force and sys.platform == 'win32':
+                _kill_process_tree(proc.pid)
+            else:
+                self._signal_ytdlp_stop(download_id, proc)
+        except Exception:
+            logging.exception(f"[TermoLoad] Failed to stop yt-dlp worker {download_id}")
+
     async def close_session(self):
         if self.session:
             await self.session.close()
             self.session = None
     
     async def download_file(self,url:str,download_id:int,filename:str = None, custom_path: str = "downloads"):
+        """Download ``url``, retrying transient failures from the current offset.
+
+        Each failed attempt is classified (see ``_classify_failure``).
+        Transient and throttled failures are retried after a jittered
+        exponential backoff, or after Retry-After when the server sent one.
+        A run of failures without any new bytes gives up after
+        ``http_retries`` attempts, and permanent ones (most 4xx) fail at
+        once. The host's circuit breaker holds attempts back while that
+        origin keeps failing. Retries and time spent waiting are kept on the
+        record and end up in the history entry.
+
+        A download that would not fit on its disk (see ``DiskSpace``), or
+        that runs out of space mid-transfer, is paused with "disk_paused"
+        set instead of failing; the app resumes it once there is room.
+        """
+        host = HostProfiles.host_of(url)
+        d = next((x for x in self.app.downloads if x.get("id") == download_id), None)
+        attempts = 0
+        mark = int((d or {}).get("downloaded_bytes") or 0)
+        slot = False
+        # True only while this download holds the host's half-open probe
+        probe = False
+        try:
+            while True:
+                await self._acquire_slot(host, download_id)
+                slot = True
+                await self._settle_preflight(download_id)
+                if not self._admit_disk(download_id, custom_path):
+                    return False
+                probe = await self.breakers.acquire(host, on_wait=lambda wait: self._show_retry_wait(download_id, wait))
+                await self.scheduler.acquire_connection(host)
+                try:
+                    # A pre-flight probe may have found the server's own name for the file
+                    result = await self._download_file_attempt(url, download_id, (d or {}).get("filename") or filename,
+                                                               custom_path)
+                finally:
+                    self.scheduler.release_connection(host)
+                if not isinstance(result, dict):
+                    if probe and not result:
+                        self.breakers.release(host)
+                    return result
+                if result["kind"] == "disk":
+                    # Not the server's fault; the partial file stays for a resume
+                    if probe:
+                        self.breakers.release(host)
+                    self._park_for_disk(download_id, custom_path)
+                    return False
+                if result["kind"] == "permanent":
+                    if probe:
+                        self.breakers.release(host)
+                else:
+                    self.breakers.failure(host)
+                probe = False
+                done = int((d or {}).get("downloaded_bytes") or 0)
+                if done > mark:
+                    # New bytes since the last failure: the connection works, start the budget over.
+                    attempts, mark = 0, done
+                attempts += 1
+                limit = self._retry_limit()
+                if result["kind"] == "permanent" or attempts > limit:
+                    if attempts > limit:
+                        logging.error(f"[TermoLoad] download id={download_id}: giving up after {limit} retries ({result['error']})")
+                    self.update_download_progress(download_id, 0, 0, 0, f"Error:{result['error']}")
+                    try:
+                        self.app.save_downloads_state(force=True)
+                    except Exception:
+                        pass
+                    return False
+                delay = self._retry_delay(attempts, result["retry_after"])
+                if d is not None:
+                    d["retries"] = int(d.get("retries") or 0) + 1
+                    d["retry_wait"] = float(d.get("retry_wait") or 0.0) + delay
+                    d["retry_log"] = (d.get("retry_log") or [])[-19:] + [{
+                        "at": time.strftime("%Y-%m-%d %H:%M:%S"), "attempt": attempts, "kind": result["kind"],
+                        "error": result["error"], "delay": round(delay, 1)}]
+                logging.warning(f"[TermoLoad] download id={download_id}: {result['kind']} failure ({result['error']}); "
+                                f"retry {attempts}/{limit} in {delay:.1f}s from byte {done}")
+                # Waiting out a backoff does not hold a slot other hosts could use, or a bandwidth share
+                self.scheduler.release(host)
+                slot = False
+                self.bandwidth.unregister(download_id)
+                waited = 0.0
+                while waited < delay:
+                    self._show_retry_wait(download_id, delay - waited)
+                    step = min(1.0, delay - waited)
+                    await asyncio.sleep(step)
+                    waited += step
+        except asyncio.CancelledError:
+            # Paused while queued, waiting for a retry or for the host's circuit to close
+            if probe:
+                self.breakers.release(host)
+            try:
+                if d is not None:
+                    self.update_download_progress(download_id, float(d.get("progress") or 0.0), 0, 0, "Paused")
+                    self.app.save_downloads_state(force=True)
+            except Exception:
+                pass
+            return False
+        finally:
+            if slot:
+                self.scheduler.release(host)
+            self.bandwidth.unregister(download_id)
+            self.disk.reserved.pop(download_id, None)
+
+    async def _acquire_slot(self, host: str, download_id: int) -> None:
+        """Wait for a download slot on ``host``, showing the download as Queued meanwhile."""
+        settings = self._settings()
+        try:
+            self.scheduler.configure(self._limit_setting("concurrent", 3), settings.get("per_host_connections", 4),
+                                     settings.get("host_limits") or {})
+        except Exception:
+            logging.exception("[TermoLoad] Invalid connection limits in settings")
+        if self.scheduler.queued(host) or not self.scheduler.can_start(host):
+            d = next((x for x in self.app.downloads if x.get("id") == download_id), None)
+            if d is not None:
+                self.update_download_progress(download_id, float(d.get("progress") or 0.0), 0, 0, "Queued")
+                self.preflight(download_id, d.get("url") or "")
+            logging.info(f"[TermoLoad] download id={download_id} queued for {host} "
+                         f"({self.scheduler.active.get(host, 0)}/{self.scheduler.limit(host)} on this host, "
+                         f"{sum(self.scheduler.active.values())}/{self.scheduler.max_active} in total)")
+        await self.scheduler.acquire(host, key=lambda memo: self._queue_key(download_id, memo))
+
+    def preflight(self, download_id: int, url: str) -> None:
+        """Probe a queued HTTP download in the background, once per time it is queued.
+
+        "preflight_probes" bounds how many run at a time.
+        """
+        if download_id in self._preflight_tasks or not url.startswith(("http://", "https://")):
+            return
+        try:
+            limit = int(self._settings().get("preflight_probes", 4) or 0)
+        except (TypeError, ValueError):
+            limit = 4
+        if limit <= 0:
+            return
+        if self._preflight_slots is None or limit != self._preflight_limit:
+            # Probes already running finish under the old bound
+            self._preflight_slots = asyncio.Semaphore(limit)
+            self._preflight_limit = limit
+        try:
+            task = asyncio.get_running_loop().create_task(self._preflight(download_id, url))
+        except RuntimeError:
+            return
+        self._preflight_tasks[download_id] = task
+
+        def _done(t, key=download_id):
+            if self._preflight_tasks.get(key) is t:
+                del self._preflight_tasks[key]
+
+        task.add_done_callback(_done)
+
+    async def _preflight(self, download_id: int, url: str) -> None:
+        """``Range: bytes=0-0`` for a queued download, so its row and its plan are ready before its turn.
+
+        Fills in ``total_size`` and records range support in the host
+        profile. While nothing is on disk yet it also takes the validators
+        and the Content-Disposition file name. The connection goes back to
+        the pool and the DNS answer is cached, so the real request starts
+        warm. The probe holds a connection lease like any other request and
+        gives up quietly on errors; the download itself will see them.
+        """
+        host = HostProfiles.host_of(url)
+        while True:
+            d = next((x for x in self.app.downloads if x.get("id") == download_id), None)
+            if d is None or d.get("status") != "Queued":
+                return
+            async with self._preflight_slots:
+                if self.breakers.state(host) == "open":
+                    return
+                await self.start_session()
+                try:
+                    # A busy host is not worth a probe slot other hosts could use; come back later
+                    await asyncio.wait_for(self.scheduler.acquire_connection(host), timeout=10.0)
+                except asyncio.TimeoutError:
+                    leased = False
+                else:
+                    leased = True
+                if leased:
+                    self._preflight_busy.add(download_id)
+                    try:
+                        await self._preflight_request(d, url)
+                    except Exception as e:
+                        logging.debug(f"[TermoLoad] Pre-flight probe for id={download_id} failed: {e}")
+                    finally:
+                        self._preflight_busy.discard(download_id)
+                        self.scheduler.release_connection(host)
+                    return
+            await asyncio.sleep(5.0)
+
+    async def _preflight_request(self, d: dict, url: str) -> None:
+        aiohttp = get_aiohttp()
+        async with self.session.get(url, headers={"Range": "bytes=0-0"},
+                                    timeout=aiohttp.ClientTimeout(total=15, sock_connect=10)) as resp:
+            total = None
+            if resp.status == 206:
+                cr = resp.headers.get("Content-Range") or ""
+                if cr.rpartition("/")[2].strip().isdigit():
+                    total = int(cr.rpartition("/")[2])
+                await resp.read()  # the one byte; leaves the connection reusable
+            elif resp.status == 200:
+                total = int(resp.headers.get("Content-Length") or 0) or None
+                resp.close()
+            else:
+                logging.debug(f"[TermoLoad] Pre-flight probe for id={d.get('id')}: HTTP {resp.status}")
+                return
+            self.breakers.success(HostProfiles.host_of(url))
+            self._note_range_support(url, resp, True)
+            if d.get("status") != "Queued":
+                return
+            if not int(d.get("downloaded_bytes") or 0) and not d.get("filepath"):
+                # Nothing on disk to stay consistent with yet
+                self._record_validators(d["id"], resp)
+                self._adopt_server_filename(d, resp, Path(d.get("path") or "downloads"))
+            if total and not int(d.get("total_size") or 0):
+                d["total_size"] = total
+            logging.info(f"[TermoLoad] Pre-flight id={d.get('id')}: {total if total is not None else '?'} bytes, "
+                         f"ranges {'yes' if resp.status == 206 else 'no'}"
+                         + (f", file name {d['filename']!r}" if d.get("filename") else ""))
+
+    @staticmethod
+    def _adopt_server_filename(d: Optional[dict], response, download_dir: Path) -> Optional[str]:
+        """Name a download after its Content-Disposition header while nothing is on disk under another name.
+
+        Used by the pre-flight probe and by the first response of a download
+        that started at once, so the name never depends on whether it queued.
+        """
+        if d is None or d.get("filename") or int(d.get("downloaded_bytes") or 0) or d.get("filepath"):
+            return None
+        name = _content_disposition_filename(response.headers.get("Content-Disposition"))
+        if not name or (download_dir / name).exists():
+            return None
+        d["filename"] = name
+        d["name"] = name
+        return name
+
+    async def _settle_preflight(self, download_id: int) -> None:
+        """The download's turn came: drop a probe still waiting, give one in flight a moment to answer."""
+        task = self._preflight_tasks.get(download_id)
+        if task is None or task.done():
+            return
+        if download_id not in self._preflight_busy:
+            task.cancel()
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(task), timeout=3.0)
+        except asyncio.TimeoutError:
+            task.cancel()
+        except Exception:
+            pass
+
+    def _queue_key(self, download_id: int, memo: Optional[Dict[str, Any]] = None) -> tuple:
+        """(class rank, position in the downloads list): what decides which queued download starts first.
+
+        Pass the same ``memo`` dict when ranking many downloads at once; the
+        list is then scanned once for all of them.
+        """
+        keys = None if memo is None else memo.get("queue_keys")
+        if keys is None:
+            keys = {}
+            for pos, d in enumerate(self.app.downloads):
+                qos = d.get("qos") or "normal"
+                keys.setdefault(d.get("id"), (QOS_CLASSES.index(qos) if qos in QOS_CLASSES else 1, pos))
+            if memo is not None:
+                memo["queue_keys"] = keys
+        return keys.get(download_id, (1, len(self.app.downloads)))
+
+    def _disk_margin(self) -> int:
+        try:
+            return max(0, int(self._settings().get("disk_reserve_mb", 512) or 0)) * 1024 * 1024
+        except (TypeError, ValueError):
+            return 512 * 1024 * 1024
+
+    def _admit_disk(self, download_id: int, path: str) -> bool:
+        """Reserve room for the rest of the download under ``path``, or park it when that does not fit."""
+        d = next((x for x in self.app.downloads if x.get("id") == download_id), None) or {}
+        short = self.disk.shortfall(path, self.disk.remaining(d), self.app.downloads, exclude=download_id)
+        if short > 0:
+            self._park_for_disk(download_id, path, short)
+            return False
+        self.disk.reserved[download_id] = str(path)
+        return True
+
+    def _park_for_disk(self, download_id: int, path: str, short: Optional[int] = None) -> None:
+        free = self.disk.free(path)
+        logging.warning(f"[TermoLoad] download id={download_id}: not enough disk space in {path} "
+                        f"({free if free is not None else '?'} bytes free"
+                        + (f", {short} more needed" if short else "") + "); paused until there is room")
+        d = next((x for x in self.app.downloads if x.get("id") == download_id), None)
+        if d is None:
+            return
+        d["disk_paused"] = True
+        self.update_download_progress(download_id, float(d.get("progress") or 0.0), 0, 0, "Paused")
+        try:
+            self.app.save_downloads_state(force=True)
+        except Exception:
+            pass
+
+    def _settings(self) -> Dict[str, Any]:
+        # Callers that drive RealDownloader directly (scripts, tests) may not load settings
+        return getattr(self.app, "settings", None) or {}
+
+    def _limit_setting(self, key: str, default: int):
+        """A limit setting ("max_speed_kb", "concurrent"), overridden by the schedule window in force."""
+        value = (self.schedule_window or {}).get(key)
+        return self._settings().get(key, default) if value is None else value
+
+    def _speed_cap(self) -> float:
+        try:
+            return max(0.0, float(self._limit_setting("max_speed_kb", 0) or 0) * 1024)
+        except (TypeError, ValueError):
+            return 0.0
+
+    def _bandwidth_weight(self, download_id: int) -> float:
+        """A download's share weight: its own "weight" if set, else its queue class's."""
+        d = next((x for x in self.app.downloads if x.get("id") == download_id), None) or {}
+        if d.get("weight") is not None:
+            try:
+                return max(0.0, float(d["weight"]))
+            except (TypeError, ValueError):
+                pass
+        return QOS_WEIGHTS.get(d.get("qos") or "normal", QOS_WEIGHTS["normal"])
+
+    def _throttle(self, download_id: int):
+        """Per-chunk pacing for ``download_id`` at its current bandwidth share."""
+        bucket = self.bandwidth.register(download_id, lambda: self._bandwidth_weight(download_id))
+        return bucket.consume
+
+    def _retry_limit(self) -> int:
+        try:
+            return max(0, int(self._settings().get("http_retries", 8)))
+        except Exception:
+            return 8
+
+    @staticmethod
+    def _retry_delay(attempt: int, retry_after: Optional[float] = None, base: float = 1.0, cap: float = 120.0) -> float:
+        """Full-jitter exponential backoff; a server's Retry-After (up to an hour) wins when it is longer."""
+        delay = random.uniform(base / 2, min(cap, base * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, 3600.0) * random.uniform(1.0, 1.1))
+        return delay
+
+    def _show_retry_wait(self, download_id: int, seconds: float) -> None:
+        d = next((x for x in self.app.downloads if x.get("id") == download_id), None)
+        if d is not None:
+            self.update_download_progress(download_id, float(d.get("progress") or 0.0), 0, seconds, "Retrying")
+
+    def _attempt_failed(self, url: str, error: Any = None, status: Optional[int] = None, headers=None) -> Dict[str, Any]:
+        """Classify a failed attempt for ``download_file``; what it returns instead of setting an error status."""
+        kind, retry_after = _classify_failure(error, status, headers)
+        status = status if status is not None else getattr(error, "status", None)
+        if kind != "disk":
+            self.host_profiles.record_error(url, status)
+        if status is not None:
+            text = str(status)
+        elif isinstance(error, asyncio.TimeoutError):
+            text = "Stalled"
+        else:
+            text = str(error) or type(error).__name__
+        return {"kind": kind, "retry_after": retry_after, "status": status, "error": text}
+
+    async def _download_file_attempt(self, url: str, download_id: int, filename: str = None, custom_path: str = "downloads"):
+        """One go at ``url``: True/False when finished or paused, a failure dict from ``_attempt_failed`` otherwise."""
+        hasher = None
+        imap = None
         try:
-            # Lazy load aiofiles when needed
-            aiofiles = get_aiofiles()
-            
             logging.info(f"[TermoLoad] Starting download_file id={download_id} url={url} path={custom_path}")
             await self.start_session()
 
@@ -1239,6 +4924,8 @@ class RealDownloader:
             download_dir.mkdir(parents=True, exist_ok=True)
             filepath = download_dir / filename
 
+            expected = await self._expected_checksum(download_id, filename)
+
             # Determine if we can resume
             existing_size = 0
             if filepath.exists():
@@ -1246,13 +4933,64 @@ class RealDownloader:
                     existing_size = filepath.stat().st_size
                 except Exception:
                     existing_size = 0
+            d = next((x for x in self.app.downloads if x.get("id") == download_id), None)
+            revalidate = bool(d and d.pop("revalidate", False)) and existing_size > 0
+            if revalidate:
+                # Re-download of a completed file: ask the server whether it changed at all.
+                headers = self._conditional_headers(d, resume=False)
+            else:
+                if existing_size > 0 and self.host_profiles.get(url).get("range_support") is False:
+                    # Known not to honor Range: skip the 200/416 fallback chain and start over.
+                    logging.info(f"[TermoLoad] {urlparse(url).netloc} ignores Range; restarting {filename}")
+                    self._forget_partial(d, filepath)
+                    existing_size = 0
+                if existing_size > 0:
+                    # Partial files from before integrity maps have none and resume on size alone.
+                    imap = IntegrityMap.load(str(filepath))
+                    if d and d.get("pieces"):
+                        pieces = d["pieces"]
+                        if imap is None or not imap.use_pieces(pieces.get("algo"), int(pieces.get("length") or 0),
+                                                               pieces.get("hashes") or []):
+                            # No usable sidecar: the published piece hashes tell which pieces on disk are good.
+                            imap = self._piece_map(d, filepath)
+                            if imap:
+                                imap.hashes = list(imap.expected[:-(-existing_size // imap.block_size)])
+                    if imap:
+                        existing_size = await self._verify_and_repair(download_id, url, filepath, imap, existing_size)
+                else:
+                    IntegrityMap.discard(str(filepath))
 
-            headers = {}
-            if existing_size > 0:
-                headers["Range"] = f"bytes={existing_size}-"
+                headers = {}
+                if existing_size > 0:
+                    headers["Range"] = f"bytes={existing_size}-"
+                    headers.update(self._conditional_headers(d, resume=True))
 
-            async with self.session.get(url, headers=headers) as response:
+            async with self.session.get(url, headers=headers, timeout=self._request_timeout()) as response:
                 status = response.status
+                if status < 500 and status != 429:
+                    self.breakers.success(HostProfiles.host_of(url))
+                if status == 304 and revalidate:
+                    logging.info(f"[TermoLoad] {filename} unchanged on server (304); keeping existing file")
+                    if d is not None:
+                        d["filepath"] = str(filepath)
+                        d["total_size"] = existing_size
+                        d["downloaded_bytes"] = existing_size
+                    self._record_validators(download_id, response)
+                    self.update_download_progress(download_id, 1.0, 0, 0, "Completed")
+                    try:
+                        self.app.save_downloads_state(force=True)
+                    except Exception:
+                        pass
+                    return True
+                if status == 206 and self._validator_changed(d, response):
+                    # Server ignored If-Range but the file is different: never splice two versions.
+                    logging.warning(f"[TermoLoad] {filename} changed on server; restarting from scratch")
+                    self._forget_partial(d, filepath)
+                    imap = None
+                    return await self._download_file_attempt(url, download_id, filename, custom_path)
+                if status in (200, 206):
+                    self._record_validators(download_id, response)
+                    self._note_range_support(url, response, "Range" in headers)
                 if status == 206:
                     part_len = int(response.headers.get("content-length", 0))
                     total_size = None
@@ -1272,6 +5010,12 @@ class RealDownloader:
                     total_size = int(response.headers.get('content-length', 0)) or None
                     open_mode = 'wb'
                     downloaded = 0
+                    if not existing_size and self._adopt_server_filename(d, response, download_dir):
+                        filename = d["filename"]
+                        filepath = download_dir / filename
+                        logging.info(f"[TermoLoad] download id={download_id}: server names the file {filename!r}")
+                        if d.get("checksum"):
+                            expected = await self._expected_checksum(download_id, filename)
                     if existing_size > 0:
                         try:
                             filepath.unlink(missing_ok=True)
@@ -1298,317 +5042,619 @@ class RealDownloader:
                                     break
                         except Exception:
                             pass
-                        self.update_download_progress(download_id, 1.0, 0, 0, "Completed")
-                        try:
-                            self.app.save_downloads_state(force=True)
-                        except Exception:
-                            pass
-                        return True
+                        hasher = self._start_hasher(download_id, expected, filepath, total_len)
+                        return await self._finish_file_download(download_id, hasher, expected, filepath)
 
                     try:
                         if filepath.exists():
                             filepath.unlink(missing_ok=True)
                     except Exception:
                         pass
-                    async with self.session.get(url, headers={"Range": "bytes=0-"}) as r2:
-                        if r2.status == 200:
-                            total_size = int(r2.headers.get('content-length', 0)) or None
-                            open_mode = 'wb'
-                            downloaded = 0
-                            try:
-                                for d in self.app.downloads:
-                                    if d.get("id") == download_id:
-                                        d["filepath"] = str(filepath)
-                                        d["total_size"] = total_size if total_size is not None else 0
-                                        d["downloaded_bytes"] = downloaded
-                                        d["status"] = "Downloading"
-                                        break
-                            except Exception:
-                                pass
-
-                            start_time = time.time()
-                            chunk_size = 256 * 1024
-                            ema_speed = None
-                            ema_alpha = 0.2
-                            last_t = start_time
-                            bytes_window = 0
-                            async with aiofiles.open(filepath, open_mode) as file:
-                                idx = 0
-                                async for chunk in r2.content.iter_chunked(chunk_size):
-                                    if not chunk:
-                                        await asyncio.sleep(0)
-                                        continue
-                                    await file.write(chunk)
-                                    downloaded += len(chunk)
-                                    bytes_window += len(chunk)
-
-                                    progress = (downloaded / total_size) if (total_size and total_size > 0) else 0
-                                    now = time.time()
-                                    dt = now - last_t
-                                    inst_speed = (bytes_window / dt) if dt > 0 else 0
-                                    bytes_window = 0
-                                    last_t = now
-                                    if ema_speed is None:
-                                        ema_speed = inst_speed
-                                    else:
-                                        ema_speed = ema_alpha * inst_speed + (1 - ema_alpha) * ema_speed
-                                    speed = ema_speed or 0
-                                    eta = ((total_size - downloaded) / speed) if (total_size and speed > 0) else 0
-                                    try:
-                                        for d in self.app.downloads:
-                                            if d.get("id") == download_id:
-                                                d["downloaded_bytes"] = downloaded
-                                                if total_size:
-                                                    d["total_size"] = total_size
-                                                d["_smoothed_bps"] = speed
-                                                break
-                                    except Exception:
-                                        pass
-
-                                    self.update_download_progress(download_id, progress, speed, eta, "Downloading")
-                                    idx += 1
-                                    if (idx % 8) == 0:
-                                        await asyncio.sleep(0)
-
-                            if total_size and downloaded >= total_size:
-                                self.update_download_progress(download_id, 1.0, 0, 0, "Completed")
-                            else:
-                                self.update_download_progress(download_id, 1.0, 0, 0, "Completed")
-                            try:
-                                self.app.save_downloads_state(force=True)
-                            except Exception:
-                                pass
-                            return True
-                        elif r2.status == 206:
+                    imap = None
+                    async with self.session.get(url, headers={"Range": "bytes=0-"}, timeout=self._request_timeout()) as r2:
+                        if r2.status in (200, 206):
+                            self._record_validators(download_id, r2)
                             total_size = int(r2.headers.get('content-length', 0)) or None
-                            open_mode = 'wb'
-                            downloaded = 0
-                            try:
-                                for d in self.app.downloads:
-                                    if d.get("id") == download_id:
-                                        d["filepath"] = str(filepath)
-                                        d["total_size"] = total_size if total_size is not None else 0
-                                        d["downloaded_bytes"] = downloaded
-                                        d["status"] = "Downloading"
-                                        break
-                            except Exception:
-                                pass
-                            start_time = time.time()
-                            chunk_size = 256 * 1024
-                            ema_speed = None
-                            ema_alpha = 0.2
-                            last_t = start_time
-                            bytes_window = 0
-                            async with aiofiles.open(filepath, open_mode) as file:
-                                idx = 0
-                                async for chunk in r2.content.iter_chunked(chunk_size):
-                                    if not chunk:
-                                        await asyncio.sleep(0)
-                                        continue
-                                    await file.write(chunk)
-                                    downloaded += len(chunk)
-                                    bytes_window += len(chunk)
-                                    progress = (downloaded / total_size) if (total_size and total_size > 0) else 0
-                                    now = time.time()
-                                    dt = now - last_t
-                                    inst_speed = (bytes_window / dt) if dt > 0 else 0
-                                    bytes_window = 0
-                                    last_t = now
-                                    if ema_speed is None:
-                                        ema_speed = inst_speed
-                                    else:
-                                        ema_speed = ema_alpha * inst_speed + (1 - ema_alpha) * ema_speed
-                                    speed = ema_speed or 0
-                                    eta = ((total_size - downloaded) / speed) if (total_size and speed > 0) else 0
-                                    try:
-                                        for d in self.app.downloads:
-                                            if d.get("id") == download_id:
-                                                d["downloaded_bytes"] = downloaded
-                                                if total_size:
-                                                    d["total_size"] = total_size
-                                                d["_smoothed_bps"] = speed
-                                                break
-                                    except Exception:
-                                        pass
-                                    self.update_download_progress(download_id, progress, speed, eta, "Downloading")
-                                    idx += 1
-                                    if (idx % 8) == 0:
-                                        await asyncio.sleep(0)
-                            if total_size and downloaded >= total_size:
-                                self.update_download_progress(download_id, 1.0, 0, 0, "Completed")
-                            else:
-                                self.update_download_progress(download_id, 1.0, 0, 0, "Completed")
-                            try:
-                                self.app.save_downloads_state(force=True)
-                            except Exception:
-                                pass
-                            return True
+                            self._mark_file_started(download_id, filepath, total_size, 0)
+                            hasher = self._start_hasher(download_id, expected, filepath, 0)
+                            imap = self._piece_map(d, filepath, total_size) or IntegrityMap(str(filepath), total_size)
+                            await self._stream_to_file(download_id, r2, filepath, 'wb', 0, total_size, hasher, imap)
+                            hasher = await self._refetch_rejected(download_id, url, filepath, imap, hasher, expected)
+                            return await self._finish_file_download(download_id, hasher, expected, filepath)
                         else:
                             # Final fallback: plain GET without Range
-                            async with self.session.get(url) as r3:
+                            self.host_profiles.record_range_support(url, False)
+                            async with self.session.get(url, timeout=self._request_timeout()) as r3:
                                 if r3.status == 200:
+                                    self._record_validators(download_id, r3)
                                     total_size = int(r3.headers.get('content-length', 0)) or None
-                                    open_mode = 'wb'
-                                    downloaded = 0
-                                    try:
-                                        for d in self.app.downloads:
-                                            if d.get("id") == download_id:
-                                                d["filepath"] = str(filepath)
-                                                d["total_size"] = total_size if total_size is not None else 0
-                                                d["downloaded_bytes"] = downloaded
-                                                d["status"] = "Downloading"
-                                                break
-                                    except Exception:
-                                        pass
-                                    start_time = time.time()
-                                    chunk_size = 256 * 1024
-                                    ema_speed = None
-                                    ema_alpha = 0.2
-                                    last_t = start_time
-                                    bytes_window = 0
-                                    async with aiofiles.open(filepath, open_mode) as file:
-                                        idx = 0
-                                        async for chunk in r3.content.iter_chunked(chunk_size):
-                                            if not chunk:
-                                                await asyncio.sleep(0)
-                                                continue
-                                            await file.write(chunk)
-                                            downloaded += len(chunk)
-                                            bytes_window += len(chunk)
-                                            progress = (downloaded / total_size) if (total_size and total_size > 0) else 0
-                                            now = time.time()
-                                            dt = now - last_t
-                                            inst_speed = (bytes_window / dt) if dt > 0 else 0
-                                            bytes_window = 0
-                                            last_t = now
-                                            if ema_speed is None:
-                                                ema_speed = inst_speed
-                                            else:
-                                                ema_speed = ema_alpha * inst_speed + (1 - ema_alpha) * ema_speed
-                                            speed = ema_speed or 0
-                                            eta = ((total_size - downloaded) / speed) if (total_size and speed > 0) else 0
-                                            try:
-                                                for d in self.app.downloads:
-                                                    if d.get("id") == download_id:
-                                                        d["downloaded_bytes"] = downloaded
-                                                        if total_size:
-                                                            d["total_size"] = total_size
-                                                        d["_smoothed_bps"] = speed
-                                                        break
-                                            except Exception:
-                                                pass
-                                            self.update_download_progress(download_id, progress, speed, eta, "Downloading")
-                                            idx += 1
-                                            if (idx % 8) == 0:
-                                                await asyncio.sleep(0)
-                                    if total_size and downloaded >= total_size:
-                                        self.update_download_progress(download_id, 1.0, 0, 0, "Completed")
-                                    else:
-                                        self.update_download_progress(download_id, 1.0, 0, 0, "Completed")
-                                    try:
-                                        self.app.save_downloads_state(force=True)
-                                    except Exception:
-                                        pass
-                                    return True
+                                    self._mark_file_started(download_id, filepath, total_size, 0)
+                                    hasher = self._start_hasher(download_id, expected, filepath, 0)
+                                    imap = self._piece_map(d, filepath, total_size) or IntegrityMap(str(filepath), total_size)
+                                    await self._stream_to_file(download_id, r3, filepath, 'wb', 0, total_size, hasher, imap)
+                                    hasher = await self._refetch_rejected(download_id, url, filepath, imap, hasher, expected)
+                                    return await self._finish_file_download(download_id, hasher, expected, filepath)
                                 else:
-                                    self.update_download_progress(download_id, 0.0, 0, 0, f"Error:{r3.status}")
-                                    try:
-                                        self.app.save_downloads_state(force=True)
-                                    except Exception:
-                                        pass
-                                    return False
+                                    return self._attempt_failed(url, status=r3.status, headers=r3.headers)
+                else:
+                    return self._attempt_failed(url, status=status, headers=response.headers)
+                self._mark_file_started(download_id, filepath, total_size, downloaded)
+                # On a 206 the hasher re-reads the existing prefix while the rest streams in.
+                hasher = self._start_hasher(download_id, expected, filepath, downloaded)
+                if open_mode == 'wb':
+                    imap = self._piece_map(d, filepath, total_size) or IntegrityMap(str(filepath), total_size)
+                if imap:
+                    if total_size and not imap.total_size:
+                        imap.total_size = total_size
+                    imap.start_at(downloaded)
+                connections = self._plan_connections(url, total_size, downloaded, imap)
+                mirrors = self._http_mirrors(d, url)
+                if connections > 1 or (connections and mirrors):
+                    try:
+                        await self._download_segmented(download_id, url, response, filepath, downloaded,
+                                                       total_size, hasher, imap, connections, mirrors)
+                    except RangeNotSupported as e:
+                        logging.warning(f"[TermoLoad] {urlparse(url).netloc}: {e}; falling back to one connection")
+                        self.host_profiles.record_range_support(url, False)
+                        if hasher:
+                            hasher.close()
+                        hasher = None
+                        imap = None
+                        self._forget_partial(d, filepath)
+                        return await self._download_file_attempt(url, download_id, filename, custom_path)
+                else:
+                    started = time.monotonic()
+                    done = await self._stream_to_file(download_id, response, filepath, open_mode, downloaded, total_size, hasher, imap)
+                    self.host_profiles.record_transfer(url, done - downloaded, time.monotonic() - started, 1)
+                    hasher = await self._refetch_rejected(download_id, url, filepath, imap, hasher, expected)
+                return await self._finish_file_download(download_id, hasher, expected, filepath)
+        except asyncio.CancelledError:
+            if hasher:
+                hasher.close()
+            if imap:
+                imap.wait_pending()
+            try:
+                d = next((x for x in self.app.downloads if x.get("id") == download_id), None)
+                if d:
+                    total = int(d.get("total_size") or 0)
+                    done = int(d.get("downloaded_bytes") or 0)
+                    progress = (done / total) if total else d.get("progress", 0.0)
+                    self.update_download_progress(download_id, progress, 0, 0, "Paused")
+                    self.app.save_downloads_state(force=True)
+            except Exception:
+                pass
+            return False
+        except Exception as e:
+            if hasher:
+                hasher.close()
+            if imap:
+                imap.wait_pending()
+            if isinstance(e, asyncio.TimeoutError):
+                logging.warning(f"[TermoLoad] download id={download_id} stalled (no data for {self._stall_timeout():.0f}s)")
+            else:
+                logging.exception(f"[TermoLoad] download_file exception id={download_id}: {e}")
+            return self._attempt_failed(url, error=e)
+
+    def _note_range_support(self, url: str, response, sent_range: bool) -> None:
+        accept = (response.headers.get("Accept-Ranges") or "").strip().lower()
+        if response.status == 206:
+            self.host_profiles.record_range_support(url, True)
+        elif sent_range or accept == "none":
+            self.host_profiles.record_range_support(url, False)
+        elif accept == "bytes":
+            self.host_profiles.record_range_support(url, True)
+
+    def _http_connection_cap(self) -> int:
+        try:
+            return max(1, int(self._settings().get("http_connections", 4) or 1))
+        except Exception:
+            return 4
+
+    def _stall_timeout(self) -> float:
+        try:
+            return max(2.0, float(self._settings().get("stall_timeout", 20) or 20))
+        except Exception:
+            return 20.0
+
+    def _request_timeout(self):
+        """No overall limit for a transfer; a read that gets nothing for the stall window fails instead."""
+        aiohttp = get_aiohttp()
+        return aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=self._stall_timeout())
+
+    def _plan_connections(self, url: str, total_size: Optional[int], downloaded: int,
+                          imap: Optional[IntegrityMap]) -> int:
+        """Range connections to the primary URL for the rest of this file.
+
+        0 means the file is streamed on the one response already open; 1
+        means only that response when the host does not honor Range (mirrors
+        can still take ranges next to it).
+        """
+        if not imap or not total_size or imap.total_size != total_size:
+            return 0
+        remaining = total_size - downloaded
+        if remaining < SEGMENTED_MIN_BYTES:
+            return 0
+        if self.host_profiles.get(url).get("range_support") is not True:
+            return 1
+        n = self.host_profiles.choose_segments(url, self._http_connection_cap())
+        return max(1, min(n, remaining // imap.block_size))
+
+    @staticmethod
+    def _http_mirrors(d: Optional[dict], url: str) -> List[str]:
+        if not d or d.get("type") not in (None, "URL"):
+            return []
+        return [m for m in (d.get("mirrors") or []) if str(m).startswith(("http://", "https://")) and m != url]
+
+    async def _race_mirrors(self, urls: List[str], total_size: int, probe_bytes: int = 1024 * 1024,
+                            window: float = 1.5, timeout: float = 10.0):
+        """Race every mirror on the first ``probe_bytes``; yields usable ones as their probes finish.
+
+        A mirror is usable when it answers the Range with 206 for a file of
+        ``total_size`` bytes. Bandwidth is measured over at most ``window``
+        seconds of body, so a slow mirror is ranked without holding up the
+        others.
+        """
+        aiohttp = get_aiohttp()
+
+        async def probe(url: str) -> Optional[Dict[str, Any]]:
+            host = HostProfiles.host_of(url)
+            await self.scheduler.acquire_connection(host)
+            started = time.monotonic()
+            try:
+                async with self.session.get(url, headers={"Range": f"bytes=0-{probe_bytes - 1}"},
+                                            timeout=aiohttp.ClientTimeout(total=timeout)) as resp:
+                    latency = time.monotonic() - started
+                    RangeDownloader._check(resp, 0, total_size)
+                    body_started = time.monotonic()
+                    got = 0
+                    async for chunk in resp.content.iter_chunked(64 * 1024):
+                        got += len(chunk)
+                        if time.monotonic() - body_started >= window:
+                            resp.close()
+                            break
+                    bps = got / max(time.monotonic() - body_started, 1e-3)
+            except Exception as e:
+                logging.warning(f"[TermoLoad] Mirror {urlparse(url).netloc} not used: {e}")
+                if isinstance(e, RangeNotSupported):
+                    self.host_profiles.record_range_support(url, False)
+                else:
+                    self.host_profiles.record_error(url, getattr(e, "status", None))
+                return None
+            finally:
+                self.scheduler.release_connection(host)
+            self.host_profiles.record_range_support(url, True)
+            logging.info(f"[TermoLoad] Mirror {urlparse(url).netloc}: {latency * 1000:.0f} ms, {self.format_speed(bps)}")
+            return {"url": url, "latency": latency, "bps": bps}
+
+        for fut in asyncio.as_completed([probe(u) for u in urls]):
+            result = await fut
+            if result:
+                yield result
+
+    async def _download_segmented(self, download_id: int, url: str, response, filepath: Path, downloaded: int,
+                                  total_size: int, hasher: Optional["StreamingHasher"], imap: IntegrityMap,
+                                  connections: int, mirrors: Optional[List[str]] = None) -> int:
+        """Fetch the rest of ``filepath`` over ``connections`` Range requests; ``response`` serves the first range.
+
+        ``mirrors`` are raced while the primary already streams, and the ones
+        that answer join the same download with connections in proportion to
+        their probed bandwidth.
+        """
+        d = next((x for x in self.app.downloads if x.get("id") == download_id), None)
+        connections = min(connections, self.scheduler.limit(HostProfiles.host_of(url)))
+        logging.info(f"[TermoLoad] Segmented download id={download_id}: {connections} connections from {urlparse(url).netloc}"
+                     + (f" + {len(mirrors)} mirror(s)" if mirrors else ""))
+        started = time.monotonic()
+        ema = {"speed": None, "t": started, "bytes": 0}
+        hashed = {"upto": downloaded}
+
+        def progress(fetched: int) -> None:
+            now = time.monotonic()
+            dt = now - ema["t"]
+            if dt < 0.1:
+                return
+            inst = (fetched - ema["bytes"]) / dt
+            ema["speed"] = inst if ema["speed"] is None else 0.2 * inst + 0.8 * ema["speed"]
+            ema["t"], ema["bytes"] = now, fetched
+            done = downloaded + fetched
+            speed = ema["speed"] or 0
+            eta = ((total_size - done) / speed) if speed > 0 else 0
+            if d is not None:
+                d["downloaded_bytes"] = done
+                d["_smoothed_bps"] = speed
+                if hasher:
+                    d["hash_rate"] = hasher.rate
+                if len(engine.sources) > 1:
+                    d["source_count"] = sum(1 for src in engine.sources if not src["dead"] and src["bytes"])
+            imap.save()
+            self.update_download_progress(download_id, done / total_size, speed, eta, "Downloading")
+
+        def on_contiguous(offset: int) -> None:
+            if hasher and offset > hashed["upto"]:
+                hasher.extend(offset - hashed["upto"])
+                hashed["upto"] = offset
+
+        engine = RangeDownloader(self.session, url, imap, connections,
+                                 headers=self._conditional_headers(d, resume=True),
+                                 progress=progress, on_contiguous=on_contiguous, pieces=4 if mirrors else 1,
+                                 range_requests=self.host_profiles.get(url).get("range_support") is True,
+                                 stall_timeout=self._stall_timeout(), scheduler=self.scheduler,
+                                 throttle=self._throttle(download_id))
+
+        async def join_mirrors() -> None:
+            cap = self._http_connection_cap()
+            fastest = 1.0
+            async for r in self._race_mirrors(mirrors, total_size):
+                # Connections in proportion to bandwidth, against the fastest source seen so far
+                fastest = max(fastest, r["bps"], *(engine.source_rate(src) for src in engine.sources))
+                share = max(1, round(cap * r["bps"] / fastest))
+                share = min(share, self.host_profiles.choose_segments(r["url"], cap),
+                            self.scheduler.limit(HostProfiles.host_of(r["url"])))
+                engine.add_source(r["url"], share, rate_hint=r["bps"])
+
+        joiner = asyncio.create_task(join_mirrors()) if mirrors else None
+        try:
+            await engine.run(str(filepath), response, downloaded)
+        finally:
+            if joiner:
+                joiner.cancel()
+            for status in engine.errors:
+                self.host_profiles.record_error(url, status)
+            if d is not None:
+                d.pop("source_count", None)
+        await imap.close(total_size)
+        if d is not None:
+            d["downloaded_bytes"] = total_size
+        now = time.monotonic()
+        for src in engine.sources:
+            if src["bytes"] and src["started"]:
+                self.host_profiles.record_transfer(src["url"], src["bytes"], now - src["started"], src["connections"])
+        if engine.splits or engine.stalls:
+            logging.info(f"[TermoLoad] Segmented download id={download_id}: {engine.splits} range split(s), "
+                         f"{engine.stalls} stalled connection(s) restarted")
+        if len(engine.sources) > 1:
+            received = max(sum(src["bytes"] for src in engine.sources), 1)
+            logging.info("[TermoLoad] Sources for id=%s: %s" % (download_id, ", ".join(
+                f"{urlparse(src['url']).netloc}={src['bytes'] * 100 // received}%" for src in engine.sources)))
+        return total_size
+
+    @staticmethod
+    def _conditional_headers(d: Optional[dict], resume: bool) -> Dict[str, str]:
+        """Validator headers for a download record.
+
+        ``resume`` gives ``If-Range`` (strong ETag, else Last-Modified) so a
+        changed file comes back whole as 200; otherwise ``If-None-Match`` /
+        ``If-Modified-Since`` so an unchanged file comes back as an empty 304.
+        """
+        if not d:
+            return {}
+        etag = d.get("etag")
+        last_modified = d.get("last_modified")
+        headers = {}
+        if resume:
+            if etag and not etag.startswith("W/"):
+                headers["If-Range"] = etag
+            elif last_modified:
+                headers["If-Range"] = last_modified
+        else:
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def _record_validators(self, download_id: int, response) -> None:
+        try:
+            for d in self.app.downloads:
+                if d.get("id") == download_id:
+                    etag = response.headers.get("ETag")
+                    last_modified = response.headers.get("Last-Modified")
+                    if etag or last_modified:
+                        d["etag"] = etag
+                        d["last_modified"] = last_modified
+                    break
+        except Exception:
+            pass
+
+    @staticmethod
+    def _validator_changed(d: Optional[dict], response) -> bool:
+        if not d:
+            return False
+        etag = response.headers.get("ETag")
+        if d.get("etag") and etag:
+            return etag != d.get("etag")
+        last_modified = response.headers.get("Last-Modified")
+        if d.get("last_modified") and last_modified:
+            return last_modified != d.get("last_modified")
+        return False
+
+    def _forget_partial(self, d: Optional[dict], filepath: Path) -> None:
+        try:
+            filepath.unlink(missing_ok=True)
+        except Exception:
+            pass
+        IntegrityMap.discard(str(filepath))
+        if d is not None:
+            d.pop("etag", None)
+            d.pop("last_modified", None)
+            d["downloaded_bytes"] = 0
+
+    @staticmethod
+    def _piece_map(d: Optional[dict], filepath: Path, total_size: Optional[int] = None) -> Optional[IntegrityMap]:
+        """Integrity map over the piece hashes a metalink published for this record, if they fit the file."""
+        pieces = (d or {}).get("pieces")
+        total = int(total_size or (d or {}).get("total_size") or 0)
+        length = int((pieces or {}).get("length") or 0)
+        if not pieces or not total or length <= 0:
+            return None
+        imap = IntegrityMap(str(filepath), total, length, pieces.get("algo") or "sha1")
+        if not imap.use_pieces(imap.algo, length, pieces.get("hashes") or []):
+            logging.warning(f"[TermoLoad] Piece hashes for {filepath.name} do not fit a {total}-byte file; not using them")
+            return None
+        return imap
+
+    async def _refetch_rejected(self, download_id: int, url: str, filepath: Path, imap: Optional[IntegrityMap],
+                                hasher: Optional["StreamingHasher"], expected: Optional[tuple],
+                                rounds: int = 3) -> Optional["StreamingHasher"]:
+        """Fetch pieces that failed their published hash again after a single-stream transfer.
+
+        The running checksum saw the bad bytes, so it is restarted over the
+        repaired file; returns the hasher to finish with.
+        """
+        if not imap or not imap.rejected:
+            return hasher
+        for attempt in range(rounds):
+            bad = sorted(imap.rejected)
+            if not bad:
+                break
+            logging.warning(f"[TermoLoad] {len(bad)} piece(s) of {filepath.name} failed verification; "
+                            f"fetching them again ({attempt + 1}/{rounds})")
+            await self._repair_blocks(download_id, url, filepath, imap, {i: None for i in bad})
+        imap.save(force=True)
+        if imap.rejected:
+            raise IOError(f"{len(imap.rejected)} piece(s) failed verification {rounds} times (first: {min(imap.rejected)})")
+        if hasher:
+            hasher.close()
+            hasher = self._start_hasher(download_id, expected, filepath, imap.total_size)
+        return hasher
+
+    async def _verify_and_repair(self, download_id: int, url: str, filepath: Path,
+                                 imap: IntegrityMap, existing_size: int) -> int:
+        """Check a partial file against its integrity map; returns the offset to resume from.
+
+        Bad or unrecorded blocks in front of the last good one are fetched
+        again by Range and written in place. The file is cut back to the end
+        of the verified run, so only the missing tail is streamed after that.
+        """
+        progress = (existing_size / imap.total_size) if imap.total_size else 0.0
+        self.update_download_progress(download_id, min(progress, 1.0), 0, 0, "Verifying")
+        started = time.monotonic()
+        bad = await imap.verify()
+        good = [i for i, h in enumerate(imap.hashes) if h]
+        resume_block = (good[-1] + 1) if good else 0
+        holes = {i: bad.get(i) for i in range(resume_block) if not imap.hashes[i]}
+        if holes:
+            logging.warning(f"[TermoLoad] Integrity id={download_id}: re-fetching {len(holes)} block(s) of {filepath.name} "
+                            f"({sum(1 for i in holes if i in bad)} damaged, the rest never finished)")
+            failed = await self._repair_blocks(download_id, url, filepath, imap, holes)
+            if failed:
+                resume_block = min(failed)
+                del imap.hashes[resume_block:]
+        offset = min(imap.block_range(resume_block - 1)[1] if resume_block else 0, existing_size)
+        try:
+            if offset < existing_size:
+                os.truncate(filepath, offset)
+        except Exception:
+            logging.exception(f"[TermoLoad] Could not truncate {filepath}")
+            offset = 0
+            imap.hashes = []
+            IntegrityMap.discard(str(filepath))
+            filepath.unlink(missing_ok=True)
+        imap.save(force=True)
+        logging.info(f"[TermoLoad] Integrity id={download_id}: {len(good)} block(s) ok, {len(bad)} bad, "
+                     f"resuming at {offset}/{existing_size} ({time.monotonic() - started:.2f}s)")
+        return offset
+
+    async def _repair_blocks(self, download_id: int, url: str, filepath: Path, imap: IntegrityMap,
+                             blocks: Dict[int, Optional[str]]) -> List[int]:
+        """Re-fetch ``blocks`` (index -> previous digest) by Range; returns the ones that could not be fixed.
+
+        A re-fetched block that no longer matches its old digest means the
+        remote file changed, so it is left for the caller to truncate at.
+        """
+        sem = asyncio.Semaphore(4)
+        d = next((x for x in self.app.downloads if x.get("id") == download_id), None)
+        validators = self._conditional_headers(d, resume=True)
+        fd = os.open(str(filepath), os.O_WRONLY | getattr(os, "O_BINARY", 0))
+
+        async def repair(index: int, want: Optional[str]) -> Optional[int]:
+            start, end = imap.block_range(index)
+            try:
+                async with sem:
+                    async with self.session.get(url, headers={"Range": f"bytes={start}-{end - 1}", **validators},
+                                                timeout=self._request_timeout()) as resp:
+                        if resp.status != 206:
+                            return index
+                        data = await resp.read()
+                if len(data) != end - start:
+                    return index
+                digest = await asyncio.to_thread(_block_digest, [data], imap.algo)
+                if want and digest != want:
+                    return index
+                await asyncio.to_thread(_pwrite, fd, data, start)
+                return None if imap._set(index, digest) else index
+            except Exception as e:
+                logging.warning(f"[TermoLoad] Repair of block {index} in {filepath.name} failed: {e}")
+                return index
+
+        try:
+            results = await asyncio.gather(*(repair(i, w) for i, w in blocks.items()))
+        finally:
+            os.close(fd)
+        return [i for i in results if i is not None]
+
+    def _mark_file_started(self, download_id: int, filepath: Path, total_size: Optional[int], downloaded: int) -> None:
+        try:
+            for d in self.app.downloads:
+                if d.get("id") == download_id:
+                    d["filepath"] = str(filepath)
+                    d["total_size"] = total_size if total_size is not None else 0
+                    d["downloaded_bytes"] = downloaded
+                    d["status"] = "Downloading"
+                    break
+        except Exception:
+            pass
+
+    async def _stream_to_file(self, download_id: int, response, filepath: Path, open_mode: str,
+                              downloaded: int, total_size: Optional[int],
+                              hasher: Optional["StreamingHasher"] = None,
+                              imap: Optional[IntegrityMap] = None) -> int:
+        """Write a response body to ``filepath``, reporting progress; returns the final byte count.
+
+        Written chunks are also handed to ``hasher`` so the checksum is ready
+        as soon as the last byte lands, and to ``imap`` whose sidecar is
+        rewritten about once a second after the file is flushed.
+        """
+        aiofiles = get_aiofiles()
+        start_time = time.time()
+        chunk_size = 256 * 1024  # 256KB for throughput
+        ema_speed = None
+        ema_alpha = 0.2
+        last_t = start_time
+        bytes_window = 0
+        throttle = self._throttle(download_id)
+        async with aiofiles.open(filepath, open_mode) as file:
+            idx = 0
+            async for chunk in response.content.iter_chunked(chunk_size):
+                if not chunk:
+                    await asyncio.sleep(0)
+                    continue
+                await file.write(chunk)
+                await throttle(len(chunk))
+                if hasher:
+                    await hasher.feed(chunk)
+                if imap:
+                    imap.feed(chunk)
+                    if time.monotonic() - imap._last_save >= 1.0:
+                        await file.flush()
+                        imap.save()
+                downloaded += len(chunk)
+                bytes_window += len(chunk)
+
+                # progress
+                progress = (downloaded / total_size) if (total_size and total_size > 0) else 0
+                now = time.time()
+                dt = now - last_t
+                inst_speed = (bytes_window / dt) if dt > 0 else 0
+                bytes_window = 0
+                last_t = now
+                if ema_speed is None:
+                    ema_speed = inst_speed
                 else:
-                    self.update_download_progress(download_id, 0.0, 0, 0, f"Error:{status}")
-                    try:
-                        self.app.save_downloads_state(force=True)
-                    except Exception:
-                        pass
-                    return False
+                    ema_speed = ema_alpha * inst_speed + (1 - ema_alpha) * ema_speed
+                speed = ema_speed or 0
+                eta = ((total_size - downloaded) / speed) if (total_size and speed > 0) else 0
                 try:
                     for d in self.app.downloads:
                         if d.get("id") == download_id:
-                            d["filepath"] = str(filepath)
-                            d["total_size"] = total_size if total_size is not None else 0
                             d["downloaded_bytes"] = downloaded
-                            d["status"] = "Downloading"
+                            if total_size:
+                                d["total_size"] = total_size
+                            d["_smoothed_bps"] = speed
+                            if hasher:
+                                d["hash_rate"] = hasher.rate
                             break
                 except Exception:
                     pass
 
-                start_time = time.time()
-                chunk_size = 256 * 1024  # 256KB for throughput
-                ema_speed = None
-                ema_alpha = 0.2
-                last_t = start_time
-                bytes_window = 0
-                async with aiofiles.open(filepath, open_mode) as file:
-                    idx = 0
-                    async for chunk in response.content.iter_chunked(chunk_size):
-                        if not chunk:
-                            await asyncio.sleep(0)
-                            continue
-                        await file.write(chunk)
-                        downloaded += len(chunk)
-                        bytes_window += len(chunk)
-
-                        # progress
-                        progress = (downloaded / total_size) if (total_size and total_size > 0) else 0
-                        now = time.time()
-                        dt = now - last_t
-                        inst_speed = (bytes_window / dt) if dt > 0 else 0
-                        bytes_window = 0
-                        last_t = now
-                        if ema_speed is None:
-                            ema_speed = inst_speed
-                        else:
-                            ema_speed = ema_alpha * inst_speed + (1 - ema_alpha) * ema_speed
-                        speed = ema_speed or 0
-                        eta = ((total_size - downloaded) / speed) if (total_size and speed > 0) else 0
-                        try:
-                            for d in self.app.downloads:
-                                if d.get("id") == download_id:
-                                    d["downloaded_bytes"] = downloaded
-                                    if total_size:
-                                        d["total_size"] = total_size
-                                    d["_smoothed_bps"] = speed
-                                    break
-                        except Exception:
-                            pass
-
-                        self.update_download_progress(download_id, progress, speed, eta, "Downloading")
-                        idx += 1
-                        if (idx % 8) == 0:
-                            await asyncio.sleep(0)
-
-                if total_size and downloaded >= total_size:
-                    self.update_download_progress(download_id, 1.0, 0, 0, "Completed")
-                else:
-                    self.update_download_progress(download_id, 1.0, 0, 0, "Completed")
-                try:
-                    self.app.save_downloads_state(force=True)
-                except Exception:
-                    pass
-                return True
-        except asyncio.CancelledError:
+                self.update_download_progress(download_id, progress, speed, eta, "Downloading")
+                idx += 1
+                if (idx % 8) == 0:
+                    await asyncio.sleep(0)
+        if imap:
+            await imap.close(downloaded)
+        return downloaded
+
+    async def _finish_file_download(self, download_id: int, hasher: Optional["StreamingHasher"],
+                                    expected: Optional[tuple], filepath: Optional[Path] = None) -> bool:
+        """Mark a finished transfer Completed, or Error:Checksum when the digest disagrees."""
+        ok = True
+        if hasher and expected:
+            d = next((x for x in self.app.downloads if x.get("id") == download_id), None)
+            self.update_download_progress(download_id, 1.0, 0, 0, "Verifying")
             try:
-                d = next((x for x in self.app.downloads if x.get("id") == download_id), None)
-                if d:
-                    total = int(d.get("total_size") or 0)
-                    done = int(d.get("downloaded_bytes") or 0)
-                    progress = (done / total) if total else d.get("progress", 0.0)
-                    self.update_download_progress(download_id, progress, 0, 0, "Paused")
-                    self.app.save_downloads_state(force=True)
-            except Exception:
-                pass
-            return False
-        except Exception as e:
-            logging.exception(f"[TermoLoad] download_file exception id={download_id}: {e}")
-            self.update_download_progress(download_id, 0, 0, 0, f"Error:{str(e)}")
+                digest = await hasher.finish()
+            except Exception as e:
+                logging.error(f"[TermoLoad] checksum id={download_id}: could not hash file: {e}")
+                digest = None
+            ok = digest == expected[1]
+            if d is not None:
+                d["checksum_state"] = "verified" if ok else "mismatch"
+                d["hash_rate"] = hasher.rate
+            logging.info(f"[TermoLoad] checksum id={download_id} {expected[0]} "
+                         f"{'verified' if ok else f'MISMATCH got={digest} want={expected[1]}'}")
+        if ok and filepath is not None:
+            IntegrityMap.discard(str(filepath))
+        self.update_download_progress(download_id, 1.0, 0, 0, "Completed" if ok else "Error:Checksum")
+        try:
+            self.app.save_downloads_state(force=True)
+        except Exception:
+            pass
+        return ok
+
+    def _start_hasher(self, download_id: int, expected: Optional[tuple], filepath: Path,
+                      prefix: int) -> Optional["StreamingHasher"]:
+        if not expected:
+            return None
+        d = next((x for x in self.app.downloads if x.get("id") == download_id), None)
+        if d is not None:
+            d["checksum_state"] = "hashing"
+            d["hash_rate"] = 0.0
+        return StreamingHasher(expected[0], str(filepath), prefix)
+
+    async def _expected_checksum(self, download_id: int, filename: str) -> Optional[tuple]:
+        """``(algorithm, hexdigest)`` for the download's checksum field, fetching a sums file if needed."""
+        d = next((x for x in self.app.downloads if x.get("id") == download_id), None)
+        if not d or not d.get("checksum"):
+            return None
+        parsed = _parse_checksum_spec(d.get("checksum"))
+        if parsed and parsed[0] == "url":
             try:
-                self.app.save_downloads_state(force=True)
-            except Exception:
-                pass
-            return False
+                async with self.session.get(parsed[1]) as resp:
+                    if resp.status != 200:
+                        raise IOError(f"HTTP {resp.status}")
+                    text = await resp.text(errors="replace")
+                parsed = _find_in_sums_file(text, filename, parsed[1])
+                if not parsed:
+                    logging.warning(f"[TermoLoad] checksum id={download_id}: {filename} not listed in {d.get('checksum')}")
+            except Exception as e:
+                logging.warning(f"[TermoLoad] checksum id={download_id}: could not fetch {d.get('checksum')}: {e}")
+                parsed = None
+        if not parsed:
+            d["checksum_state"] = "unavailable"
+            return None
+        d["checksum_algo"] = parsed[0]
+        return parsed
+
+    async def read_metalink(self, source: str) -> List[Dict[str, Any]]:
+        """Files listed by a metalink URL or local ``.meta4``/``.metalink`` file, parsed as the bytes arrive."""
+        reader = MetalinkReader(source if source.startswith(("http://", "https://")) else "")
+        if source.startswith(("http://", "https://")):
+            await self.start_session()
+            async with self.session.get(source, timeout=self._request_timeout()) as resp:
+                if resp.status != 200:
+                    raise IOError(f"HTTP {resp.status} for {source}")
+                async for chunk in resp.content.iter_chunked(64 * 1024):
+                    reader.feed(chunk)
+        else:
+            def _read() -> None:
+                with open(source, "rb") as f:
+                    for chunk in iter(lambda: f.read(64 * 1024), b""):
+                        reader.feed(chunk)
+            await asyncio.to_thread(_read)
+        files = reader.close()
+        logging.info(f"[TermoLoad] Metalink {source}: {len(files)} file(s)")
+        return files
     def update_download_progress(self,download_id:int,progress:float,speed:float,eta:float,status:str):
         for i, download in enumerate(self.app.downloads):
             if download["id"] == download_id:
@@ -1664,6 +5710,74 @@ class RealDownloader:
         else:
             return f"{int(seconds//3600)}h {int((seconds%3600)//60)}m"
         
+    @staticmethod
+    def is_playlist_url(url: str) -> bool:
+        """True for playlist and channel URLs that should expand into one job per video.
+
+        Like yt-dlp's ``noplaylist``, a URL naming one video inside a playlist
+        (``watch?v=ID&list=...``, ``youtu.be/ID?list=...``) stays that video.
+        """
+        from urllib.parse import parse_qs
+        try:
+            parsed = urlparse(url)
+            path = parsed.path.lower()
+            if path.startswith(("/playlist", "/channel/", "/c/", "/user/", "/@")):
+                return True
+            query = parse_qs(parsed.query)
+            if not query.get("list"):
+                return False
+            names_video = (bool(query.get("v")) or path.startswith(("/watch", "/shorts/"))
+                           or (parsed.netloc.lower().endswith("youtu.be") and path.strip("/") != ""))
+            return not names_video
+        except Exception:
+            return False
+
+    async def expand_playlist(self, url: str) -> Optional[dict]:
+        """Flat-extract a playlist or channel into its video entries.
+
+        Only the listing is fetched, no formats are resolved. Channel tabs
+        (Videos, Shorts, ...) are playlists themselves and are expanded one
+        level further. Returns ``{"title", "entries": [{"url", "title"}]}``,
+        or None when the URL turns out to be a single video.
+        """
+        if ytdlp is None:
+            return None
+
+        def _extract(target: str):
+            opts = {"extract_flat": "in_playlist", "quiet": True, "no_warnings": True, "skip_download": True}
+            with ytdlp.YoutubeDL(opts) as ydl:
+                return ydl.extract_info(target, download=False)
+
+        info = await asyncio.to_thread(_extract, url)
+        if not info or info.get("_type") != "playlist":
+            return None
+
+        entries: List[dict] = []
+        seen = set()
+
+        async def _collect(listing: dict, depth: int) -> None:
+            for e in listing.get("entries") or []:
+                if not e:
+                    continue
+                target = e.get("url") or e.get("webpage_url")
+                if not target or target in seen:
+                    continue
+                seen.add(target)
+                if e.get("_type") == "playlist" or (e.get("ie_key") == "YoutubeTab" and depth == 0):
+                    try:
+                        sub = await asyncio.to_thread(_extract, target)
+                    except Exception as ex:
+                        logging.warning(f"[TermoLoad] Could not expand {target}: {ex}")
+                        continue
+                    if sub and depth == 0:
+                        await _collect(sub, depth + 1)
+                    continue
+                entries.append({"url": target, "title": e.get("title") or target})
+
+        await _collect(info, 0)
+        logging.info(f"[TermoLoad] Expanded {url} into {len(entries)} videos")
+        return {"title": info.get("title") or url, "entries": entries}
+
     @staticmethod
     def is_video_url(url: str) -> bool:
         try:
@@ -1710,6 +5824,63 @@ class RealDownloader:
         except Exception:
             return None
     
+    def _attach_web_seeds(self, download_id: int, handle, mirrors: Optional[List[str]] = None) -> List[str]:
+        """Attach HTTP mirrors as web seeds and record every web seed on the download.
+
+        Seeds from the metainfo ``url-list`` (or a magnet's ``ws=``) are already
+        known to the handle; user mirrors are added on top. libtorrent hands out
+        piece requests in proportion to each connection's rate, so with a thin
+        swarm the mirror simply ends up serving most of the pieces.
+        """
+        seeds: List[str] = []
+        try:
+            for m in mirrors or []:
+                m = str(m).strip()
+                if not m.startswith(("http://", "https://")):
+                    logging.warning(f"[TermoLoad] Ignoring non-HTTP mirror for torrent {download_id}: {m}")
+                    continue
+                try:
+                    handle.add_url_seed(m)
+                except Exception as e:
+                    logging.warning(f"[TermoLoad] Could not add web seed {m}: {e}")
+            try:
+                seeds = sorted(set(handle.url_seeds()) | set(handle.http_seeds()))
+            except Exception:
+                seeds = [m for m in (mirrors or []) if str(m).startswith(("http://", "https://"))]
+            if seeds:
+                logging.info(f"[TermoLoad] Torrent {download_id} web seeds: {', '.join(seeds)}")
+            for d in self.app.downloads:
+                if d.get("id") == download_id:
+                    d["web_seeds"] = seeds
+                    break
+        except Exception:
+            logging.exception(f"[TermoLoad] Failed to attach web seeds for torrent {download_id}")
+        return seeds
+
+    def _update_source_rates(self, download_id: int, handle, download_rate: int) -> None:
+        """Split the torrent's download rate into swarm and web-seed throughput."""
+        try:
+            d = next((x for x in self.app.downloads if x.get("id") == download_id), None)
+            if d is None:
+                return
+            if not d.get("web_seeds"):
+                d["peer_rate"] = download_rate
+                d["web_seed_rate"] = 0
+                return
+            import libtorrent as lt
+            web_types = (lt.peer_info.web_seed, lt.peer_info.http_seed)
+            peer_rate = 0
+            web_rate = 0
+            for p in handle.get_peer_info():
+                if p.connection_type in web_types:
+                    web_rate += p.down_speed
+                else:
+                    peer_rate += p.down_speed
+            d["peer_rate"] = peer_rate
+            d["web_seed_rate"] = web_rate
+        except Exception:
+            logging.debug(f"[TermoLoad] Could not split source rates for torrent {download_id}", exc_info=True)
+
     def update_torrent_peers(self, download_id: int, peers: int, seeds: int) -> None:
         """Update peer and seed count for a torrent download.
         This will be called by the torrent engine once implemented.
@@ -1728,7 +5899,7 @@ class AddDownloadModal(ModalScreen[dict]):
     def compose(self) -> ComposeResult:
         with Vertical(id="modal_container"):
             yield Static("Add New Download",id="modal_title")
-            yield Label("Enter URL or Torrent File Path:")
+            yield Label("Enter URL, Torrent or Metalink File Path (separate several with spaces to bulk add):")
             yield Input(id="download_input", placeholder="Enter URL or path...")
             with Horizontal():
                 yield Button("Browse File", id="browse_file", variant="default")
@@ -1740,10 +5911,27 @@ class AddDownloadModal(ModalScreen[dict]):
             )
             with Horizontal():
                 yield Button("Browse",id ="browse_folder",variant="default")
+            yield Label("Mirror URLs (optional, space-separated): torrent web seeds, or other copies of the same file:")
+            yield Input(id="mirror_input", placeholder="https://mirror.example.org/file.iso ...")
+            yield Label("Expected checksum (optional: sha256:<hex>, sha1/md5, or URL to a SHA256SUMS file):")
+            yield Input(id="checksum_input", placeholder="sha256:9f86d08... or https://example.org/SHA256SUMS")
             with Horizontal():
                 yield Button("Add", id="confirm_add", variant="success")
                 yield Button("Cancel", id="cancel_add", variant="error")
 
+    @staticmethod
+    def _is_source_token(token: str) -> bool:
+        """True if the token is a complete source by itself: a magnet, a URL or an existing file."""
+        if token.startswith("magnet:"):
+            return True
+        try:
+            parsed = urlparse(token)
+            if parsed.scheme in ("http", "https", "ftp") and parsed.netloc:
+                return True
+        except Exception:
+            pass
+        return os.path.isfile(token)
+
     def on_button_pressed(self, event: Button.Pressed) -> None:
         if event.button.id == "confirm_add":
             url_widget = self.query_one("#download_input", Input)
@@ -1751,17 +5939,44 @@ class AddDownloadModal(ModalScreen[dict]):
 
             url = url_widget.value.strip()
             save_path = path_widget.value.strip() or "downloads"
+            try:
+                mirrors = self.query_one("#mirror_input", Input).value.split()
+            except Exception:
+                mirrors = []
+            try:
+                checksum = self.query_one("#checksum_input", Input).value.strip()
+            except Exception:
+                checksum = ""
+            if checksum and not _parse_checksum_spec(checksum):
+                try:
+                    self.app.notify("Checksum must be sha256:/sha1:/md5:<hex>, a bare hex digest, or a URL", severity="warning")
+                except Exception:
+                    pass
+                return
 
             logging.info(f"[TermoLoad] AddDownloadModal: user entered url={url} save_path={save_path}")
 
+            # Only split into several sources when every token stands on its own,
+            # so a single URL or path containing spaces stays one download
+            entries = url.split()
+            if len(entries) > 1 and all(self._is_source_token(e) for e in entries):
+                try:
+                    app = self.app
+                    if hasattr(app, '_ingest_bulk'):
+                        app._ingest_bulk(entries, save_path)
+                except Exception:
+                    logging.exception("[TermoLoad] AddDownloadModal: bulk ingest failed")
+                self.dismiss(None)
+                return
+
             if url:
                 try:
                     app = self.app
                     if hasattr(app, 'process_modal_result'):
-                        app.process_modal_result({'url': url, 'path': save_path})
+                        app.process_modal_result({'url': url, 'path': save_path, 'mirrors': mirrors, 'checksum': checksum})
                 except Exception:
                     pass
-                self.dismiss({"url":url,"path":save_path})
+                self.dismiss({"url":url,"path":save_path,"mirrors":mirrors,"checksum":checksum})
             else:
                 self.dismiss(None)
         elif event.button.id == "cancel_add":
@@ -1775,7 +5990,7 @@ class AddDownloadModal(ModalScreen[dict]):
                         None,
                         lambda: TkinterDialogHelper.ask_open_filename(
                             title="Select Torrent File",
-                            filetypes=[("Torrent Files", "*.torrent"), ("All Files", "*.*")]
+                            filetypes=[("Torrent Files", "*.torrent"), ("Metalink Files", "*.meta4 *.metalink"), ("All Files", "*.*")]
                         )
                     )
                     if file_path:
@@ -1864,11 +6079,125 @@ class ConfirmDeleteModal(ModalScreen[bool]):
             self.dismiss(True)
         elif event.button.id == "confirm_cancel":
             self.dismiss(False) 
+class TorrentFileIndex:
+    """On-demand view over a libtorrent ``file_storage`` for the file picker.
+
+    Paths and sizes are read from ``file_storage`` only when a row or folder
+    needs them, the folder map is built once on first use, and selection is
+    kept as one priority byte per file so it can be handed straight to
+    ``prioritize_files``. The selected byte total is kept up to date by
+    ``set_selected``, so the status line never walks every file.
+    """
+
+    def __init__(self, files):
+        self.files = files
+        self.num_files = files.num_files()
+        self.priorities = bytearray([4]) * self.num_files
+        self._folders: Optional[Dict[str, tuple]] = None
+        try:
+            pad_flag = files.flag_pad_file
+            self._hidden = {i for i in range(self.num_files) if files.file_flags(i) & pad_flag}
+        except Exception:
+            self._hidden = set()
+        for i in self._hidden:
+            self.priorities[i] = 0
+        try:
+            self._selected_bytes = files.total_size() - sum(self.size(i) for i in self._hidden)
+        except Exception:
+            self._selected_bytes = sum(self.size(i) for i in range(self.num_files) if self.priorities[i])
+
+    def path(self, index: int) -> str:
+        return self.files.file_path(index).replace("\\", "/")
+
+    def size(self, index: int) -> int:
+        return self.files.file_size(index)
+
+    def _build_folders(self) -> Dict[str, tuple]:
+        """Map folder path -> (set of child folder paths, list of direct file indices)."""
+        if self._folders is not None:
+            return self._folders
+        folders: Dict[str, tuple] = {"": (set(), [])}
+        for i in range(self.num_files):
+            if i in self._hidden:
+                continue
+            parent = self.path(i).rpartition("/")[0]
+            if parent not in folders:
+                # Register the whole chain of missing ancestors, then link each to its parent
+                created = []
+                child = parent
+                while child not in folders:
+                    folders[child] = (set(), [])
+                    created.append(child)
+                    child = child.rpartition("/")[0]
+                for child in created:
+                    folders[child.rpartition("/")[0]][0].add(child)
+            folders[parent][1].append(i)
+        self._folders = folders
+        return folders
+
+    def subfolders(self, folder: str) -> List[str]:
+        return sorted(self._build_folders().get(folder, (set(), []))[0])
+
+    def files_under(self, folder: str) -> List[int]:
+        folders = self._build_folders()
+        out: List[int] = []
+        stack = [folder]
+        while stack:
+            current = stack.pop()
+            subs, direct = folders.get(current, (set(), []))
+            out.extend(direct)
+            stack.extend(subs)
+        return out
+
+    def view(self, folder: str = "", pattern: str = "", sort_by: str = "name") -> List[int]:
+        import fnmatch
+        indices = self.files_under(folder) if folder else [i for i in range(self.num_files) if i not in self._hidden]
+        if pattern:
+            pat = pattern.lower()
+            if not any(ch in pat for ch in "*?["):
+                pat = f"*{pat}*"
+            indices = [i for i in indices if fnmatch.fnmatchcase(self.path(i).lower(), pat)]
+        if sort_by == "size":
+            indices.sort(key=self.size, reverse=True)
+        else:
+            indices.sort(key=self.path)
+        return indices
+
+    def is_selected(self, index: int) -> bool:
+        return self.priorities[index] > 0
+
+    def set_selected(self, indices, selected: bool) -> None:
+        value = 4 if selected else 0
+        for i in indices:
+            if i not in self._hidden and bool(self.priorities[i]) != selected:
+                self.priorities[i] = value
+                self._selected_bytes += self.size(i) if selected else -self.size(i)
+
+    def toggle(self, index: int) -> None:
+        self.set_selected([index], not self.is_selected(index))
+
+    def selected_count(self) -> int:
+        return self.num_files - self.priorities.count(0)
+
+    def selected_size(self) -> int:
+        return self._selected_bytes
+
+    def priority_vector(self) -> List[int]:
+        return list(self.priorities)
+
+
 class TorrentFileSelectModal(ModalScreen[dict]):
+    PAGE_SIZE = 200
+
     def __init__(self,torrent_info:dict):
         super().__init__()
         self.torrent_info = torrent_info
-        self.file_checkboxes = []
+        self.index = TorrentFileIndex(torrent_info["file_storage"])
+        self.current_folder = ""
+        self.filter_pattern = ""
+        self.sort_by = "name"
+        self.page = 0
+        self._view: List[int] = []
     
     def compose(self) -> ComposeResult:
         with Vertical(id="modal_container"):
@@ -1876,29 +6205,98 @@ class TorrentFileSelectModal(ModalScreen[dict]):
             yield Static(f"Torrent: {self.torrent_info.get('name','Unknown')}", classes="torrent_name")
 
             total_size = self.torrent_info.get("total_size",0)
-            size_str = self.format_size(total_size)
-            yield Static(f"Total Size: {size_str} | Files: {len(self.torrent_info.get('files', []))}", classes="torrent_info")
+            size_str = self._format_size(total_size)
+            yield Static(f"Total Size: {size_str} | Files: {self.index.num_files}", classes="torrent_info")
 
-            with Vertical(id="file_list_container"):
-                yield Static("Select the files you want to download:", classes="file_list_header")
-            
-                for idx, file_info in enumerate(self.torrent_info.get('files', [])):
-                    file_path = file_info.get('path', f'file_{idx}')
-                    file_size = file_info.get('size', 0)
-                    size_str = self._format_size(file_size)
+            with Horizontal(classes="selection_buttons"):
+                yield Input(id="file_filter", placeholder="Filter (glob, e.g. *.mkv or season1/*)")
+                yield Button("Sort: Name", id="toggle_sort", variant="default")
 
-                    with Horizontal(classes="file_item"):
-                        cb = Checkbox(f"{file_path} ({size_str})", id=f"file_cb_{idx}", value=True)
-                        yield cb
-                        self.file_checkboxes.append(cb)
+            with Horizontal(id="file_list_container"):
+                tree = Tree(self.torrent_info.get("name", "Torrent"), data="", id="folder_tree")
+                tree.root.expand()
+                yield tree
+                yield DataTable(id="file_table", cursor_type="row")
+
+            with Horizontal(classes="selection_buttons"):
+                yield Button("◀ Prev", id="page_prev", variant="default")
+                yield Static("", id="page_label")
+                yield Button("Next ▶", id="page_next", variant="default")
 
             with Horizontal(classes="selection_buttons"):
                 yield Button("Select All", id="select_all", variant="default")
                 yield Button("Deselect All", id="deselect_all", variant="default")
+                yield Button("Select Shown", id="select_view", variant="default")
+                yield Button("Deselect Shown", id="deselect_view", variant="default")
+            yield Checkbox("Stream: download sequentially and preview the main media file", id="stream_mode", value=False)
             
             with Horizontal():
                 yield Button("Cancel", id="cancel_select", variant="error")
                 yield Button("Download Selected", id="confirm_select", variant="success")
+
+    def on_mount(self) -> None:
+        table = self.query_one("#file_table", DataTable)
+        table.add_columns("✓", "Size", "Path")
+        self._add_folder_nodes(self.query_one("#folder_tree", Tree).root)
+        self._refresh_view()
+
+    def _add_folder_nodes(self, node) -> None:
+        for folder in self.index.subfolders(node.data):
+            label = folder.rpartition("/")[2] or folder
+            node.add(f"📁 {label}", data=folder, allow_expand=bool(self.index.subfolders(folder)))
+
+    def on_tree_node_expanded(self, event) -> None:
+        event.stop()
+        node = event.node
+        # Children are created on first expansion only
+        if not node.children:
+            self._add_folder_nodes(node)
+
+    def on_tree_node_selected(self, event) -> None:
+        event.stop()
+        self.current_folder = event.node.data or ""
+        self._refresh_view()
+
+    def on_input_changed(self, event) -> None:
+        if event.input.id == "file_filter":
+            event.stop()
+            self.filter_pattern = event.value.strip()
+            self._refresh_view()
+
+    def on_data_table_row_selected(self, event) -> None:
+        event.stop()
+        try:
+            index = int(event.row_key.value)
+        except Exception:
+            return
+        self.index.toggle(index)
+        self.query_one("#file_table", DataTable).update_cell(event.row_key, self._check_column, self._mark(index))
+        self._update_summary()
+
+    def _mark(self, index: int) -> str:
+        return "[x]" if self.index.is_selected(index) else "[ ]"
+
+    def _refresh_view(self) -> None:
+        self._view = self.index.view(self.current_folder, self.filter_pattern, self.sort_by)
+        self.page = 0
+        self._render_page()
+
+    def _render_page(self) -> None:
+        """Materialize only the rows of the current page."""
+        table = self.query_one("#file_table", DataTable)
+        table.clear()
+        self._check_column = table.ordered_columns[0].key
+        start = self.page * self.PAGE_SIZE
+        for i in self._view[start:start + self.PAGE_SIZE]:
+            table.add_row(self._mark(i), self._format_size(self.index.size(i)), self.index.path(i), key=str(i))
+        self._update_summary()
+
+    def _update_summary(self) -> None:
+        pages = max(1, -(-len(self._view) // self.PAGE_SIZE))
+        self.query_one("#page_label", Static).update(
+            f" Page {self.page + 1}/{pages} · {len(self._view)} shown · "
+            f"{self.index.selected_count()} selected ({self._format_size(self.index.selected_size())}) "
+        )
     
     def _format_size(self,size_bytes:int)-> str:
         if size_bytes < 1024:
@@ -1911,29 +6309,42 @@ class TorrentFileSelectModal(ModalScreen[dict]):
             return f"{size_bytes/(1024**3):.1f} GB"
     
     def on_button_pressed(self, event: Button.Pressed) -> None:
-        if event.button.id == "select_all":
-            for cb in self.file_checkboxes:
-                cb.value = True
+        event.stop()
+        if event.button.id in ("select_all", "deselect_all"):
+            self.index.set_selected(range(self.index.num_files), event.button.id == "select_all")
+            self._render_page()
             return
     
-        elif event.button.id == "deselect_all":
-            for cb in self.file_checkboxes:
-                cb.value = False
+        elif event.button.id in ("select_view", "deselect_view"):
+            # Acts on the highlighted folder and the active filter
+            self.index.set_selected(self._view, event.button.id == "select_view")
+            self._render_page()
+            return
+
+        elif event.button.id == "toggle_sort":
+            self.sort_by = "size" if self.sort_by == "name" else "name"
+            event.button.label = "Sort: Size" if self.sort_by == "size" else "Sort: Name"
+            self._refresh_view()
+            return
+
+        elif event.button.id in ("page_prev", "page_next"):
+            pages = max(1, -(-len(self._view) // self.PAGE_SIZE))
+            step = 1 if event.button.id == "page_next" else -1
+            self.page = max(0, min(pages - 1, self.page + step))
+            self._render_page()
             return
         
         elif event.button.id == "confirm_select":
-            selected_files = []
-            for idx, cb in enumerate(self.file_checkboxes):
-                if cb.value:
-                    selected_files.append(idx)
-            
-            if not selected_files:
+            selected_count = self.index.selected_count()
+            if not selected_count:
                 self.app.notify("Please select at least one file to download", severity="warning")
                 return
             
             self.dismiss({
-                "selected_files": selected_files,
-                "torrent_info": self.torrent_info
+                "file_priorities": self.index.priority_vector(),
+                "selected_count": selected_count,
+                "torrent_info": self.torrent_info,
+                "streaming": self.query_one("#stream_mode", Checkbox).value
             })
         elif event.button.id == "cancel_select":
             self.dismiss(None)
@@ -2048,7 +6459,9 @@ class LoadingScreen(App):
         self.set_timer(0.5, self.exit)
             
 class TermoLoad(App):
-    BINDINGS = [("q", "quit", "Quit"),("a","add_download","Add Download"),("m","minimize_to_tray","Minimize to Tray"),("o","open_folder","Open Folder")]
+    BINDINGS = [("q", "quit", "Quit"),("a","add_download","Add Download"),("m","minimize_to_tray","Minimize to Tray"),("o","open_folder","Open Folder"),("l","share_lan","Share on LAN"),
+                ("plus,equals_sign","move_up","Move Up"),("minus","move_down","Move Down"),("c","cycle_class","Queue Class"),
+                ("x","toggle_quota_exempt","Quota Exempt")]
 
     CSS = """
     AddDownloadModal {
@@ -2260,20 +6673,31 @@ class TermoLoad(App):
         text-style: bold;
     }
     #file_list_container {
-        height: 30;
-        overflow-y: auto;
+        height: 1fr;
+        min-height: 8;
         border: solid $primary;
-        padding: 1;
+        padding: 0 1;
         margin-bottom: 1;
     }
-    
-    .file_item {
-        padding: 0 0 1 0;
-        align: left middle;
+
+    #folder_tree {
+        width: 35%;
+        height: 100%;
     }
-    
-    .file_item Checkbox {
-        width: 100%;
+
+    #file_table {
+        width: 1fr;
+        height: 100%;
+    }
+
+    #file_filter {
+        width: 1fr;
+    }
+
+    #page_label {
+        width: 1fr;
+        content-align: center middle;
+        color: $text-muted;
     }
     
     .selection_buttons {
@@ -2300,6 +6724,11 @@ class TermoLoad(App):
         # Track user interaction to prevent table updates from interfering
         self._user_interacting = False
         self._last_interaction_time = 0
+        # Data usage against "quota_daily_mb"/"quota_monthly_mb", fed from the bandwidth allocator
+        self.quota = DataQuota()
+        self._quota_moved = 0.0
+        self._quota_hit: Optional[str] = None
+        self._schedule_note = ""
         
     
     def compose(self) -> ComposeResult:
@@ -2323,6 +6752,7 @@ class TermoLoad(App):
                 yield Button("Resume Selected", id="btn_resume_sel")
                 yield Button("Pause All", id="btn_pause_all")
                 yield Button("Resume All", id="btn_resume_all")
+                yield Button("Share on LAN", id="btn_share_lan")
                 yield Button("Remove From List", id="button_remove_list")
                 yield Button("Delete + Remove",id="btn_delete_and_remove", variant="error")
             yield DataTable(id="downloads_table")
@@ -2339,6 +6769,12 @@ class TermoLoad(App):
                 yield Input(id="settings_concurrent", placeholder="3")
                 yield Label("Max download speed (KB/s, 0 = unlimited):")
                 yield Input(id="settings_speed", placeholder="0")
+                yield Label("Speed schedule, windows separated by ';' (speed in KB/s, 0 = unlimited):")
+                yield Input(id="settings_schedule", placeholder="e.g. mon-fri 09:00-18:00 speed=2048 slots=1; sat,sun 22:00-06:00 speed=0")
+                yield Label("Data quota per day / per month (MB, 0 = none):")
+                with Horizontal():
+                    yield Input(id="settings_quota_daily", placeholder="0")
+                    yield Input(id="settings_quota_monthly", placeholder="0")
                 yield Checkbox("Shutdown PC when all downloads complete (WARNING: Real shutdown!)", id="settings_shutdown")
                 yield Checkbox("Play sound on download completion", id="settings_sound_complete")
                 yield Checkbox("Play sound on download error", id="settings_sound_error")
@@ -2376,41 +6812,329 @@ class TermoLoad(App):
         image = Image.new("RGBA", (width, height), color=(0, 0, 0, 0))
         dc = ImageDraw.Draw(image)
 
-        dc.rectangle([20,15,44,25], fill="#00ff00")
-        dc.polygon([(32,25),(20,35),(44,35)], fill="#00ff00")
-        dc.rectangle([28,25,36,45], fill="#00ff00")
-        dc.rectangle([20,45,44,50], fill="#00ff00")
+        dc.rectangle([20,15,44,25], fill="#00ff00")
+        dc.polygon([(32,25),(20,35),(44,35)], fill="#00ff00")
+        dc.rectangle([28,25,36,45], fill="#00ff00")
+        dc.rectangle([20,45,44,50], fill="#00ff00")
+
+        return image
+
+    def _play_completion_sound(self):
+        """Play a sound when a download completes successfully."""
+        if not self.settings.get("sound_on_complete", True):
+            return
+        
+        def _play():
+            try:
+                play_notification_sound(800, 150, 'info')
+                time.sleep(0.05)
+                play_notification_sound(1000, 200, 'complete')
+            except Exception:
+                logging.debug("[TermoLoad] Failed to play completion sound")
+        
+        threading.Thread(target=_play, daemon=True).start()
+    
+    def _play_error_sound(self):
+        if not self.settings.get("sound_on_error", True):
+            return
+        
+        def _play():
+            try:
+                play_notification_sound(500, 200, 'error')
+                time.sleep(0.05)
+                play_notification_sound(300, 250, 'error')
+            except Exception:
+                logging.debug("[TermoLoad] Failed to play error sound")
+        
+        threading.Thread(target=_play, daemon=True).start()
+    def action_move_up(self) -> None:
+        """Move the selected download one place up the queue (starts sooner)."""
+        self._move_in_queue(-1)
+
+    def action_move_down(self) -> None:
+        """Move the selected download one place down the queue."""
+        self._move_in_queue(1)
+
+    def _move_in_queue(self, step: int) -> None:
+        try:
+            d = self._get_selected_download()
+            if not d:
+                self.notify("No download selected to move.", severity="warning")
+                return
+            idx = self.downloads.index(d)
+            new = idx + step
+            if not 0 <= new < len(self.downloads):
+                return
+            self.downloads[idx], self.downloads[new] = self.downloads[new], self.downloads[idx]
+            self._queue_order_changed = True
+            try:
+                self.downloads_table.move_cursor(row=new)
+            except Exception:
+                pass
+            self.save_downloads_state()
+        except Exception as e:
+            logging.exception(f"[TermoLoad] _move_in_queue exception: {e}")
+
+    def action_cycle_class(self) -> None:
+        """Switch the selected download between the interactive, normal and bulk queue classes."""
+        try:
+            d = self._get_selected_download()
+            if not d:
+                self.notify("No download selected.", severity="warning")
+                return
+            qos = d.get("qos") or "normal"
+            qos = QOS_CLASSES[(QOS_CLASSES.index(qos) + 1) % len(QOS_CLASSES)] if qos in QOS_CLASSES else "normal"
+            targets = [d]
+            if d.get("children"):
+                # A playlist or metalink group carries its files with it
+                targets += [x for x in self.downloads if x.get("id") in d["children"]]
+            for x in targets:
+                x["qos"] = qos
+            self.save_downloads_state()
+            self.notify(f"{d.get('name', 'Download')}: {qos}", severity="information")
+        except Exception as e:
+            logging.exception(f"[TermoLoad] action_cycle_class exception: {e}")
+
+    def action_toggle_quota_exempt(self) -> None:
+        """Let the selected download keep running when the data quota is used up, or not."""
+        try:
+            d = self._get_selected_download()
+            if not d:
+                self.notify("No download selected.", severity="warning")
+                return
+            exempt = not d.get("quota_exempt")
+            targets = [d]
+            if d.get("children"):
+                targets += [x for x in self.downloads if x.get("id") in d["children"]]
+            for x in targets:
+                x["quota_exempt"] = exempt
+            self.save_downloads_state()
+            self.notify(f"{d.get('name', 'Download')}: {'exempt from' if exempt else 'counts against'} the data quota",
+                        severity="information")
+            self._apply_schedule()
+        except Exception as e:
+            logging.exception(f"[TermoLoad] action_toggle_quota_exempt exception: {e}")
+
+    @staticmethod
+    def _quota_exempt(d: dict) -> bool:
+        return bool(d.get("quota_exempt")) or d.get("qos") == "interactive"
+
+    def _describe_limits(self, window: Optional[Dict[str, Any]]) -> str:
+        window = window or {}
+        kb = window.get("max_speed_kb")
+        kb = self.settings.get("max_speed_kb", 0) if kb is None else kb
+        slots = window.get("concurrent")
+        slots = self.settings.get("concurrent", 3) if slots is None else slots
+        speed = self.downloader.format_speed(float(kb or 0) * 1024) if kb else "unlimited"
+        return f"{speed}, {slots} slot{'' if slots == 1 else 's'}"
+
+    def _apply_schedule(self) -> None:
+        """Timer: switch to the schedule window in force and hold downloads to the data quota.
+
+        A window change takes effect at once: the bandwidth allocator reads
+        the cap every second and the host scheduler is reconfigured here
+        (fewer slots stop new starts; running downloads finish). When a quota
+        is used up every running download that is not exempt is paused, and
+        resumed once the quota resets or is raised.
+        """
+        try:
+            now = datetime.now()
+            schedule = BandwidthSchedule(self.settings.get("schedule") or [])
+            window = schedule.window_at(now)
+            if window != self.downloader.schedule_window:
+                self.downloader.schedule_window = window
+                logging.info(f"[TermoLoad] Schedule: now {self._describe_limits(window)}")
+                try:
+                    self.downloader.scheduler.configure(self.downloader._limit_setting("concurrent", 3),
+                                                        self.settings.get("per_host_connections", 4),
+                                                        self.settings.get("host_limits") or {})
+                except Exception:
+                    logging.exception("[TermoLoad] Invalid connection limits in settings")
+
+            moved = self.downloader.bandwidth.moved
+            self.quota.add(moved - self._quota_moved, now)
+            self._quota_moved = moved
+            daily = float(self.settings.get("quota_daily_mb", 0) or 0)
+            monthly = float(self.settings.get("quota_monthly_mb", 0) or 0)
+            kind = self.quota.exhausted(daily, monthly, now)
+            if kind:
+                paused = []
+                for d in list(self.downloads):
+                    did = d.get("id")
+                    task = self.download_tasks.get(did)
+                    if task is None or task.done() or d.get("status") == "Completed" or self._quota_exempt(d):
+                        continue
+                    group_task = self.download_tasks.get(d.get("group_id"))
+                    if group_task is not None and not group_task.done():
+                        continue  # pausing the group pauses its files
+                    self._pause_download(int(did))
+                    d["quota_paused"] = True
+                    paused.append(did)
+                if paused:
+                    self.quota.save(force=True)
+                    self.save_downloads_state()
+                    logging.info(f"[TermoLoad] {kind.capitalize()} data quota used up; paused downloads {paused}")
+                    self.notify(f"{kind.capitalize()} data quota used up: paused {len(paused)} download(s) "
+                                f"until {DataQuota.resets_at(kind, now):%a %H:%M}.", severity="warning")
+            elif self._quota_hit or any(d.get("quota_paused") for d in self.downloads):
+                waiting = [d for d in self.downloads if d.get("quota_paused")]
+                for d in waiting:
+                    self._resume_download(int(d["id"]))
+                if waiting:
+                    logging.info(f"[TermoLoad] Data quota available again; resumed {len(waiting)} download(s)")
+                    self.notify(f"Data quota available again: resumed {len(waiting)} download(s).", severity="information")
+            self._quota_hit = kind
+
+            notes = []
+            if schedule.windows:
+                note = f"⏰ {self._describe_limits(window)}"
+                change = schedule.next_change(now)
+                if change is not None:
+                    note += f" until {change[0]:%a %H:%M}, then {self._describe_limits(change[1])}"
+                notes.append(note)
+            if kind:
+                notes.append(f"📊 {kind} quota used up, resets {DataQuota.resets_at(kind, now):%a %d %b}")
+            elif daily or monthly:
+                used = []
+                if daily:
+                    used.append(f"today {self.quota.day_bytes / 1024**2:.0f}/{daily:.0f} MB")
+                if monthly:
+                    used.append(f"month {self.quota.month_bytes / 1024**2:.0f}/{monthly:.0f} MB")
+                notes.append("📊 " + ", ".join(used))
+            self._schedule_note = " | ".join(notes)
+        except Exception:
+            logging.exception("[TermoLoad] Failed to apply schedule/quota")
+
+    def _check_disk_space(self) -> None:
+        """Timer: pause running downloads before their disk fills up, resume parked ones once they fit.
 
-        return image
+        Per filesystem, running downloads are taken best first (those
+        already transferring, then queue class and list order) and keep going while what each still has to write
+        fits in the free space above "disk_reserve_mb"; the rest are paused
+        with "disk_paused". Parked downloads come back in the same order
+        into whatever is left. One of unknown size needs free space above
+        twice the margin to come back.
+        """
+        try:
+            disk = self.downloader.disk
+            margin = int(disk.margin())
+            running: Dict[int, list] = {}
+            parked: Dict[int, list] = {}
+            for d in self.downloads:
+                if d.get("children") or d.get("status") == "Completed":
+                    continue
+                if int(d.get("total_size") or 0) and not disk.remaining(d):
+                    continue  # all on disk already (seeding, verifying)
+                path = d.get("path") or self.settings.get("download_folder") or "downloads"
+                volume = disk.volume(path)
+                if volume is None:
+                    continue
+                task = self.download_tasks.get(d.get("id"))
+                if task is not None and not task.done():
+                    running.setdefault(volume, []).append((d, path))
+                elif d.get("disk_paused"):
+                    parked.setdefault(volume, []).append((d, path))
+            # Transfers under way before ones still waiting for a slot, then queue order
+            memo = {}
+            order = lambda item: (item[0].get("status") == "Queued", self.downloader._queue_key(item[0].get("id"), memo))
+            for volume in set(running) | set(parked):
+                items = running.get(volume) or parked[volume]
+                free = disk.free(items[0][1])
+                if free is None:
+                    continue
+                budget = free - margin
+                for d, path in sorted(running.get(volume, []), key=order):
+                    need = disk.remaining(d)
+                    if budget > 0 and need <= budget:
+                        budget -= need
+                        continue
+                    self._pause_download(int(d["id"]))
+                    d["disk_paused"] = True
+                    logging.warning(f"[TermoLoad] Low disk space in {path} ({free} bytes free); "
+                                    f"paused download id={d['id']}")
+                    self.notify(f"Low disk space: paused {d.get('name', 'download')}", severity="warning")
+                for d, path in sorted(parked.get(volume, []), key=order):
+                    need = disk.remaining(d)
+                    if not (need and need <= budget) and not (not need and budget > margin):
+                        continue
+                    budget -= need
+                    self._resume_download(int(d["id"]))
+                    group_id = d.get("group_id")
+                    group_task = self.download_tasks.get(group_id)
+                    if group_id is not None and (group_task is None or group_task.done()):
+                        # Its group row stopped following its files when they were paused
+                        self.download_tasks[group_id] = asyncio.create_task(self._run_playlist_group(group_id))
+                    logging.info(f"[TermoLoad] Enough disk space in {path} again; resumed download id={d['id']}")
+                    self.notify(f"Disk space available: resumed {d.get('name', 'download')}", severity="information")
+        except Exception:
+            logging.exception("[TermoLoad] Failed to check disk space")
 
-    def _play_completion_sound(self):
-        """Play a sound when a download completes successfully."""
-        if not self.settings.get("sound_on_complete", True):
+    def action_share_lan(self) -> None:
+        """Seed the selected completed HTTP/Video download on the LAN, or stop sharing it."""
+        try:
+            d = self._get_selected_download()
+            if not d:
+                self.notify("No download selected to share.", severity="warning")
+                return
+            did = int(d.get("id"))
+            if did in self.downloader.lan_shares:
+                self.downloader.stop_lan_share(did)
+                d["lan_share"] = None
+                self.save_downloads_state()
+                self.notify("Stopped sharing on LAN.", severity="information")
+                return
+            if d.get("type") not in ("URL", "Video") or d.get("status") != "Completed":
+                self.notify("Only completed URL and video downloads can be shared.", severity="warning")
+                return
+            if not LIBTORRENT_AVAILABLE:
+                self.notify("LAN sharing needs libtorrent.", severity="error")
+                return
+            filepath = self._resolve_download_path(d)
+            if not filepath or not filepath.is_file():
+                self.notify("Downloaded file not found.", severity="error")
+                return
+            self.notify(f"Preparing LAN share: {filepath.name}", severity="information")
+            asyncio.create_task(self._share_on_lan(did, filepath))
+        except Exception as e:
+            logging.exception(f"[TermoLoad] action_share_lan exception: {e}")
+
+    async def _share_on_lan(self, download_id: int, filepath: Path) -> None:
+        try:
+            share = await self.downloader.share_on_lan(download_id, filepath)
+        except Exception:
+            logging.exception(f"[TermoLoad] LAN share failed for download {download_id}")
+            share = None
+        if not share:
+            self.notify("Could not share on LAN.", severity="error")
             return
-        
-        def _play():
-            try:
-                play_notification_sound(800, 150, 'info')
-                time.sleep(0.05)
-                play_notification_sound(1000, 200, 'complete')
-            except Exception:
-                logging.debug("[TermoLoad] Failed to play completion sound")
-        
-        threading.Thread(target=_play, daemon=True).start()
-    
-    def _play_error_sound(self):
-        if not self.settings.get("sound_on_error", True):
+        for d in self.downloads:
+            if d.get("id") == download_id:
+                d["lan_share"] = share
+                break
+        self.save_downloads_state()
+        try:
+            self.copy_to_clipboard(share["magnet"])
+        except Exception:
+            pass
+        self.notify(f"Sharing on LAN (magnet copied): {Path(share['torrent']).name}", severity="information", timeout=6)
+
+    async def _restore_lan_shares(self) -> None:
+        """Re-seed downloads that were being shared when the app last closed."""
+        if not LIBTORRENT_AVAILABLE:
             return
-        
-        def _play():
+        for d in self.downloads:
+            share = d.get("lan_share")
+            if not share or d.get("status") != "Completed":
+                continue
+            filepath = self._resolve_download_path(d)
+            if not filepath or not filepath.is_file():
+                d["lan_share"] = None
+                continue
             try:
-                play_notification_sound(500, 200, 'error')
-                time.sleep(0.05)
-                play_notification_sound(300, 250, 'error')
+                d["lan_share"] = await self.downloader.share_on_lan(int(d.get("id")), filepath)
             except Exception:
-                logging.debug("[TermoLoad] Failed to play error sound")
-        
-        threading.Thread(target=_play, daemon=True).start()
+                logging.exception(f"[TermoLoad] Could not restore LAN share for {d.get('id')}")
+
     def action_open_folder(self) -> None:
         """Open the folder containing the downloaded file."""
         try:
@@ -2650,6 +7374,20 @@ class TermoLoad(App):
             logging.exception("[TermoLoad] Failed to populate history table")
 
     
+    def _pending_bytes(self) -> tuple:
+        """(unfinished downloads, bytes they still need, how many of them have no known size yet)."""
+        pending = remaining = unknown = 0
+        for d in self.downloads:
+            if d.get("status") == "Completed" or d.get("children"):
+                continue
+            pending += 1
+            total = int(d.get("total_size") or 0)
+            if total:
+                remaining += max(0, total - int(d.get("downloaded_bytes") or 0))
+            else:
+                unknown += 1
+        return pending, remaining, unknown
+
     def build_stats_display(self) -> str:
         try:
             stats = self.history.get_statistics()
@@ -2661,7 +7399,40 @@ class TermoLoad(App):
             lines.append(f"❌ Failed: {stats.get('failed', 0)}")
             lines.append(f"⏸️ Cancelled: {stats.get('cancelled', 0)}")
             lines.append(f"Success Rate: {stats.get('success_rate', 0):.1f}%")
+            lines.append(f"Automatic Retries: {stats.get('retries', 0)} ({stats.get('retry_wait', 0):.0f}s spent waiting)")
             lines.append("")
+            try:
+                usage = self.downloader.scheduler.usage()
+            except Exception:
+                usage = []
+            if usage:
+                lines.append("🔌 Connections by Host\n" + "="*50)
+                for row in usage:
+                    line = f"{row['host']}: {row['connections']}/{row['limit']} connections, {row['active']} downloading"
+                    if row["queued"]:
+                        line += f", {row['queued']} queued"
+                    if row["waiting_connections"]:
+                        line += f", {row['waiting_connections']} waiting for a connection"
+                    lines.append(line)
+                lines.append("")
+            pending, remaining, unknown = self._pending_bytes()
+            if pending:
+                lines.append("📦 Queue\n" + "="*50)
+                left = f"{remaining/(1024**2):.1f} MB" if remaining < 1024**3 else f"{remaining/(1024**3):.2f} GB"
+                line = f"{pending} unfinished download(s), {left} still to fetch"
+                if unknown:
+                    line += f" ({unknown} of unknown size)"
+                lines.append(line)
+                seen = set()
+                for d in self.downloads:
+                    path = d.get("path") or self.settings.get("download_folder") or "downloads"
+                    volume = self.downloader.disk.volume(path)
+                    free = self.downloader.disk.free(path)
+                    if volume is None or volume in seen or free is None or d.get("status") == "Completed":
+                        continue
+                    seen.add(volume)
+                    lines.append(f"Free space at {path}: {free/(1024**3):.2f} GB")
+                lines.append("")
             lines.append("📁 Data Transferred\n" + "="*50)
             total_size = stats.get('total_size', 0)
             total_dl = stats.get('total_downloaded', 0)
@@ -2820,7 +7591,25 @@ class TermoLoad(App):
                     "total_size": int(entry.get("total_size", 0) or 0),
                     "filepath": entry.get("filepath", ""),
                     "peers": entry.get("peers", 0),
-                    "seeds": entry.get("seeds", 0)
+                    "seeds": entry.get("seeds", 0),
+                    "streaming": bool(entry.get("streaming", False)),
+                    "stream_file": entry.get("stream_file"),
+                    "mirrors": list(entry.get("mirrors") or []),
+                    "lan_share": entry.get("lan_share"),
+                    "group_id": entry.get("group_id"),
+                    "children": entry.get("children"),
+                    "checksum": entry.get("checksum"),
+                    "checksum_state": entry.get("checksum_state"),
+                    "checksum_algo": entry.get("checksum_algo"),
+                    "etag": entry.get("etag"),
+                    "last_modified": entry.get("last_modified"),
+                    "filename": entry.get("filename"),
+                    "pieces": entry.get("pieces"),
+                    "qos": entry.get("qos") if entry.get("qos") in QOS_CLASSES else "normal",
+                    "weight": entry.get("weight"),
+                    "quota_exempt": bool(entry.get("quota_exempt", False)),
+                    "quota_paused": bool(entry.get("quota_paused", False)),
+                    "disk_paused": bool(entry.get("disk_paused", False))
                 }
                 
                 peers_seeds = "--"
@@ -2862,10 +7651,23 @@ class TermoLoad(App):
             self.set_interval(0.5, self.sync_table_from_downloads)
         except Exception:
             logging.exception("[TermoLoad] failed to set sync interval")
+        try:
+            self._apply_schedule()
+            self.set_interval(5.0, self._apply_schedule)
+        except Exception:
+            logging.exception("[TermoLoad] failed to set schedule interval")
+        try:
+            self.set_interval(5.0, self._check_disk_space)
+        except Exception:
+            logging.exception("[TermoLoad] failed to set disk space interval")
         try:
             await self._resume_incomplete_downloads()
         except Exception:
             logging.exception("[TermoLoad] Failed to resume incomplete downloads on startup")
+        try:
+            await self._restore_lan_shares()
+        except Exception:
+            logging.exception("[TermoLoad] Failed to restore LAN shares on startup")
         try:
             self.downloads_table.focus()
             if getattr(self.downloads_table, "row_count", 0) > 0:
@@ -2895,7 +7697,20 @@ class TermoLoad(App):
             "max_speed_kb": 0,
             "shutdown_on_complete": False,
             "sound_on_complete": True,
-            "sound_on_error": True
+            "sound_on_error": True,
+            "bulk_metadata_timeout": 60,
+            "video_workers": 2,
+            "fragment_concurrency": 8,
+            "http_connections": 4,
+            "stall_timeout": 20,
+            "http_retries": 8,
+            "per_host_connections": 4,
+            "host_limits": {},
+            "preflight_probes": 4,
+            "disk_reserve_mb": 512,
+            "schedule": [],
+            "quota_daily_mb": 0,
+            "quota_monthly_mb": 0
         }
         if settings_path.exists():
             try:
@@ -2946,6 +7761,16 @@ class TermoLoad(App):
             speed_input.value = str(self.settings.get("max_speed_kb", 0))
         except Exception:
             pass
+        try:
+            schedule_input = self.query_one("#settings_schedule", Input)
+            schedule_input.value = BandwidthSchedule.format(self.settings.get("schedule") or [])
+        except Exception:
+            pass
+        try:
+            self.query_one("#settings_quota_daily", Input).value = str(self.settings.get("quota_daily_mb", 0))
+            self.query_one("#settings_quota_monthly", Input).value = str(self.settings.get("quota_monthly_mb", 0))
+        except Exception:
+            pass
         try:
             shutdown_checkbox = self.query_one("#settings_shutdown", Checkbox)
             shutdown_checkbox.value = bool(self.settings.get("shutdown_on_complete", False))
@@ -2965,12 +7790,14 @@ class TermoLoad(App):
     async def sync_table_from_downloads(self):
         try:
             current_time = time.time()
-            if self._user_interacting and (current_time - self._last_interaction_time) < 3.0:
+            # A reordered queue is redrawn at once, even while the user is moving rows
+            rebuild_needed = bool(getattr(self, "_queue_order_changed", False))
+            self._queue_order_changed = False
+            if not rebuild_needed and self._user_interacting and (current_time - self._last_interaction_time) < 3.0:
                 return
             else:
                 self._user_interacting = False
             
-            rebuild_needed = False
             selected_index = None
             selected_download_id = None
             try:
@@ -2983,6 +7810,8 @@ class TermoLoad(App):
             
             # Try to update cells without rebuilding
             for i, d in enumerate(self.downloads):
+                if rebuild_needed:
+                    break
                 try:
                     row_key = d.get("row_key", i)
                     prog = max(0.0, min(1.0, float(d.get('progress', 0) or 0)))
@@ -3005,16 +7834,7 @@ class TermoLoad(App):
 
                     eta_str = d.get("eta", "--")
                     status = d.get("status", "Queued")
-                    peers = "--"
-                    if d.get("type") == "Torrent":
-                        peers = d.get("peers",0)
-                        seeds = d.get("seeds",0)
-                        if peers > 0 or seeds > 0:
-                            peers_seeds = f"{peers}↓/{seeds}↑"
-                        elif status == "Downloading":
-                            peers_seeds = "Connecting..."
-                        
-
+                    peers_seeds = self._format_peers_seeds(d)
 
                     if status == "Downloading" and eta_str and eta_str != '--':
                         pass
@@ -3027,24 +7847,25 @@ class TermoLoad(App):
                     elif status.startswith("Error"):
                         eta_str = "--"
 
-                    try:
-                        eta_secs = 0
-                        parts = eta_str.split()
-                        for part in parts:
-                            if part.endswith('h'):
-                                eta_secs += int(part[:-1]) * 3600
-                            elif part.endswith('m'):
-                                eta_secs += int(part[:-1]) * 60
-                            elif part.endswith('s'):
-                                eta_secs += int(part[:-1])
-                        if eta_secs <= 5:
-                            status = "Finishing"
-                    except Exception:
-                        pass
+                    if status == "Downloading":
+                        try:
+                            eta_secs = 0
+                            parts = eta_str.split()
+                            for part in parts:
+                                if part.endswith('h'):
+                                    eta_secs += int(part[:-1]) * 3600
+                                elif part.endswith('m'):
+                                    eta_secs += int(part[:-1]) * 60
+                                elif part.endswith('s'):
+                                    eta_secs += int(part[:-1])
+                            if parts and eta_secs <= 5:
+                                status = "Finishing"
+                        except Exception:
+                            pass
+                    self.downloads_table.update_cell(row_key, 1, self._type_label(d))
+                    self.downloads_table.update_cell(row_key, 2, d.get("name", ""))
                     self.downloads_table.update_cell(row_key, 3, f"{bar} {pct}{bytes_txt}")
                     self.downloads_table.update_cell(row_key, 4, d.get('speed', '0 B/s'))
-                    self.downloads_table.update_cell(row_key, 5, status)
-                    self.downloads_table.update_cell(row_key, 6, eta_str)
                     self.downloads_table.update_cell(row_key, 5, peers_seeds)
                     self.downloads_table.update_cell(row_key, 6, status)
                     self.downloads_table.update_cell(row_key, 7, eta_str)
@@ -3085,17 +7906,7 @@ class TermoLoad(App):
                             
                             eta_str = d.get('eta', '--')
                             status = d.get('status', 'Queued')
-                            peers_seeds = "--"
-
-                            if d.get("type") == "Torrent":
-                                peers = d.get("peers",0)
-                                seeds = d.get("seeds",0)
-                                if peers > 0 or seeds > 0:
-                                    peers_seeds = f"{peers}↓/{seeds}↑"
-                                elif status == "Downloading":
-                                    peers_seeds = "Connecting..."
-                                elif status == "Pending":
-                                    peers_seeds = "Waiting..."
+                            peers_seeds = self._format_peers_seeds(d)
                             
                             if status == "Completed":
                                 eta_str = "Done"
@@ -3108,7 +7919,7 @@ class TermoLoad(App):
                             
                             rk = self.downloads_table.add_row(
                                 str(d.get("id")),
-                                d.get("type", ""),
+                                self._type_label(d),
                                 d.get("name", ""),
                                 f"{bar} {pct}{bytes_txt}",
                                 d.get('speed', '0 B/s'),
@@ -3126,11 +7937,11 @@ class TermoLoad(App):
                             # Find the row with the selected download ID
                             for idx, dl in enumerate(self.downloads):
                                 if dl.get("id") == selected_download_id:
-                                    self.downloads_table.cursor_row = idx
+                                    self.downloads_table.move_cursor(row=idx)
                                     break
                         elif selected_index is not None and self.downloads_table.row_count:
                             idx = max(0, min(selected_index, self.downloads_table.row_count - 1))
-                            self.downloads_table.cursor_row = idx
+                            self.downloads_table.move_cursor(row=idx)
                     except Exception:
                         pass
                 except Exception:
@@ -3184,15 +7995,32 @@ class TermoLoad(App):
                 sel = self._get_selected_download()
                 if sel is not None:
                     txt = self._explain_status(sel.get("status", ""))
+                    if sel.get("quota_paused"):
+                        txt = "Paused – The data quota is used up; resumes when it resets (press 'x' to exempt it)."
+                    elif sel.get("disk_paused"):
+                        free = self.downloader.disk.free(sel.get("path") or self.settings.get("download_folder"))
+                        txt = ("Paused – Not enough free disk space for the rest of this download"
+                               + (f" ({free / 1024**3:.1f} GB free)" if free is not None else "")
+                               + "; resumes by itself once there is room.")
                     self.status_info.update(txt)
                     if sel.get("status") == "Completed":
                         filepath = self._resolve_download_path(sel)
                         if filepath and filepath.exists():
                             folder_name = filepath.parent.name
                             txt = f"✅ {txt} | 📁 Location: .../{folder_name}/"
+                    if sel.get("stream_url") and sel.get("id") in self.downloader.streams:
+                        txt = f"{txt} | ▶ Stream: {sel['stream_url']}"
+                    share = self.downloader.lan_share_status(sel.get("id"))
+                    if share is not None:
+                        txt = (f"{txt} | 📡 LAN: {share['peers']} peers, "
+                               f"{self.downloader.format_speed(share['rate'])} up")
+                    if sel.get("quota_exempt"):
+                        txt = f"{txt} | quota-exempt"
+                    if self._schedule_note:
+                        txt = f"{txt} | {self._schedule_note}"
                     self.status_info.update(txt)
                 else:
-                    self.status_info.update(txt)
+                    self.status_info.update(self._schedule_note)
            
             except Exception:
                 pass
@@ -3235,6 +8063,9 @@ class TermoLoad(App):
         if event.button.id == "btn_pause_all":
             self._pause_all()
             return
+        if event.button.id == "btn_share_lan":
+            self.action_share_lan()
+            return
         if event.button.id == "button_remove_list":
             self._remove_selected_from_list()
             return
@@ -3282,6 +8113,11 @@ class TermoLoad(App):
                 shutdown_checkbox = self.query_one("#settings_shutdown", Checkbox)
                 sound_complete_checkbox = self.query_one("#settings_sound_complete", Checkbox)
                 sound_error_checkbox = self.query_one("#settings_sound_error", Checkbox)
+                try:
+                    schedule = BandwidthSchedule.parse(self.query_one("#settings_schedule", Input).value)
+                except ValueError as e:
+                    self.notify(f"Schedule not saved: {e}", severity="error")
+                    return
                 
                 self.settings["download_folder"] = folder_input.value.strip() or str(Path.home() / "Downloads")
                 try:
@@ -3292,11 +8128,18 @@ class TermoLoad(App):
                     self.settings["max_speed_kb"] = int(speed_input.value.strip() or 0)
                 except Exception:
                     self.settings["max_speed_kb"] = 0
+                self.settings["schedule"] = schedule
+                for key, widget_id in (("quota_daily_mb", "#settings_quota_daily"), ("quota_monthly_mb", "#settings_quota_monthly")):
+                    try:
+                        self.settings[key] = max(0, int(self.query_one(widget_id, Input).value.strip() or 0))
+                    except Exception:
+                        self.settings[key] = 0
                 
                 self.settings["shutdown_on_complete"] = shutdown_checkbox.value
                 self.settings["sound_on_complete"] = sound_complete_checkbox.value
                 self.settings["sound_on_error"] = sound_error_checkbox.value
                 self.save_settings()
+                self._apply_schedule()
 
             except Exception:
                 logging.exception("[TermoLoad] failed to save settings from panel")
@@ -3498,8 +8341,51 @@ class TermoLoad(App):
         lines.append("q  Quit")
         lines.append("m  Minimize to Tray")
         lines.append("o  Open Folder (for completed downloads)")
+        lines.append("+  Move the selected download up the queue (=  works too)")
+        lines.append("-  Move the selected download down the queue")
+        lines.append("c  Queue class of the selected download: normal → bulk → interactive")
+        lines.append("x  Exempt the selected download from the data quota (or count it again)")
         lines.append("Arrow keys select rows on Downloads tab")
         lines.append("")
+        lines.append("Queue Order & Classes\n---------------------")
+        lines.append("Queued HTTP downloads start in list order, so '+' and '-' decide what goes next;")
+        lines.append("the order is saved in downloads_state.json. Sites still take turns; the order")
+        lines.append("picks which of a site's downloads starts when that site's turn comes.")
+        lines.append("While they wait, queued downloads are probed in the background (a one-byte")
+        lines.append("request, 'preflight_probes' at a time in settings.json, 0 = off): their size,")
+        lines.append("the server's file name and range support show up before they start.")
+        lines.append("- interactive (Type shows 'URL·inte'): starts before all others and is never")
+        lines.append("  slowed down; the rest share what it leaves")
+        lines.append("- normal: the default, bandwidth weight 4")
+        lines.append("- bulk (Type shows 'URL·bulk'): starts last, bandwidth weight 1")
+        lines.append("")
+        lines.append("Bandwidth Sharing\n-----------------")
+        lines.append("Every second the bandwidth is divided among running HTTP, video and torrent")
+        lines.append("downloads by weight, so a torrent with hundreds of peers cannot starve the rest.")
+        lines.append("The total is 'Max download speed', or with no limit set the fastest total seen")
+        lines.append("recently, probed upwards while everyone fills their share. A download its server")
+        lines.append("keeps slower than its share gives the rest away. The Peers/Seeds column shows a download's current share ('≤1.2 MB/s');")
+        lines.append("a \"weight\" on an entry in downloads_state.json overrides its class.")
+        lines.append("")
+        lines.append("Schedules & Data Quotas\n-----------------------")
+        lines.append("Settings > 'Speed schedule' gives time windows their own speed and slot limits,")
+        lines.append("separated by ';': 'mon-fri 09:00-18:00 speed=2048 slots=1; sat,sun 22:00-06:00")
+        lines.append("speed=0'. Days are mon..sun, ranges (fri-mon), lists (sat,sun) or 'daily'; a")
+        lines.append("window ending before it starts runs past midnight; speed=0 means unlimited.")
+        lines.append("Outside every window the plain limits apply. Changes apply at once, and the")
+        lines.append("status bar shows the limits in force and when they change next.")
+        lines.append("- A daily/monthly data quota (MB) pauses running downloads once it is used up")
+        lines.append("  and resumes them when it resets (midnight / the 1st of the month)")
+        lines.append("- x: exempt the selected download from the quota; interactive ones always are")
+        lines.append("- Usage is kept in ~/.termoload_usage.json")
+        lines.append("")
+        lines.append("Disk Space\n----------")
+        lines.append("A download only starts when the rest of it fits on its drive, counting what the")
+        lines.append("downloads already running there still have to write and keeping 'disk_reserve_mb'")
+        lines.append("(settings.json, default 512) free. One that does not fit, or whose drive runs")
+        lines.append("low mid-transfer, is paused instead of failing and resumes by itself, in queue")
+        lines.append("order, once there is room. Stats shows the free space per destination drive.")
+        lines.append("")
         lines.append("Open Folder Feature\n-------------------")
         lines.append("When you select a completed download and press 'o':")
         lines.append("- Windows: Opens Explorer with the file highlighted")
@@ -3519,9 +8405,43 @@ class TermoLoad(App):
         lines.append("- Shows real-time peer/seed count and download speed")
         lines.append("- DHT, PEX, and tracker support enabled")
         lines.append("- Pause/resume works for torrents")
+        lines.append("- Stream mode (file selection dialog) downloads sequentially and serves")
+        lines.append("  the main media file at a local http://127.0.0.1 URL shown in the status bar")
+        lines.append("- Share on LAN (L) seeds a completed URL/Video download from the torrent session;")
+        lines.append("  the magnet is copied and the .torrent is saved next to the file. Other")
+        lines.append("  TermoLoad instances on the network find the seed via local service discovery")
+        lines.append("- HTTP/HTTPS mirror URLs in the Add dialog are attached as web seeds (BEP 19),")
+        lines.append("  alongside any url-list already in the .torrent")
+        lines.append("- For a plain URL, the same mirror field lists other copies of the file: they are")
+        lines.append("  raced briefly, then share the byte ranges; a slow or failing mirror's ranges move")
+        lines.append("  to the faster ones ('3 src' in the Peers/Seeds column)")
         lines.append("")
         lines.append("Supported Download Types\n------------------------")
         lines.append("✓ HTTP/HTTPS direct downloads (with resume support)")
+        lines.append("  An expected checksum (sha256:/sha1:/md5:<hex> or a SHA256SUMS URL) in the Add")
+        lines.append("  dialog is verified while the file is written; no second read afterwards")
+        lines.append("  Partial files keep a .tlmap block map; on resume damaged blocks are re-fetched")
+        lines.append("  by Range instead of trusting the file size")
+        lines.append("  Resume sends If-Range, so a file that changed on the server restarts cleanly;")
+        lines.append("  resuming a Completed download keeps the file when the server answers 304")
+        lines.append("  Large files from hosts that honor Range use several connections (settings.json")
+        lines.append("  'http_connections', default 4); what each host supports and how fast it was is")
+        lines.append("  remembered in ~/.termoload_hosts.json and used to pick the strategy next time")
+        lines.append("  A connection that falls behind has its remaining bytes split onto a new one, and")
+        lines.append("  one that sends nothing for 'stall_timeout' seconds (default 20) is reconnected")
+        lines.append("  Network errors, 5xx and 429/503 are retried from the current byte with a growing,")
+        lines.append("  randomized delay (or the server's Retry-After), up to 'http_retries' (default 8)")
+        lines.append("  times in a row without progress; 404 and other 4xx fail at once. A host failing")
+        lines.append("  repeatedly is paused for all downloads for a while before one request probes it")
+        lines.append("  'Concurrent downloads' (Settings) HTTP downloads run at once; the rest wait as")
+        lines.append("  Queued and start in turn, one host after another, so a big batch from one site")
+        lines.append("  does not hold up the others. Each host gets at most 'per_host_connections'")
+        lines.append("  (settings.json, default 4) connections across all its downloads; 'host_limits'")
+        lines.append("  sets it per site, e.g. {\"example.com\": 2} (subdomains included). The Peers/Seeds")
+        lines.append("  column shows a download's host as 'used/limit conn'; Stats lists every host")
+        lines.append("✓ Metalinks (.meta4 / .metalink URL or file): every listed file is downloaded")
+        lines.append("  from its mirrors at once; published piece hashes are checked as each piece lands,")
+        lines.append("  so only a bad piece is fetched again, and the whole-file hash is verified too")
         lines.append("✓ YouTube videos (requires yt-dlp)")
         lines.append("✓ Torrents (magnet links, .torrent files)")
         lines.append("")
@@ -3531,9 +8451,11 @@ class TermoLoad(App):
         lines.append("- 'Connecting...' - Searching for peers")
         lines.append("- 'Waiting...' - Torrent queued but not started")
         lines.append("- '--' - Not a torrent (URL/Video download)")
+        lines.append("- URL downloads with a checksum: 'sha256 80 MB/s' while hashing, then ✓ or ✗")
+        lines.append("- With web seeds: 'P:' is swarm throughput, 'W:' is web-seed throughput")
         lines.append("")
         lines.append("Common statuses\n----------------")
-        lines.append("Downloading  Transfer in progress\nPaused       Task paused or canceled\nQueued       Waiting to start\nCompleted    Finished successfully\nProcessing   Video post-processing (yt-dlp/ffmpeg)")
+        lines.append("Downloading  Transfer in progress\nPaused       Task paused or canceled\nQueued       Waiting to start\nRetrying     Temporary error; retrying after the countdown in the ETA column\nCompleted    Finished successfully\nProcessing   Video post-processing (yt-dlp/ffmpeg)\nVerifying    Checking data on disk (resume integrity map or final checksum)")
         lines.append("")
         lines.append("Notification Sounds\n-------------------")
         lines.append("TermoLoad can play sounds when downloads complete or encounter errors.")
@@ -3780,6 +8702,63 @@ class TermoLoad(App):
             pass
         return out
 
+    @staticmethod
+    def _type_label(d: dict) -> str:
+        """Type column: the download type, tagged with its queue class unless it is normal."""
+        qos = d.get("qos") or "normal"
+        return d.get("type", "") if qos == "normal" else f"{d.get('type', '')}·{qos[:4]}"
+
+    def _format_peers_seeds(self, d: dict) -> str:
+        """Peers/Seeds cell; torrents with web seeds also show swarm vs web-seed throughput.
+
+        HTTP downloads show how many sources are feeding them when mirrors
+        joined, and the checksum state with hashing throughput while the
+        file streams in.
+        """
+        if d.get("type") != "Torrent":
+            parts = []
+            if d.get("source_count"):
+                parts.append(f"{d['source_count']} src")
+            if d.get("type") == "URL" and d.get("url") and d.get("status") in ("Downloading", "Queued", "Retrying"):
+                try:
+                    scheduler = self.downloader.scheduler
+                    host = HostProfiles.host_of(d["url"])
+                    parts.append(f"{scheduler.conns.get(host, 0)}/{scheduler.limit(host)} conn")
+                except Exception:
+                    pass
+            share = self.downloader.bandwidth.share(d.get("id"))
+            if share:
+                parts.append(f"≤{self.downloader.format_speed(share)}")
+            state = d.get("checksum_state")
+            algo = d.get("checksum_algo") or ""
+            if state == "hashing":
+                parts.append(f"{algo} {self.downloader.format_speed(d.get('hash_rate', 0) or 0)}")
+            elif state == "verified":
+                parts.append(f"{algo} ✓")
+            elif state == "mismatch":
+                parts.append(f"{algo} ✗")
+            elif state == "unavailable":
+                parts.append("sum ?")
+            return " ".join(parts) or "--"
+        status = d.get("status", "")
+        peers = d.get("peers", 0) or 0
+        seeds = d.get("seeds", 0) or 0
+        if peers > 0 or seeds > 0:
+            text = f"{peers}↓/{seeds}↑"
+        elif status == "Pending":
+            text = "Waiting..."
+        elif status == "Downloading":
+            text = "Connecting..."
+        else:
+            text = "--"
+        if d.get("web_seeds"):
+            fmt = self.downloader.format_speed
+            text += f" P:{fmt(d.get('peer_rate', 0) or 0)} W:{fmt(d.get('web_seed_rate', 0) or 0)}"
+        share = self.downloader.bandwidth.share(d.get("id"))
+        if share:
+            text += f" ≤{self.downloader.format_speed(share)}"
+        return text
+
     def _explain_status(self, status: str) -> str:
         if not status:
             return ""
@@ -3806,15 +8785,27 @@ class TermoLoad(App):
                 "502": "Bad Gateway – Upstream server error.",
                 "503": "Service Unavailable – Server overloaded or down; retry later.",
                 "504": "Gateway Timeout – Upstream timeout; retry later.",
+                "Checksum": "Checksum mismatch – The file doesn't match the expected digest; resume to download it again.",
+                "Stalled": "Stalled – The server stopped sending data and reconnecting did not help; resume to try again.",
             }
             tips = mapping.get(code, "Unknown error – check logs for details.")
             return f"{s} — {tips}"
         elif s == "Processing":
             return "Processing – Finishing up video merge (yt-dlp/ffmpeg)."
+        elif s in ("Fetching Metadata", "Resolving Metadata"):
+            return f"{s} – Waiting for torrent metadata from peers/DHT; other downloads are not blocked."
+        elif s == "Verifying":
+            return "Verifying – Checking data on disk (integrity map on resume, checksum when finished)."
+        elif s == "Expanding Playlist":
+            return "Expanding Playlist – Listing the videos; each one gets its own row."
+        elif s == "Reading Metalink":
+            return "Reading Metalink – Loading the file list, mirrors and piece hashes."
+        elif s == "Retrying":
+            return "Retrying – A temporary error (network, 5xx, 429/503); the download continues from where it stopped after the countdown."
         elif s == "Paused":
             return "Paused – Use 'Resume Selected' to continue."
         elif s == "Queued":
-            return "Queued – Waiting for a free slot to start."
+            return "Queued – Waiting for a free slot ('Concurrent downloads', or this site's connection limit)."
         elif s == "Downloading":
             return "Downloading – Transfer in progress."
         elif s == "Completed":
@@ -3859,6 +8850,7 @@ class TermoLoad(App):
                     main_path.with_suffix(main_path.suffix + ".part"),
                     main_path.with_suffix(main_path.suffix + ".ytdl"),
                     main_path.with_suffix(main_path.suffix + ".temp"),
+                    Path(str(main_path) + ".tlmap"),
                 ]
                 for p in candidates:
                     try:
@@ -3885,12 +8877,21 @@ class TermoLoad(App):
 
     def _remove_download_entry(self, download_id: int) -> None:
         try:
+            self.downloader.stop_lan_share(download_id)
+            self.downloader.drop_ytdlp_info_cache(download_id)
             task = self.download_tasks.pop(download_id, None)
             if task and not task.done():
                 try:
                     task.cancel()
                 except Exception:
                     pass
+            # Drop a handle still parked while resolving metadata
+            temp_handle = self.downloader.torrent_handles.pop(f"temp_{download_id}", None)
+            if temp_handle and self.downloader.torrent_session:
+                try:
+                    self.downloader.torrent_session.remove_torrent(temp_handle)
+                except Exception:
+                    pass
             idx = None
             row_key = None
             for i, item in enumerate(self.downloads):
@@ -3939,7 +8940,8 @@ class TermoLoad(App):
             # User cancelled
             self.notify("Delete cancelled.", severity="information")
 
-    def _handle_torrent_file_selection(self, result: Optional[dict], download_id: int, custom_path: str, url: str, name: str, d_type: str) -> None:
+    def _handle_torrent_file_selection(self, result: Optional[dict], download_id: int, custom_path: str, url: str, name: str, d_type: str,
+                                       mirrors: Optional[List[str]] = None) -> None:
         """Handle the result from TorrentFileSelectModal and create download entry."""
         try:
             if not result:
@@ -3955,10 +8957,12 @@ class TermoLoad(App):
                 self.notify("Torrent download cancelled", severity="information")
                 return
             
-            selected_files = result.get("selected_files", [])
+            file_priorities = result.get("file_priorities")
+            selected_count = result.get("selected_count", 0)
             torrent_info = result.get("torrent_info", {})
+            streaming = bool(result.get("streaming", False))
             
-            logging.info(f"[TermoLoad] User selected {len(selected_files)} files from torrent")
+            logging.info(f"[TermoLoad] User selected {selected_count} files from torrent")
             
             # Update name from torrent info
             torrent_name = torrent_info.get("name", name)
@@ -3975,7 +8979,9 @@ class TermoLoad(App):
                 "status": "Queued",
                 "eta": "--",
                 "peers": 0,
-                "seeds": 0
+                "seeds": 0,
+                "streaming": streaming,
+                "mirrors": list(mirrors or [])
             }
             
             # Add to table
@@ -4034,11 +9040,12 @@ class TermoLoad(App):
             
             # Create the download task with file selection
             task = asyncio.create_task(
-                self.downloader.download_torrent(url, download_id, custom_path, selected_files)
+                self.downloader.download_torrent(url, download_id, custom_path, streaming=streaming,
+                                                 file_priorities=file_priorities, mirrors=mirrors)
             )
             self.download_tasks[download_id] = task
             
-            self.notify(f"Starting download: {len(selected_files)} of {torrent_info.get('num_files', 0)} files", severity="information")
+            self.notify(f"Starting download: {selected_count} of {torrent_info.get('num_files', 0)} files", severity="information")
             logging.info(f"[TermoLoad] Created asyncio task for selective torrent download {download_id}")
             
         except Exception:
@@ -4061,6 +9068,12 @@ class TermoLoad(App):
         except Exception:
             pass
         # If it's a torrent, attempt to stop/remove the torrent handle so files can be deleted
+        try:
+            if did in self.downloader.lan_shares:
+                self.downloader.stop_lan_share(did)
+                await asyncio.sleep(0.2)
+        except Exception:
+            pass
         try:
             d_type = d.get("type")
             if d_type == "Torrent":
@@ -4102,6 +9115,8 @@ class TermoLoad(App):
             d = next((x for x in self.downloads if x.get("id") == download_id), None)
             if d and d.get("type") == "Torrent":
                 self.downloader.pause_torrent(download_id)
+            elif d and d.get("type") == "Video":
+                self.downloader.stop_ytdlp(download_id)
             task = self.download_tasks.get(download_id)
             if task and not task.done():
                 task.cancel()
@@ -4113,6 +9128,8 @@ class TermoLoad(App):
             for d in self.downloads:
                 if d.get("id") == download_id:
                     d["status"] = "Paused"
+                    d.pop("quota_paused", None)
+                    d.pop("disk_paused", None)
                     break
             self.save_downloads_state()
         except Exception:
@@ -4123,6 +9140,8 @@ class TermoLoad(App):
             d = next((x for x in self.downloads if x.get("id") == download_id), None)
             if not d:
                 return
+            d.pop("quota_paused", None)
+            d.pop("disk_paused", None)
             t = self.download_tasks.get(download_id)
             if t and not t.done():
                 return
@@ -4130,8 +9149,18 @@ class TermoLoad(App):
             name = d.get("name")
             save_path = d.get("path") or "downloads"
 
+            if d.get("children"):
+                self.download_tasks[download_id] = asyncio.create_task(self._run_playlist_group(download_id, resume=True))
+                return
+
             try:
-                if d.get("status") == "Completed":
+                fp = d.get("filepath")
+                if (d.get("status") == "Completed" and d.get("type") == "URL" and fp and Path(fp).exists()
+                        and (d.get("etag") or d.get("last_modified"))):
+                    # Keep the file; download_file asks the server and only refetches if it changed.
+                    d["revalidate"] = True
+                # A file that failed its checksum is complete on disk; start it over as well.
+                elif d.get("status") == "Completed" or d.get("checksum_state") == "mismatch":
                     fp = d.get("filepath")
                     if fp:
                         try:
@@ -4140,7 +9169,7 @@ class TermoLoad(App):
                             pass
                     else:
                         try:
-                            derived = Path(save_path) / (name or f"download_{download_id}")
+                            derived = Path(save_path) / (d.get("filename") or name or f"download_{download_id}")
                             derived.unlink(missing_ok=True)
                         except Exception:
                             pass
@@ -4156,11 +9185,17 @@ class TermoLoad(App):
             d["status"] = "Queued"
             if d.get("type") == "Torrent":
                logging.info(f"[TermoLoad] Starting Torrent Download :{name}")
-               task = asyncio.create_task(self.downloader.download_torrent(url, download_id, save_path))
+               task = asyncio.create_task(self.downloader.download_torrent(
+                   url, download_id, save_path,
+                   streaming=bool(d.get("streaming")), stream_file=d.get("stream_file"),
+                   mirrors=d.get("mirrors")
+               ))
             elif d.get("type") == "Video":
                 task = asyncio.create_task(self.downloader.download_with_ytdlp(url, download_id, save_path, None))
+            elif d.get("type") == "Metalink":
+                task = asyncio.create_task(self._expand_metalink(download_id, url, save_path))
             else:
-                task = asyncio.create_task(self.downloader.download_file(url, download_id, name, save_path))
+                task = asyncio.create_task(self.downloader.download_file(url, download_id, d.get("filename") or name, save_path))
             self.download_tasks[download_id] = task
             self.save_downloads_state()
         except Exception:
@@ -4209,6 +9244,8 @@ class TermoLoad(App):
                 
                 url = result.get("url", "").strip()
                 custom_path = result.get("path", "").strip()
+                mirrors = result.get("mirrors") or []
+                checksum = (result.get("checksum") or "").strip()
                 
                 if not url:
                     self.notify("Invalid URL provided", severity="warning")
@@ -4250,6 +9287,8 @@ class TermoLoad(App):
                             d_type = "Video"
                     except Exception:
                         pass
+                    if d_type == "URL" and _is_metalink(url):
+                        d_type = "Metalink"
 
                     if url.startswith(("http://", "https://")):
                         name = os.path.basename(urlparse(url).path) or f"download_{new_id}"
@@ -4277,7 +9316,7 @@ class TermoLoad(App):
                         
                         logging.info(f"[TermoLoad] Torrent info received: {torrent_info is not None}")
                         if torrent_info:
-                            logging.info(f"[TermoLoad] Torrent has {len(torrent_info.get('files', []))} files")
+                            logging.info(f"[TermoLoad] Torrent has {torrent_info.get('num_files', 0)} files")
                         
                         if not torrent_info:
                             self.notify("Failed to fetch torrent information", severity="error")
@@ -4288,7 +9327,7 @@ class TermoLoad(App):
                         logging.info(f"[TermoLoad] About to show TorrentFileSelectModal...")
                         def handle_file_selection(result):
                             logging.info(f"[TermoLoad] File selection callback triggered with result: {result is not None}")
-                            self._handle_torrent_file_selection(result, new_id, custom_path, url, name, d_type)
+                            self._handle_torrent_file_selection(result, new_id, custom_path, url, name, d_type, mirrors)
                         
                         self.push_screen(TorrentFileSelectModal(torrent_info), handle_file_selection)
                         logging.info(f"[TermoLoad] TorrentFileSelectModal pushed to screen")
@@ -4313,6 +9352,10 @@ class TermoLoad(App):
                     "peers": 0,
                     "seeds": 0
                 }
+                if d_type == "URL" and checksum:
+                    new_entry["checksum"] = checksum
+                if d_type == "URL" and mirrors:
+                    new_entry["mirrors"] = list(mirrors)
                 
                 logging.info(f"[TermoLoad] on_screen_dismissed: new_entry={new_entry}")
                 peers_seeds = "Waiting..." if d_type == "Torrent" else "--"
@@ -4385,6 +9428,12 @@ class TermoLoad(App):
                         logging.info(f"[TermoLoad] Created asyncio task for download {new_id}")
                     except Exception as ex:
                         logging.exception(f"[TermoLoad] Failed to create task: {ex}")
+                elif d_type == "Metalink":
+                    logging.info(f"[TermoLoad] Reading metalink {new_id} -> {url} -> {custom_path}")
+                    try:
+                        self.download_tasks[new_id] = asyncio.create_task(self._expand_metalink(new_id, url, custom_path))
+                    except Exception as ex:
+                        logging.exception(f"[TermoLoad] Failed to create metalink task: {ex}")
                 elif d_type == "Video":
                     logging.info(f"[TermoLoad] Queuing yt-dlp download {new_id} -> {url} -> {custom_path}")
                     try:
@@ -4392,10 +9441,7 @@ class TermoLoad(App):
                                 if item.get("id") == new_id:
                                     item["name"] = item.get("name") or "(resolving title...)"
                                     break
-                        task = asyncio.create_task(
-                            self.downloader.download_with_ytdlp(url, new_id, custom_path, None)
-                        )
-                        self.download_tasks[new_id] = task
+                        self._start_video_download(new_id, url, custom_path)
                         logging.info(f"[TermoLoad] Created asyncio task for yt-dlp download {new_id}")
                     except Exception as ex:
                             logging.exception(f"[TermoLoad] Failed to create yt-dlp task: {ex}")
@@ -4442,7 +9488,7 @@ class TermoLoad(App):
                 return
 
             all_completed = all(d.get("status") == "Completed" for d in self.downloads)
-            active = [d for d in self.downloads if d.get("status") in ("Downloading", "Queued")]
+            active = [d for d in self.downloads if d.get("status") in ("Downloading", "Queued", "Retrying")]
             if active:
                 self._previous_had_active = True
                 self._shutdown_triggered = False
@@ -4471,6 +9517,324 @@ class TermoLoad(App):
             logging.exception("[TermoLoad] maybe_trigger_shutdown unexpected error")
     
     
+    def _start_video_download(self, download_id: int, url: str, custom_path: str) -> None:
+        if RealDownloader.is_playlist_url(url):
+            task = asyncio.create_task(self._expand_playlist(download_id, url, custom_path))
+        else:
+            task = asyncio.create_task(self.downloader.download_with_ytdlp(url, download_id, custom_path, None))
+        self.download_tasks[download_id] = task
+
+    async def _expand_playlist(self, group_id: int, url: str, custom_path: str) -> None:
+        """Turn a playlist/channel row into a group with one child download per video.
+
+        Children share the yt-dlp worker slots, so at most ``video_workers``
+        run at once and the rest wait as Queued.
+        """
+        group = next((x for x in self.downloads if x.get("id") == group_id), None)
+        if group is None:
+            return
+        group["status"] = "Expanding Playlist"
+        try:
+            listing = await self.downloader.expand_playlist(url)
+        except asyncio.CancelledError:
+            group["status"] = "Paused"
+            raise
+        except Exception as e:
+            logging.exception(f"[TermoLoad] Playlist expansion failed for {url}")
+            group["status"] = f"Error: {str(e)[:80]}"
+            return
+        if not listing:
+            await self.downloader.download_with_ytdlp(url, group_id, custom_path, None)
+            return
+        if not listing["entries"]:
+            group["status"] = "Error: Playlist is empty"
+            return
+
+        child_ids = []
+        for entry in listing["entries"]:
+            cid = len(self.downloads) + 1
+            child = {
+                "id": cid,
+                "type": "Video",
+                "name": f"↳ {entry['title']}",
+                "url": entry["url"],
+                "path": custom_path,
+                "progress": 0.0,
+                "speed": "0 B/s",
+                "status": "Queued",
+                "eta": "--",
+                "group_id": group_id,
+                "qos": group.get("qos", "normal"),
+                "quota_exempt": bool(group.get("quota_exempt", False))
+            }
+            try:
+                child["row_key"] = self.downloads_table.add_row(
+                    str(cid), "Video", child["name"], "0.00%", "0 B/s", "--", "Queued", "--"
+                )
+            except Exception:
+                child["row_key"] = None
+            self.downloads.append(child)
+            child_ids.append(cid)
+            self.download_tasks[cid] = asyncio.create_task(
+                self.downloader.download_with_ytdlp(entry["url"], cid, custom_path, None)
+            )
+        group["name"] = f"{listing['title']} [{len(child_ids)} videos]"
+        group["children"] = child_ids
+        self.save_downloads_state()
+        self.notify(f"Playlist expanded into {len(child_ids)} videos", severity="information")
+        await self._run_playlist_group(group_id)
+
+    async def _expand_metalink(self, group_id: int, url: str, custom_path: str) -> None:
+        """Turn a metalink row into downloads of the files it lists.
+
+        A single file becomes a regular URL download in place; several
+        become a group like a playlist, one child row per file. Each file
+        takes its mirrors, checksum and piece hashes along to the HTTP engine.
+        """
+        group = next((x for x in self.downloads if x.get("id") == group_id), None)
+        if group is None:
+            return
+        group["status"] = "Reading Metalink"
+        try:
+            files = await self.downloader.read_metalink(url)
+        except asyncio.CancelledError:
+            group["status"] = "Paused"
+            raise
+        except Exception as e:
+            logging.exception(f"[TermoLoad] Metalink import failed for {url}")
+            group["status"] = f"Error: {str(e)[:80]}"
+            return
+        files = [f for f in files if f["urls"]]
+        if not files:
+            group["status"] = "Error: Metalink lists no HTTP sources"
+            return
+
+        if len(files) == 1:
+            self._apply_metalink_file(group, files[0], custom_path)
+            group["name"] = group["filename"]
+            group["type"] = "URL"
+            self.save_downloads_state()
+            await self.downloader.download_file(group["url"], group_id, group["filename"], group["path"])
+            return
+
+        child_ids = []
+        for f in files:
+            cid = len(self.downloads) + 1
+            child = {
+                "id": cid,
+                "type": "URL",
+                "progress": 0.0,
+                "speed": "0 B/s",
+                "status": "Queued",
+                "eta": "--",
+                "group_id": group_id,
+                "qos": group.get("qos", "normal"),
+                "quota_exempt": bool(group.get("quota_exempt", False))
+            }
+            self._apply_metalink_file(child, f, custom_path)
+            child["name"] = f"↳ {f['name']}"
+            try:
+                child["row_key"] = self.downloads_table.add_row(
+                    str(cid), "URL", child["name"], "0.00%", "0 B/s", "--", "Queued", "--"
+                )
+            except Exception:
+                child["row_key"] = None
+            self.downloads.append(child)
+            child_ids.append(cid)
+            self.download_tasks[cid] = asyncio.create_task(
+                self.downloader.download_file(child["url"], cid, child["filename"], child["path"])
+            )
+        stem = Path(urlparse(url).path if url.startswith(("http://", "https://")) else url).stem or "metalink"
+        group["name"] = f"{stem} [{len(child_ids)} files]"
+        group["children"] = child_ids
+        self.save_downloads_state()
+        self.notify(f"Metalink expanded into {len(child_ids)} files", severity="information")
+        await self._run_playlist_group(group_id)
+
+    @staticmethod
+    def _apply_metalink_file(entry: Dict[str, Any], f: Dict[str, Any], custom_path: str) -> None:
+        """Fill a download record from one parsed metalink ``<file>``."""
+        folder, _, filename = f["name"].rpartition("/")
+        entry["url"] = f["urls"][0]
+        entry["mirrors"] = f["urls"][1:]
+        entry["filename"] = filename
+        entry["path"] = str(Path(custom_path or "downloads") / folder) if folder else custom_path
+        if f.get("checksum"):
+            entry["checksum"] = f["checksum"]
+        if f.get("pieces"):
+            entry["pieces"] = f["pieces"]
+        if f.get("size"):
+            entry["total_size"] = f["size"]
+
+    async def _run_playlist_group(self, group_id: int, resume: bool = False) -> None:
+        """Mirror a playlist (or multi-file metalink) group's children onto its row until they all stop."""
+        group = next((x for x in self.downloads if x.get("id") == group_id), None)
+        if group is None:
+            return
+        child_ids = list(group.get("children") or [])
+        if resume:
+            for cid in child_ids:
+                child = next((x for x in self.downloads if x.get("id") == cid), None)
+                if child is not None and child.get("status") != "Completed":
+                    self._resume_download(cid)
+        try:
+            while True:
+                children = [x for x in self.downloads if x.get("id") in child_ids]
+                if not children:
+                    break
+                done = sum(1 for c in children if c.get("status") == "Completed")
+                group["progress"] = sum(float(c.get("progress") or 0) for c in children) / len(children)
+                group["eta"] = f"{done}/{len(children)} done"
+                running = [c for c in children if self.download_tasks.get(c["id"]) and not self.download_tasks[c["id"]].done()]
+                if not running:
+                    failed = sum(1 for c in children if str(c.get("status", "")).startswith("Error"))
+                    if done == len(children):
+                        group["status"] = "Completed"
+                        group["progress"] = 1.0
+                    elif failed:
+                        noun = "files" if group.get("type") == "Metalink" else "videos"
+                        group["status"] = f"Error: {failed} of {len(children)} {noun} failed"
+                    else:
+                        group["status"] = "Paused"
+                    break
+                group["status"] = "Downloading"
+                await asyncio.sleep(1.0)
+        except asyncio.CancelledError:
+            for cid in child_ids:
+                self._pause_download(cid)
+            group["status"] = "Paused"
+        try:
+            self.save_downloads_state()
+        except Exception:
+            pass
+
+    def _ingest_bulk(self, entries: List[str], custom_path: str) -> None:
+        """Add several sources in one go.
+
+        Torrents get their rows immediately and share one concurrent metadata
+        fetch (see ``_bulk_add_torrents``); everything else goes through the
+        regular single-URL path.
+        """
+        torrent_items = []
+        for url in entries:
+            url = url.strip()
+            if not url:
+                continue
+            is_torrent = url.startswith("magnet:") or url.lower().endswith(".torrent")
+            if not is_torrent:
+                self.process_modal_result({"url": url, "path": custom_path})
+                continue
+            if not LIBTORRENT_AVAILABLE:
+                self.notify(
+                    "Torrent downloads unavailable. Install Visual C++ Redistributables.",
+                    severity="error",
+                    timeout=5
+                )
+                logging.error("[TermoLoad] Cannot bulk add torrent - libtorrent not available")
+                return
+
+            new_id = len(self.downloads) + 1
+            if os.path.isfile(url):
+                name = os.path.basename(url)
+            elif url.startswith("magnet:"):
+                name = RealDownloader.extract_magnet_name(url) or f"magnet_torrent_{new_id}"
+            else:
+                name = os.path.basename(urlparse(url).path) or f"torrent_{new_id}"
+
+            new_entry = {
+                "id": new_id,
+                "type": "Torrent",
+                "name": name,
+                "url": url,
+                "path": custom_path,
+                "progress": 0.0,
+                "speed": "0 B/s",
+                "status": "Fetching Metadata",
+                "eta": "--",
+                "peers": 0,
+                "seeds": 0
+            }
+            try:
+                new_entry["row_key"] = self.downloads_table.add_row(
+                    str(new_id), "Torrent", name, "0.00%", "0 B/s", "Waiting...", new_entry["status"], "--"
+                )
+            except Exception:
+                logging.exception("[TermoLoad] _ingest_bulk: failed to add row to table")
+                new_entry["row_key"] = len(self.downloads)
+            self.downloads.append(new_entry)
+            torrent_items.append({"id": new_id, "url": url, "path": custom_path})
+
+        try:
+            self.save_downloads_state()
+        except Exception:
+            pass
+        try:
+            self.downloads_table.visible = True
+            self.downloads_table.display = True
+            self.downloads_toolbar.visible = True
+            self.downloads_toolbar.display = True
+            self.status_info.visible = True
+            self.status_info.display = True
+            self.no_downloads.visible = False
+            self.no_downloads.display = False
+        except Exception:
+            pass
+
+        if torrent_items:
+            asyncio.create_task(self._bulk_add_torrents(torrent_items))
+
+    async def _bulk_add_torrents(self, items: List[Dict[str, Any]]) -> None:
+        """Resolve metadata for a batch of torrents under one shared deadline.
+
+        Torrents whose metadata arrives in time start right away; the rest stay
+        in the session and are started by a background resolver task, so the
+        UI never waits on a single slow magnet.
+        """
+        try:
+            try:
+                timeout = float(self.settings.get("bulk_metadata_timeout", 60) or 60)
+            except Exception:
+                timeout = 60.0
+            self.notify(f"Resolving metadata for {len(items)} torrents...", severity="information")
+            result = await self.downloader.add_torrents_bulk(items, timeout=timeout)
+            by_id = {it["id"]: it for it in items}
+
+            for did in result["ready"]:
+                it = by_id[did]
+                task = asyncio.create_task(self.downloader.download_torrent(it["url"], did, it["path"]))
+                self.download_tasks[did] = task
+
+            for did in result["pending"]:
+                it = by_id[did]
+                self.downloader.update_download_progress(did, 0.0, 0, 0, "Resolving Metadata")
+                task = asyncio.create_task(self._resolve_then_download(it["url"], did, it["path"]))
+                self.download_tasks[did] = task
+
+            for did in result["failed"]:
+                self.downloader.update_download_progress(did, 0.0, 0, 0, "Error: Cannot add torrent")
+
+            self.notify(
+                f"Bulk add: {len(result['ready'])} started, {len(result['pending'])} resolving in background, "
+                f"{len(result['failed'])} failed",
+                severity="information" if not result["failed"] else "warning",
+                timeout=6
+            )
+            self.save_downloads_state()
+        except Exception:
+            logging.exception("[TermoLoad] _bulk_add_torrents failed")
+
+    async def _resolve_then_download(self, url: str, download_id: int, custom_path: str) -> bool:
+        try:
+            if not await self.downloader.wait_for_metadata(download_id):
+                self.downloader.update_download_progress(download_id, 0.0, 0, 0, "Error: Metadata unavailable")
+                return False
+            logging.info(f"[TermoLoad] Background metadata resolved for torrent {download_id}")
+        except asyncio.CancelledError:
+            # The handle stays parked as temp_<id>; resuming picks it up again
+            self.downloader.update_download_progress(download_id, 0.0, 0, 0, "Paused")
+            return False
+        return await self.downloader.download_torrent(url, download_id, custom_path)
+
     def process_modal_result(self, result: dict):
         try:
             logging.info(f"[TermoLoad] process_modal_result called with: {result}")
@@ -4480,6 +9844,8 @@ class TermoLoad(App):
 
             url = result.get('url')
             custom_path = result.get('path')
+            mirrors = result.get('mirrors') or []
+            checksum = (result.get('checksum') or "").strip()
 
             new_id = len(self.downloads) + 1
             is_torrent =(
@@ -4500,6 +9866,8 @@ class TermoLoad(App):
                     d_type = "Video"
             except Exception:
                 pass
+            if d_type == "URL" and _is_metalink(url):
+                d_type = "Metalink"
 
             if url.startswith(("http://", "https://")):
                 name = os.path.basename(urlparse(url).path) or f"download_{new_id}"
@@ -4517,6 +9885,10 @@ class TermoLoad(App):
                 "status": "Queued" if d_type != "Torrent" else "Pending",
                 "eta": "--"
             }
+            if d_type in ("Torrent", "URL") and mirrors:
+                new_entry["mirrors"] = list(mirrors)
+            if d_type == "URL" and checksum:
+                new_entry["checksum"] = checksum
 
             logging.info(f"[TermoLoad] process_modal_result: appending new_entry {new_entry}")
             try:
@@ -4578,7 +9950,7 @@ class TermoLoad(App):
                                 d["status"] = "Queued"
                                 break
                         task = asyncio.create_task(
-                            self.downloader.download_torrent(url, new_id, custom_path)
+                            self.downloader.download_torrent(url, new_id, custom_path, mirrors=mirrors)
                         )
                         self.download_tasks[new_id] = task
                         logging.info(f"[TermoLoad] process_modal_result: Created asyncio task for torrent {new_id}")
@@ -4594,6 +9966,12 @@ class TermoLoad(App):
                     logging.info(f"[TermoLoad] process_modal_result: Created asyncio task for download {new_id}")
                 except Exception as ex:
                     logging.exception(f"[TermoLoad] process_modal_result: Failed to create task: {ex}")
+            elif d_type == "Metalink":
+                logging.info(f"[TermoLoad] process_modal_result: Reading metalink {new_id} -> {url} -> {custom_path}")
+                try:
+                    self.download_tasks[new_id] = asyncio.create_task(self._expand_metalink(new_id, url, custom_path))
+                except Exception as ex:
+                    logging.exception(f"[TermoLoad] process_modal_result: Failed to create metalink task: {ex}")
             
             elif d_type == "Video":
                 logging.info(f"[TermoLoad] process_modal_result: Queuing yt-dlp download {new_id} -> {url} -> {custom_path}")
@@ -4602,10 +9980,7 @@ class TermoLoad(App):
                         if item.get("id") == new_id:
                                 item["name"] = item.get("name") or "(resolving title...)"
                                 break
-                    task = asyncio.create_task(
-                        self.downloader.download_with_ytdlp(url, new_id, custom_path, None)
-                    )
-                    self.download_tasks[new_id] = task
+                    self._start_video_download(new_id, url, custom_path)
                     logging.info(f"[TermoLoad] process_modal_result: Created asyncio task for yt-dlp download {new_id}")
                 except Exception as ex:
                     logging.exception(f"[TermoLoad] process_modal_result: Failed to create yt-dlp task: {ex}")
@@ -4619,7 +9994,7 @@ class TermoLoad(App):
             TkinterDialogHelper.cleanup()
             
             for d in self.downloads:
-                if d.get("status") in ("Downloading", "Queued"):
+                if d.get("status") in ("Downloading", "Queued", "Retrying"):
                     d["status"] = "Paused"
             self.save_downloads_state(force=True)
         except Exception as e:
@@ -4629,6 +10004,8 @@ class TermoLoad(App):
         for task in self.download_tasks.values():
             if not task.done():
                 task.cancel()
+        for did in list(self.downloader._ytdlp_procs):
+            self.downloader.stop_ytdlp(did, force=True)
         
         # Clean up torrent session
         try:
@@ -4664,6 +10041,12 @@ class TermoLoad(App):
         except Exception:
             logging.exception("[TermoLoad] Failed to cleanup torrent session")
         
+        try:
+            if self.downloader.stream_server is not None:
+                await self.downloader.stream_server.stop()
+        except Exception:
+            logging.exception("[TermoLoad] Failed to stop stream server")
+
         # Close HTTP session
         await self.downloader.close_session()
         
@@ -4717,7 +10100,25 @@ class TermoLoad(App):
                         "total_size": int(d.get("total_size", 0) or 0),
                         "filepath": d.get("filepath", ""),
                         "peers": d.get("peers", 0),
-                        "seeds":d.get("seeds", 0)
+                        "seeds":d.get("seeds", 0),
+                        "streaming": bool(d.get("streaming", False)),
+                        "stream_file": d.get("stream_file"),
+                        "mirrors": d.get("mirrors", []),
+                        "lan_share": d.get("lan_share"),
+                        "group_id": d.get("group_id"),
+                        "children": d.get("children"),
+                        "checksum": d.get("checksum"),
+                        "checksum_state": d.get("checksum_state"),
+                        "checksum_algo": d.get("checksum_algo"),
+                        "etag": d.get("etag"),
+                        "last_modified": d.get("last_modified"),
+                        "filename": d.get("filename"),
+                        "pieces": d.get("pieces"),
+                        "qos": d.get("qos", "normal"),
+                        "weight": d.get("weight"),
+                        "quota_exempt": bool(d.get("quota_exempt", False)),
+                        "quota_paused": bool(d.get("quota_paused", False)),
+                        "disk_paused": bool(d.get("disk_paused", False))
                     }
                     for d in self.downloads
                 ]
@@ -4768,7 +10169,7 @@ class TermoLoad(App):
                     continue
                 d["status"] = "Queued"
                 url = d.get("url")
-                name = d.get("name")
+                name = d.get("filename") or d.get("name")
                 save_path = d.get("path") or "downloads"
                 did = d.get("id")
                 task = asyncio.create_task(self.downloader.download_file(url, did, name, save_path))
@@ -4778,6 +10179,10 @@ class TermoLoad(App):
 
         
 if __name__ == "__main__":
+    # yt-dlp jobs run in spawned worker processes; needed for the frozen exe
+    import multiprocessing
+    multiprocessing.freeze_support()
+
     # Show loading screen first
     loading = LoadingScreen()
     loading.run()
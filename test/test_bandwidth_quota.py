@@ -0,0 +1,55 @@
+import asyncio
+import logging
+import time
+
+from app import BandwidthAllocator
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s', force=True)
+
+RATE = 1_000_000
+
+
+async def idle_then_report():
+    """A transfer reported after a long idle stretch counts only its own time toward the quota."""
+    ba = BandwidthAllocator()
+    ba._stamp = time.monotonic() - 3600  # created an hour ago, nothing registered since
+    ba.register(1, lambda: 4.0, apply=lambda bps: None)
+    ba.report(1, RATE)
+    await asyncio.sleep(1.2)
+    logging.info(f"TEST: idle then report moved={ba.moved:.0f}")
+    assert 0.5 * RATE <= ba.moved <= 1.5 * RATE, f"moved {ba.moved:.0f} bytes for ~1s at {RATE} B/s"
+    ba.unregister(1)
+
+    # Idle again after the last transfer ended; the next one starts from zero as well
+    await asyncio.sleep(1.2)
+    before = ba.moved
+    ba._stamp -= 3600
+    ba.register(2, lambda: 4.0, apply=lambda bps: None)
+    ba.report(2, RATE)
+    await asyncio.sleep(1.2)
+    logging.info(f"TEST: second transfer moved={ba.moved - before:.0f}")
+    assert 0.5 * RATE <= ba.moved - before <= 1.5 * RATE, f"moved {ba.moved - before:.0f} bytes after idling"
+    ba.unregister(2)
+
+
+async def late_register():
+    """A reported transfer joining mid-round is not credited for the part of the round before it."""
+    ba = BandwidthAllocator()
+    ba.register(1, lambda: 4.0, apply=lambda bps: None)
+    await asyncio.sleep(0.9)
+    ba.register(2, lambda: 4.0, apply=lambda bps: None)
+    ba.report(2, RATE)
+    ba.rebalance()
+    logging.info(f"TEST: late register moved={ba.moved:.0f}")
+    assert ba.moved <= 0.2 * RATE, f"moved {ba.moved:.0f} bytes for a transfer registered just now"
+    ba.unregister(1)
+    ba.unregister(2)
+
+
+async def main():
+    await idle_then_report()
+    await late_register()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
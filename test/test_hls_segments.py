@@ -0,0 +1,112 @@
+import asyncio
+import hashlib
+import logging
+import random
+import tempfile
+from collections import Counter
+from pathlib import Path
+
+from aiohttp import web
+
+from app import SegmentDownloader, _parse_hls_media_playlist, _termoload_ydl_class
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s', force=True)
+
+SEGMENTS = 40
+SEGMENT_SIZE = 64 * 1024
+
+
+def segment_bytes(i):
+    return hashlib.sha256(str(i).encode()).digest() * (SEGMENT_SIZE // 32)
+
+
+def init_bytes():
+    return b"INIT" * 256
+
+
+FLAKY = {3, 17, 29}
+
+
+def make_app(flaky, hits):
+    """Synthetic VOD playlist: an init section plus SEGMENTS segments.
+
+    Segments in ``flaky`` fail once with 503 (and are removed from the set);
+    ``hits`` counts requests per segment.
+    """
+
+    async def playlist(request):
+        lines = ["#EXTM3U", "#EXT-X-VERSION:7", "#EXT-X-TARGETDURATION:2", '#EXT-X-MAP:URI="init.mp4"']
+        for i in range(SEGMENTS):
+            lines.append("#EXTINF:2.0,")
+            lines.append(f"seg{i}.m4s")
+        lines.append("#EXT-X-ENDLIST")
+        return web.Response(text="\n".join(lines), content_type="application/vnd.apple.mpegurl")
+
+    async def init(request):
+        return web.Response(body=init_bytes(), content_type="video/mp4")
+
+    async def segment(request):
+        i = int(request.match_info["index"])
+        hits[i] += 1
+        if i in flaky:
+            flaky.discard(i)
+            return web.Response(status=503)
+        await asyncio.sleep(random.uniform(0, 0.05))
+        return web.Response(body=segment_bytes(i), content_type="video/iso.segment")
+
+    app = web.Application()
+    app.router.add_get("/media.m3u8", playlist)
+    app.router.add_get("/init.mp4", init)
+    app.router.add_get("/seg{index}.m4s", segment)
+    return app
+
+
+def check_retried(hits):
+    assert all(hits[i] == 2 for i in FLAKY), f"flaky segments not retried once: {dict(hits)}"
+    assert all(hits[i] == 1 for i in range(SEGMENTS) if i not in FLAKY), f"segments fetched more than once: {dict(hits)}"
+
+
+async def main():
+    flaky, hits = set(FLAKY), Counter()
+    runner = web.AppRunner(make_app(flaky, hits), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    base = f"http://127.0.0.1:{port}"
+    expected = init_bytes() + b"".join(segment_bytes(i) for i in range(SEGMENTS))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Engine directly
+        text = (await asyncio.to_thread(lambda: __import__("urllib.request").request.urlopen(f"{base}/media.m3u8").read())).decode()
+        segments = _parse_hls_media_playlist(text, f"{base}/media.m3u8")
+        logging.info(f"TEST: parsed {len(segments)} segments")
+        out = Path(tmp) / "direct.mp4"
+        size = await SegmentDownloader(segments, concurrency=6, retries=3).run(str(out))
+        logging.info(f"TEST: direct download size={size}")
+        assert out.read_bytes() == expected, "direct download does not match the concatenated segments"
+        assert size == len(expected), f"reported size {size} != {len(expected)}"
+        check_retried(hits)
+
+        # Fail the same segments again for the yt-dlp run
+        flaky.update(FLAKY)
+        hits.clear()
+
+        # Through yt-dlp (generic extractor -> m3u8_native -> SegmentDownloader)
+        def _run_ytdlp():
+            opts = {"outtmpl": str(Path(tmp) / "ytdlp.%(ext)s"), "quiet": True, "no_warnings": True, "noprogress": True,
+                    "concurrent_fragment_downloads": 6, "fragment_retries": 3}
+            with _termoload_ydl_class()(opts) as ydl:
+                info = ydl.extract_info(f"{base}/media.m3u8", download=True)
+            return info["requested_downloads"][-1]["filepath"]
+
+        path = await asyncio.to_thread(_run_ytdlp)
+        logging.info(f"TEST: yt-dlp download path={path}")
+        assert Path(path).read_bytes() == expected, "yt-dlp download does not match the concatenated segments"
+        check_retried(hits)
+
+    await runner.cleanup()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())